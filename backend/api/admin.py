@@ -0,0 +1,197 @@
+# backend/api/admin.py
+import hmac
+from flask import Blueprint, request, jsonify
+from jinja2 import UndefinedError
+from .decorators import require_admin
+from ..config import config
+from ..database.async_db import pool_stats
+from ..database import query_metrics
+from ..database.profile_repository import get_profile_summaries
+from ..database.supabase_client import invalidate_site_info_cache, site_info_cache_stats
+from ..services.auth_service import token_resolution_flight
+from ..services.campaign_service import campaign_status, start_campaign
+from ..services.delivery_status_service import delivery_status_stats
+from ..services.notification_outbox import dead_letters, outbox_stats, requeue_dead_letter
+from ..services.notification_service import admin_digest_stats, notification_client_stats
+from ..services.notification_templates import notification_templates
+from ..services.part_service import parts_search_stats
+from ..services.usage_service import get_top_consumers, get_user_usage_today
+from ..services.user_service import profile_cache
+from ..utils.executors import executor_stats
+from ..utils.http_cache import body_cache as http_body_cache
+from ..utils.resilience import resilience_stats
+from ..utils.security import verified_token_cache
+
+admin_bp = Blueprint('admin_api', __name__, url_prefix='/api/admin')
+
+# --- AI Usage: Top Consumers ---
+@admin_bp.route('/ai-usage/top', methods=['GET'])
+@require_admin
+async def ai_usage_top_consumers():
+    """Returns today's heaviest AI Mechanic users, served from in-memory counters, with their names and emails."""
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit' parameter"}), 400
+
+    consumers = get_top_consumers(limit)
+    try:
+        # One batched profiles query for the whole list
+        summaries = await get_profile_summaries(c['user_id'] for c in consumers)
+    except Exception as e:
+        print(f"WARN: Could not load profiles for top AI consumers: {e}")
+        summaries = {}
+    for consumer in consumers:
+        summary = summaries.get(consumer['user_id'])
+        consumer['profile'] = summary._asdict() if summary else None
+    return jsonify({"consumers": consumers}), 200
+
+# --- AI Usage: Single User ---
+@admin_bp.route('/ai-usage/<user_id>', methods=['GET'])
+@require_admin
+async def ai_usage_for_user(user_id):
+    """Returns today's AI Mechanic usage totals for one user."""
+    return jsonify({"user_id": user_id, **get_user_usage_today(user_id)}), 200
+
+# --- Parts Search Index ---
+@admin_bp.route('/metrics/parts-index', methods=['GET'])
+@require_admin
+async def parts_index_metrics():
+    """Parts search index size, refresh counters and watermark."""
+    return jsonify(parts_search_stats()), 200
+
+# --- Cache Metrics ---
+@admin_bp.route('/metrics/caches', methods=['GET'])
+@require_admin
+async def cache_metrics():
+    """Returns size and hit-rate counters for the in-process caches."""
+    return jsonify({"caches": [profile_cache.stats(), verified_token_cache.stats(), site_info_cache_stats(),
+                               http_body_cache.stats()]}), 200
+
+# --- Auth Resolution Metrics ---
+@admin_bp.route('/metrics/auth', methods=['GET'])
+@require_admin
+async def auth_metrics():
+    """Returns single-flight counters for access token resolution."""
+    return jsonify({"token_resolution": token_resolution_flight.stats()}), 200
+
+# --- Database Pool Metrics ---
+@admin_bp.route('/metrics/db', methods=['GET'])
+@require_admin
+async def db_metrics():
+    """Returns connection limits and query counters for the async data access layer."""
+    return jsonify({"db": pool_stats(), "queries": query_metrics.metrics_summary()}), 200
+
+@admin_bp.route('/metrics/db/queries', methods=['GET'])
+@require_admin
+async def db_query_metrics():
+    """Top-N query shapes. ?sort=total_ms|count|bytes|rows|max_rows|max_ms|p95_ms&limit=N"""
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit' parameter"}), 400
+    sort = request.args.get('sort', 'total_ms')
+    return jsonify({"sort": sort, "queries": query_metrics.top_queries(limit, sort)}), 200
+
+@admin_bp.route('/metrics/db/slow', methods=['GET'])
+@require_admin
+async def db_slow_queries():
+    """Most recent queries slower than DB_SLOW_QUERY_MS, newest first."""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit' parameter"}), 400
+    return jsonify({"slow_queries": query_metrics.slow_queries(limit)}), 200
+
+@admin_bp.route('/metrics/resilience', methods=['GET'])
+@require_admin
+async def resilience_metrics():
+    """Timeouts, retries, hedges and circuit breaker state per upstream dependency."""
+    return jsonify({"dependencies": resilience_stats()}), 200
+
+@admin_bp.route('/metrics/executors', methods=['GET'])
+@require_admin
+async def executor_metrics():
+    """Queue length, active threads and queue wait time per blocking-work executor."""
+    return jsonify({"executors": executor_stats()}), 200
+
+# --- Notification Outbox ---
+@admin_bp.route('/notifications/outbox', methods=['GET'])
+@require_admin
+async def notification_outbox_stats():
+    """Outbox counts by status, per-channel delivery counters, provider connection reuse and admin digest savings."""
+    return jsonify({**await outbox_stats(), 'providers': notification_client_stats(), 'admin_digests': admin_digest_stats(),
+                    'delivery_log': delivery_status_stats()}), 200
+
+@admin_bp.route('/notifications/outbox/dead', methods=['GET'])
+@require_admin
+async def notification_dead_letters():
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit' parameter"}), 400
+    return jsonify({"dead_letters": await dead_letters(limit)}), 200
+
+@admin_bp.route('/notifications/outbox/<int:message_id>/retry', methods=['POST'])
+@require_admin
+async def retry_dead_letter(message_id: int):
+    """Moves a dead-lettered notification back to the queue with a fresh retry budget."""
+    if not await requeue_dead_letter(message_id):
+        return jsonify({"message": "No dead-lettered notification with that id"}), 404
+    return jsonify({"message": "Notification requeued"}), 200
+
+# --- Site Information Cache Invalidation ---
+@admin_bp.route('/site-info/invalidate', methods=['POST'])
+@require_admin
+async def site_info_invalidate():
+    """Reloads the site_information cache now (e.g. right after editing notification settings)."""
+    invalidate_site_info_cache()
+    return jsonify({"message": "Site info refresh scheduled.", "cache": site_info_cache_stats()}), 202
+
+@admin_bp.route('/site-info/webhook', methods=['POST'])
+async def site_info_webhook():
+    """
+    Target for a Supabase Database Webhook on site_information (INSERT/UPDATE/DELETE).
+    Authenticated by the X-Webhook-Secret header instead of a user token.
+    """
+    if not config.SITE_INFO_WEBHOOK_SECRET:
+        return jsonify({"message": "Webhook not configured"}), 404
+    provided = request.headers.get('X-Webhook-Secret', '')
+    if not hmac.compare_digest(provided.encode(), config.SITE_INFO_WEBHOOK_SECRET.encode()):
+        return jsonify({"message": "Invalid webhook secret"}), 401
+    invalidate_site_info_cache()
+    return jsonify({"message": "Site info refresh scheduled."}), 202
+
+# --- Bulk Email Campaigns ---
+@admin_bp.route('/campaigns', methods=['POST'])
+@require_admin
+async def create_campaign():
+    """
+    Starts (or resumes) a campaign in the background.
+    Body: {"campaign_id": "...", "template": "campaign_announcement", "context": {...}}
+    """
+    data = request.get_json(silent=True) or {}
+    campaign_id, template = data.get('campaign_id'), data.get('template')
+    if not campaign_id or not template:
+        return jsonify({"message": "'campaign_id' and 'template' are required"}), 400
+    if template not in notification_templates.names():
+        return jsonify({"message": f"Unknown template '{template}'"}), 400
+    context = data.get('context') or {}
+    if not isinstance(context, dict):
+        return jsonify({"message": "'context' must be an object"}), 400
+    try:
+        notification_templates.render(template, **context) # Fails here, not silently on the campaign thread
+    except UndefinedError as e:
+        return jsonify({"message": f"Template '{template}' needs more context: {e.message}"}), 400
+    if not start_campaign(str(campaign_id), template, context):
+        return jsonify({"message": "Campaign is already running"}), 409
+    return jsonify({"message": "Campaign started", "campaign_id": campaign_id}), 202
+
+@admin_bp.route('/campaigns/<campaign_id>', methods=['GET'])
+@require_admin
+async def get_campaign(campaign_id: str):
+    """Checkpoint and throughput of a campaign."""
+    status = await campaign_status(campaign_id)
+    if status is None:
+        return jsonify({"message": "Campaign not found"}), 404
+    return jsonify(status), 200
@@ -1,7 +1,7 @@
 # backend/api/ai.py
 from flask import Blueprint, request, jsonify, Response, stream_with_context
 from ..services.ai_service import run_ai_mechanic_agent, get_chat_history # Service yields SSE strings
-from ..services.auth_service import get_user_from_token
+from .decorators import require_auth, current_user
 from ..models.ai_models import AiChatRequest, ChatHistoryResponse
 from pydantic import ValidationError
 import asyncio
@@ -12,30 +12,14 @@ ai_bp = Blueprint('ai_api', __name__, url_prefix='/api/ai')
 
 # --- REVERTED: Chat Endpoint (Synchronous Route, Async Generator Consumer) ---
 @ai_bp.route('/chat', methods=['POST'])
+@require_auth(stream=True, missing_message="Authentication required", invalid_message="Invalid or expired token")
 def chat_with_ai_mechanic_stream(): # Changed back to synchronous 'def'
     """
     Endpoint for users to chat with the AI Mechanic Agent using SSE streaming.
     Requires authentication. Accepts session ID and user message.
     Uses a synchronous route that manages an async generator yielding SSE strings.
     """
-    # --- Authentication Check ---
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response("data: {\"error\": \"Authentication required\"}\n\n", status=401, mimetype='text/event-stream')
-
-    access_token = auth_header.split(' ')[1]
-
-    # --- Run async function synchronously to get user profile ---
-    try:
-        # Use asyncio.run() for the one-off async call in the sync route
-        user_profile = asyncio.run(get_user_from_token(access_token))
-        if not user_profile:
-             return Response("data: {\"error\": \"Invalid or expired token\"}\n\n", status=401, mimetype='text/event-stream')
-    except Exception as auth_err:
-         print(f"Error during sync auth check: {auth_err}")
-         traceback.print_exc()
-         return Response("data: {\"error\": \"Authentication check failed\"}\n\n", status=500, mimetype='text/event-stream')
-    # --- End Authentication Check ---
+    user_profile = current_user()
 
     # --- Get JSON data ---
     json_data = request.get_json()
@@ -107,21 +91,14 @@ def chat_with_ai_mechanic_stream(): # Changed back to synchronous 'def'
 
 # --- AI Chat History Endpoint (Keep as is, fully async) ---
 @ai_bp.route('/history/<session_id>', methods=['GET'])
+@require_auth(missing_message="Authentication required",
+              invalid_message="Invalid or expired token, or user profile not found. Please log in again.")
 async def get_ai_chat_history(session_id):
     """
     Endpoint to fetch chat history for a specific session.
     Requires authentication.
     """
-    # --- Authentication Check ---
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({"message": "Authentication required"}), 401
-
-    access_token = auth_header.split(' ')[1]
-    user_profile = await get_user_from_token(access_token)
-    if not user_profile:
-        return jsonify({"message": "Invalid or expired token, or user profile not found. Please log in again."}), 401
-    # --- End Authentication Check ---
+    user_profile = current_user()
 
     # --- Fetch Session Chat History ---
     try:
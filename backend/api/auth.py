@@ -1,16 +1,17 @@
 # backend/api/auth.py
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, g, request, jsonify, make_response, Response, stream_with_context
 # --- Import specific functions directly from service modules ---
 from ..services.auth_service import ( # Group imports for readability
     register_user,
     login_user,
     logout_user,
-    get_user_from_token,
     change_user_password,
     request_password_reset,
     reset_user_password # Correct import
 )
 from ..services.user_service import update_user_profile
+from ..services.provisioning_service import parse_bulk_rows, validate_bulk_rows, bulk_register_users
+from ..utils.helpers import iterate_async_generator
 # --- Import models ---
 from ..models.user_models import ( # Group imports
     UserRegistration,
@@ -20,8 +21,11 @@ from ..models.user_models import ( # Group imports
     UserForgotPassword,
     UserResetPassword # Correct import
 )
+from .decorators import bearer_token, current_user, require_auth
 from pydantic import ValidationError
 import asyncio
+import csv
+import json
 
 # Define the Blueprint
 auth_bp = Blueprint('auth_api', __name__, url_prefix='/api/auth')
@@ -68,6 +72,46 @@ async def register():
         status = 201 if profile else 400
         return jsonify({"message": message or "Registration status unknown."}), status
 
+# --- Bulk Registration Endpoint (Business Accounts) ---
+@auth_bp.route('/register/bulk', methods=['POST'])
+@require_auth(verify_remote=True)
+def bulk_register():
+    """
+    Provisions many driver accounts for the calling business account.
+    Accepts a JSON list / {"users": [...]}, a text/csv body, or a CSV file upload ('file').
+    All rows are validated before anything is created; results stream back as NDJSON.
+    """
+    business = current_user()
+    if business.account_type != 'business':
+        return jsonify({"message": "Bulk registration is only available to business accounts."}), 403
+
+    upload = request.files.get('file')
+    if upload:
+        payload = upload.read().decode('utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        payload = request.get_data(as_text=True)
+    else:
+        payload = request.get_json(silent=True)
+    if not payload:
+        return jsonify({"message": "Invalid request body. JSON list or CSV expected."}), 400
+
+    try:
+        raw_rows = parse_bulk_rows(payload)
+    except (ValueError, csv.Error) as e:
+        return jsonify({"message": f"Could not parse request: {e}"}), 400
+
+    rows, errors = validate_bulk_rows(raw_rows)
+    if errors:
+        return jsonify({"message": "Invalid input data", "errors": errors}), 400
+    if not rows:
+        return jsonify({"message": "No users provided."}), 400
+
+    def generate():
+        for result in iterate_async_generator(lambda: bulk_register_users(rows, business)):
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # --- Login Endpoint (MODIFIED with Logging) ---
 @auth_bp.route('/login', methods=['POST'])
 async def login():
@@ -94,30 +138,19 @@ async def login():
 # --- Logout Endpoint (Cleaned Up) ---
 @auth_bp.route('/logout', methods=['POST'])
 async def logout():
-    """User logout endpoint."""
-    auth_header = request.headers.get('Authorization')
-    access_token = None
-    if auth_header and auth_header.startswith('Bearer '):
-        access_token = auth_header.split(' ')[1]
-
-    success, message = await logout_user(access_token)
+    """User logout endpoint. The token is optional: without one, the client is just told to clear its tokens."""
+    success, message = await logout_user(bearer_token())
 
     resp = make_response(jsonify({"message": message or "Logout processed. Please clear local tokens."}), 200)
     return resp
 
 # --- Combined User Profile Endpoint (GET and PUT) (Cleaned Up) ---
 @auth_bp.route('/user', methods=['GET', 'PUT'])
+# Profile updates are revocation-sensitive, so confirm the session with Supabase Auth
+@require_auth(verify_remote=lambda: request.method == 'PUT')
 async def handle_user_profile():
     """Handles getting (GET) or updating (PUT) the current user's profile."""
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({"message": "Authorization header missing or invalid"}), 401
-
-    access_token = auth_header.split(' ')[1]
-
-    user = await get_user_from_token(access_token)
-    if not user:
-        return jsonify({"message": "Invalid or expired token, or profile not found"}), 401
+    user = current_user()
 
     if request.method == 'GET':
         # print(f"GET /api/auth/user requested for user_id: {user.id}") # Removed debug log
@@ -157,22 +190,16 @@ async def forgot_password():
 
 # --- Password Reset Confirmation Endpoint (Cleaned Up) ---
 @auth_bp.route('/reset-password', methods=['POST'])
+@require_auth(verify_remote=True, missing_message="Password reset failed. Invalid request or missing token.",
+              invalid_message="Password reset failed. The reset link has expired or is invalid. Please request a new one.")
 async def handle_reset_password():
-    """Handles the actual password update after user clicks the reset link."""
-    auth_header = request.headers.get('Authorization')
-    access_token = None
-    if auth_header and auth_header.startswith('Bearer '):
-        access_token = auth_header.split(' ')[1]
-    else:
-        # print("Reset password attempt failed: Authorization header missing or invalid.") # Removed debug log
-        return jsonify({"message": "Password reset failed. Invalid request or missing token."}), 401
-
+    """Handles the actual password update after user clicks the reset link (its recovery token is the bearer token)."""
     try:
         reset_data = UserResetPassword(**request.json)
     except ValidationError as e:
         return jsonify({"message": "Invalid input data", "errors": e.errors()}), 400
 
-    success, message = await reset_user_password(access_token, reset_data)
+    success, message = await reset_user_password(g.access_token, reset_data, current_user().id)
 
     if success:
         return jsonify({"message": message or "Password reset successfully."}), 200
@@ -184,20 +211,15 @@ async def handle_reset_password():
 
 # --- Password Change Endpoint (Authenticated User) (Cleaned Up) ---
 @auth_bp.route('/password', methods=['PUT'])
+@require_auth(verify_remote=True) # Revocation-sensitive, like profile updates
 async def change_password():
     """Changes the password for the currently authenticated user."""
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({"message": "Authorization header missing or invalid"}), 401
-
-    access_token = auth_header.split(' ')[1]
-
     try:
         password_data = UserPasswordChange(**request.json)
     except ValidationError as e:
         return jsonify({"message": "Invalid input data", "errors": e.errors()}), 400
 
-    success, message = await change_user_password(access_token, password_data)
+    success, message = await change_user_password(g.access_token, password_data, current_user().id)
 
     if success:
         return jsonify({"message": message or "Password updated successfully."}), 200
@@ -0,0 +1,105 @@
+# backend/api/decorators.py
+"""
+Request-scoped authentication for API routes.
+
+`@require_auth` parses the Authorization header and resolves the user once per
+request into `g.current_user` / `g.access_token`. Works on both async routes and
+synchronous ones (like the SSE chat endpoint).
+"""
+import asyncio
+import inspect
+import json
+import traceback
+from functools import wraps
+from typing import Callable
+
+from flask import g, jsonify, request, Response
+
+from ..services.auth_service import get_user_from_token
+from ..config import config
+
+
+def _error(message: str, status: int, stream: bool):
+    if stream:
+        return Response(f"data: {json.dumps({'error': message})}\n\n", status=status, mimetype='text/event-stream')
+    return jsonify({"message": message}), status
+
+
+def bearer_token() -> str | None:
+    """The access token from the Authorization header, or None. For routes where a token is optional (logout)."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ')[1]
+
+
+async def _authenticate(verify_remote: bool | Callable[[], bool], stream: bool, missing_message: str, invalid_message: str):
+    """Resolves the current user into `g`. Returns an error response, or None on success."""
+    if getattr(g, 'current_user', None) is not None:
+        return None # Already resolved for this request
+
+    access_token = bearer_token()
+    if not access_token:
+        return _error(missing_message, 401, stream)
+
+    remote = verify_remote() if callable(verify_remote) else verify_remote
+    user = await get_user_from_token(access_token, verify_remote=remote)
+    if not user:
+        return _error(invalid_message, 401, stream)
+
+    g.current_user = user
+    g.access_token = access_token
+    return None
+
+
+def require_auth(view=None, *, verify_remote: bool | Callable[[], bool] = False, stream: bool = False,
+                 missing_message: str = "Authorization header missing or invalid",
+                 invalid_message: str = "Invalid or expired token, or profile not found"):
+    """
+    Decorator that requires a valid bearer token.
+    `verify_remote` (bool or callable evaluated per request) asks Supabase Auth to confirm
+    the session for revocation-sensitive routes. `stream=True` returns SSE-formatted errors.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                error_response = await _authenticate(verify_remote, stream, missing_message, invalid_message)
+                if error_response is not None:
+                    return error_response
+                return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def sync_wrapper(*args, **kwargs):
+            try:
+                # Use asyncio.run() for the one-off async call in the sync route
+                error_response = asyncio.run(_authenticate(verify_remote, stream, missing_message, invalid_message))
+            except Exception as auth_err:
+                print(f"Error during sync auth check: {auth_err}")
+                traceback.print_exc()
+                return _error("Authentication check failed", 500, stream)
+            if error_response is not None:
+                return error_response
+            return fn(*args, **kwargs)
+        return sync_wrapper
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+def require_admin(view):
+    """Decorator for admin-only async routes. Admins are listed in config.ADMIN_USER_EMAILS."""
+    @require_auth(verify_remote=True) # Admin access must honour revocation
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        if (g.current_user.email or '').lower() not in config.ADMIN_USER_EMAILS: # Phone-only sign-ups have no email
+            return jsonify({"message": "Admin access required"}), 403
+        return await view(*args, **kwargs)
+    return wrapper
+
+
+def current_user():
+    """Returns the user resolved by @require_auth for this request."""
+    return g.current_user
@@ -0,0 +1,99 @@
+# backend/api/notifications.py
+"""
+Provider delivery-status webhooks.
+
+Both endpoints verify the provider's signature, hand the parsed events to the
+delivery status buffer and return; the notification_log upserts happen on the
+flusher thread. They are plain (sync) views - there is nothing to await, and
+providers deliver in bursts. A full buffer answers 503 so the provider retries.
+"""
+import json
+
+from flask import Blueprint, request, jsonify
+from sendgrid.helpers.eventwebhook import EventWebhook, EventWebhookHeader
+from twilio.request_validator import RequestValidator
+
+from ..config import config
+from ..services.delivery_status_service import SENDGRID_EVENT_STATUS, record_delivery_statuses
+
+notifications_bp = Blueprint('notifications_api', __name__, url_prefix='/api/notifications')
+
+_sendgrid_verifier: EventWebhook | None = None
+_twilio_validator: RequestValidator | None = None
+
+
+def _get_sendgrid_verifier() -> EventWebhook:
+    global _sendgrid_verifier
+    if _sendgrid_verifier is None:
+        _sendgrid_verifier = EventWebhook(config.SENDGRID_WEBHOOK_PUBLIC_KEY)
+    return _sendgrid_verifier
+
+
+def _get_twilio_validator() -> RequestValidator:
+    global _twilio_validator
+    if _twilio_validator is None:
+        _twilio_validator = RequestValidator(config.TWILIO_AUTH_TOKEN)
+    return _twilio_validator
+
+
+def _sendgrid_updates(events: list) -> list[dict]:
+    updates = []
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        status = SENDGRID_EVENT_STATUS.get(event.get('event'))
+        message_id = str(event.get('sg_message_id') or '').split('.', 1)[0] # '<X-Message-Id>.<filter info>'
+        if not status or not message_id:
+            continue
+        updates.append({
+            'provider': 'sendgrid', 'message_id': message_id, 'recipient': event.get('email'), 'channel': 'email',
+            'status': status, 'error': event.get('reason') or event.get('response'), 'event_at': event.get('timestamp'),
+        })
+    return updates
+
+
+@notifications_bp.route('/webhooks/sendgrid', methods=['POST'])
+def sendgrid_event_webhook():
+    """SendGrid Event Webhook (signed): a JSON array of events, up to thousands per POST."""
+    if not config.SENDGRID_WEBHOOK_PUBLIC_KEY:
+        return jsonify({"message": "Webhook not configured"}), 404
+    payload = request.get_data(as_text=True)
+    signature = request.headers.get(EventWebhookHeader.SIGNATURE, '')
+    timestamp = request.headers.get(EventWebhookHeader.TIMESTAMP, '')
+    try:
+        verified = bool(signature and timestamp) and _get_sendgrid_verifier().verify_signature(payload, signature, timestamp)
+    except Exception:
+        verified = False # Malformed signature encoding
+    if not verified:
+        return jsonify({"message": "Invalid webhook signature"}), 401
+
+    try:
+        events = json.loads(payload)
+    except ValueError:
+        return jsonify({"message": "Invalid request body. JSON array expected."}), 400
+    if not isinstance(events, list):
+        return jsonify({"message": "Invalid request body. JSON array expected."}), 400
+    if not record_delivery_statuses(_sendgrid_updates(events)):
+        return jsonify({"message": "Delivery log busy, retry later"}), 503
+    return '', 204
+
+
+@notifications_bp.route('/webhooks/twilio', methods=['POST'])
+def twilio_status_callback():
+    """Twilio message status callback (form-encoded, one status per request)."""
+    if not config.TWILIO_AUTH_TOKEN:
+        return jsonify({"message": "Webhook not configured"}), 404
+    form = request.form
+    url = config.TWILIO_STATUS_CALLBACK_URL or request.url # Behind a proxy, the public URL Twilio signed
+    if not _get_twilio_validator().validate(url, form.to_dict(), request.headers.get('X-Twilio-Signature', '')):
+        return jsonify({"message": "Invalid webhook signature"}), 401
+
+    to = form.get('To', '')
+    update = {
+        'provider': 'twilio', 'message_id': form.get('MessageSid'), 'recipient': to.removeprefix('whatsapp:'),
+        'channel': 'whatsapp' if to.startswith('whatsapp:') else 'sms',
+        'status': form.get('MessageStatus'), 'error': form.get('ErrorCode'),
+    }
+    if not record_delivery_statuses([update]):
+        return jsonify({"message": "Delivery log busy, retry later"}), 503
+    return '', 204
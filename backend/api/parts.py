@@ -0,0 +1,143 @@
+# backend/api/parts.py
+from flask import Blueprint, request, jsonify
+from ..config import config
+from ..services.part_service import (CatalogNotReadyError, FitmentIndexUnavailableError, LIST_SORTS, decode_cursor,
+                                     get_fitment_index, get_parts_index)
+from ..utils.http_cache import cacheable_json
+
+parts_bp = Blueprint('parts_api', __name__, url_prefix='/api/parts')
+
+# Served from the in-memory catalog index: plain (sync) views, nothing to await.
+# Successful GETs carry an ETag derived from the catalog version (304 on If-None-Match) and are compressed.
+
+
+def _paging() -> tuple[int, int]:
+    """(limit, offset) from the query string; raises ValueError on bad input."""
+    limit = min(max(int(request.args.get('limit', 20)), 1), config.PARTS_SEARCH_MAX_LIMIT)
+    offset = max(int(request.args.get('offset', 0)), 0)
+    return limit, offset
+
+
+def _optional_float(name: str) -> float | None:
+    value = request.args.get(name)
+    return float(value) if value not in (None, '') else None
+
+
+def _not_ready():
+    return jsonify({"message": "Parts catalog is loading, try again shortly."}), 503, {'Retry-After': '5'}
+
+
+# --- List / Search Parts ---
+@parts_bp.route('', methods=['GET'])
+def list_parts():
+    """
+    Browses the catalog one keyset page at a time, or searches it when `q` is
+    given (same parameters as /search). Pass `next_cursor` from a response as
+    `cursor` for the following page. Optional: sort (name, -name, price, -price,
+    updated_at, -updated_at), brand, category, in_stock=true, min_price, max_price.
+    """
+    if request.args.get('q', '').strip():
+        return search_parts()
+    try:
+        limit, _ = _paging()
+        min_price, max_price = _optional_float('min_price'), _optional_float('max_price')
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit', 'min_price' or 'max_price' parameter"}), 400
+    try:
+        index = get_parts_index()
+    except CatalogNotReadyError:
+        return _not_ready()
+    options = dict(sort=request.args.get('sort', 'name'), cursor=request.args.get('cursor') or None, limit=limit,
+                   brand=request.args.get('brand'), category=request.args.get('category'),
+                   in_stock=request.args.get('in_stock', '').lower() in ('1', 'true', 'yes'),
+                   min_price=min_price, max_price=max_price)
+    try:
+        if options['cursor']:
+            decode_cursor(options['cursor'], options['sort'])
+        elif options['sort'] not in LIST_SORTS:
+            raise ValueError(f"Unknown sort '{options['sort']}'")
+    except ValueError as e:
+        return jsonify({"message": f"Invalid 'sort' or 'cursor' parameter: {e}"}), 400
+    return cacheable_json(index.catalog_version, lambda: index.list_page(**options))
+
+
+@parts_bp.route('/search', methods=['GET'])
+def search_parts():
+    """
+    Full-text part search over names, brands, categories and part numbers
+    (OEM or aftermarket, with or without dashes/spaces). Prefixes and small
+    typos match. Optional exact `brand` and `category` filters.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"message": "Query parameter 'q' is required"}), 400
+    try:
+        limit, offset = _paging()
+    except ValueError:
+        return jsonify({"message": "Invalid 'limit' or 'offset' parameter"}), 400
+    try:
+        index = get_parts_index()
+    except CatalogNotReadyError:
+        return _not_ready()
+    return cacheable_json(index.catalog_version, lambda: index.search(
+        query, limit=limit, offset=offset, brand=request.args.get('brand'), category=request.args.get('category')))
+
+
+# --- Vehicle Fitment ---
+@parts_bp.route('/fitment', methods=['GET'])
+def parts_for_vehicle():
+    """Parts that fit make/model/year (optional engine, category), from the memory-mapped fitment index."""
+    make, model = request.args.get('make', '').strip(), request.args.get('model', '').strip()
+    if not make or not model or not request.args.get('year'):
+        return jsonify({"message": "Query parameters 'make', 'model' and 'year' are required"}), 400
+    try:
+        year = int(request.args['year'])
+        limit, offset = _paging()
+    except ValueError:
+        return jsonify({"message": "Invalid 'year', 'limit' or 'offset' parameter"}), 400
+    try:
+        fitment = get_fitment_index()
+    except FitmentIndexUnavailableError:
+        return jsonify({"message": "Vehicle fitment data is not available."}), 503
+    ordinals = fitment.parts_for(make, model, year, request.args.get('engine'), request.args.get('category'))
+    if ordinals is None:
+        return jsonify({"message": "Vehicle not found"}), 404
+
+    page = ordinals[offset:offset + limit]
+    try:
+        index = get_parts_index()
+    except CatalogNotReadyError:
+        # Details follow once the catalog index has loaded; not cacheable until then
+        return jsonify({'total': len(ordinals), 'results': [{'id': fitment.part_id(o)} for o in page]}), 200
+
+    def build() -> dict:
+        parts = (index.get(fitment.part_id(o)) for o in page)
+        return {'total': len(ordinals), 'results': [part._asdict() for part in parts if part is not None]}
+    return cacheable_json(f"{fitment.mtime}/{index.catalog_version}", build)
+
+
+@parts_bp.route('/fitment/vehicles', methods=['GET'])
+def fitment_vehicle_options():
+    """Cascading vehicle selector: makes; models for `make`; years for `model`; engines for `year`."""
+    try:
+        fitment = get_fitment_index()
+    except FitmentIndexUnavailableError:
+        return jsonify({"message": "Vehicle fitment data is not available."}), 503
+    make, model, year = request.args.get('make'), request.args.get('model'), request.args.get('year')
+    try:
+        options = fitment.vehicle_options(make, model if make else None, int(year) if make and model and year else None)
+    except ValueError:
+        return jsonify({"message": "Invalid 'year' parameter"}), 400
+    return jsonify({'options': options}), 200
+
+
+# --- Single Part ---
+@parts_bp.route('/<part_id>', methods=['GET'])
+def get_part(part_id: str):
+    try:
+        part = get_parts_index().get(part_id)
+    except CatalogNotReadyError:
+        return _not_ready()
+    if part is None:
+        return jsonify({"message": "Part not found"}), 404
+    return cacheable_json(part.updated_at, part._asdict)
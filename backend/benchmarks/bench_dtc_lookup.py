@@ -0,0 +1,42 @@
+# backend/benchmarks/bench_dtc_lookup.py
+"""
+Benchmarks the OBD-II DTC trie: dataset load time and exact/prefix/fuzzy/batch lookup latency.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_dtc_lookup
+"""
+import statistics
+import time
+
+from ..services.dtc_service import build_trie_from_file, lookup_codes, load_dtc_database
+
+
+def _time_per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    load_times = []
+    for _ in range(20):
+        start = time.perf_counter()
+        trie = build_trie_from_file()
+        load_times.append((time.perf_counter() - start) * 1000)
+    print(f"Load: {trie.size} codes, median {statistics.median(load_times):.2f} ms, max {max(load_times):.2f} ms")
+
+    load_dtc_database()
+    cases = {
+        'exact (P0420)': lambda: trie.exact('P0420'),
+        'exact + make (P1349, toyota)': lambda: trie.exact('P1349', 'toyota'),
+        'prefix (P03, 10 results)': lambda: trie.prefix('P03'),
+        'fuzzy (P042O, distance 1)': lambda: trie.fuzzy('P042O'),
+        'batch lookup (5 codes)': lambda: lookup_codes(['P0420', 'P0171', 'p-0300', 'P030', 'U01OO']),
+    }
+    for name, fn in cases.items():
+        print(f"{name:<32} {_time_per_call_us(fn, 5000):8.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_fitment_index.py
+"""
+Benchmarks the memory-mapped vehicle fitment index on a synthetic catalog:
+build time, file size, open time and lookup latency ("parts for a 2012 Toyota
+Corolla 1.8L", with and without a category filter).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_fitment_index [parts] [iterations]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from ..database.part_repository import FitmentRow
+from ..services.part_service import FitmentIndex, build_fitment_file
+from .bench_parts_search import synthetic_catalog
+
+VEHICLES = {
+    'Toyota': {'Corolla': ['1.8', '2.0'], 'Camry': ['2.5', '3.5'], 'RAV4': ['2.5'], 'Hilux': ['2.4', '2.8']},
+    'Honda': {'Civic': ['1.5', '2.0'], 'Accord': ['1.5', '2.0'], 'CR-V': ['1.5', '2.4']},
+    'Ford': {'Focus': ['1.0', '2.0'], 'F-150': ['2.7', '3.5', '5.0'], 'Ranger': ['2.3']},
+    'Volkswagen': {'Golf': ['1.4', '2.0'], 'Passat': ['1.8', '2.0'], 'Jetta': ['1.4']},
+    'BMW': {'3 Series': ['2.0', '3.0'], '5 Series': ['2.0', '3.0'], 'X5': ['3.0', '4.4']},
+    'Nissan': {'Altima': ['2.5'], 'Sentra': ['1.8', '2.0'], 'Navara': ['2.3', '2.5']},
+}
+
+
+def synthetic_fitments(parts, seed: int = 11):
+    rng = random.Random(seed)
+    models = [(make, model, engines) for make, ms in VEHICLES.items() for model, engines in ms.items()]
+    for part in parts:
+        for _ in range(rng.randint(1, 4)):
+            make, model, engines = rng.choice(models)
+            year_from = rng.randint(1998, 2020)
+            engine = rng.choice(engines + [None]) # None: fits every engine
+            yield FitmentRow(part.id, make, model, year_from, min(2024, year_from + rng.randint(0, 8)), engine)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    catalog = synthetic_catalog(count)
+    path = os.path.join(tempfile.mkdtemp(), 'fitment_index.bin')
+
+    start = time.perf_counter()
+    counts = build_fitment_file(path, catalog, synthetic_fitments(catalog))
+    print(f"Built in {time.perf_counter() - start:.1f}s: {counts}")
+    start = time.perf_counter()
+    index = FitmentIndex(path)
+    print(f"Opened (mmap) in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    lookups = {
+        'vehicle + engine': ('Toyota', 'Corolla', 2012, '1.8', None),
+        'vehicle, any engine': ('Toyota', 'Corolla', 2012, None, None),
+        'vehicle + category': ('Toyota', 'Corolla', 2012, '1.8 l', 'Brakes'),
+        'unknown vehicle': ('Toyota', 'Supra', 2012, None, None),
+    }
+    for label, args in lookups.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            result = index.parts_for(*args)
+        per_lookup_us = (time.perf_counter() - start) / iterations * 1_000_000
+        found = len(result) if result is not None else 'n/a'
+        print(f"{label:<22} {per_lookup_us:6.2f} us/lookup  parts: {found}")
+
+    ordinals = index.parts_for('Toyota', 'Corolla', 2012, '1.8', 'Brakes')
+    start = time.perf_counter()
+    ids = [index.part_id(o) for o in ordinals[:20]]
+    print(f"\nFirst page of part ids (20) resolved in {(time.perf_counter() - start) * 1_000_000:.1f} us: {ids[:3]}...")
+    print(f"Makes: {index.vehicle_options()}  Corolla years: {index.vehicle_options('toyota', 'corolla')[:5]}...")
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# backend/benchmarks/bench_notification_clients.py
+"""
+Per-message overhead of email delivery: a new connection per message (the old
+code path) versus the persistent SendGrid client and the pooled SMTP sessions.
+
+Runs against local stand-in servers that add a fixed delay to every new
+connection, approximating the TLS handshake (and for SMTP, EHLO + AUTH) round
+trips to a remote provider. Message delivery itself is instant, so the
+difference is connection setup.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_notification_clients [messages] [handshake_ms]
+"""
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import smtplib
+from email.mime.text import MIMEText
+
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail
+
+from ..config import config
+from ..services import notification_service
+from ..utils.smtp_pool import SMTPPool
+
+HANDSHAKE_SECONDS = 0.03
+
+
+class _SendGridHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_SECONDS)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(202)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for EHLO, AUTH, MAIL/RCPT/DATA, RSET, NOOP and QUIT."""
+
+    def handle(self):
+        time.sleep(HANDSHAKE_SECONDS)
+        self.wfile.write(b"220 bench ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith('EHLO'):
+                self.wfile.write(b"250-bench\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif command.startswith('AUTH'):
+                self.wfile.write(b"235 Authenticated\r\n")
+            elif command.startswith('DATA'):
+                self.wfile.write(b"354 End data with .\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.wfile.write(b"250 Queued\r\n")
+            elif command.startswith('QUIT'):
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else: # MAIL, RCPT, RSET, NOOP
+                self.wfile.write(b"250 OK\r\n")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _serve(server) -> int:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def _time_per_message(label: str, send, messages: int) -> float:
+    start = time.perf_counter()
+    for _ in range(messages):
+        send()
+    per_message_ms = (time.perf_counter() - start) / messages * 1000
+    print(f"{label:<38} {per_message_ms:7.2f} ms/message")
+    return per_message_ms
+
+
+def main():
+    global HANDSHAKE_SECONDS
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    HANDSHAKE_SECONDS = (float(sys.argv[2]) if len(sys.argv) > 2 else 30) / 1000
+    print(f"{messages} sequential messages, {HANDSHAKE_SECONDS * 1000:.0f}ms simulated handshake per new connection\n")
+
+    # --- SendGrid ---
+    http_port = _serve(ThreadingHTTPServer(('127.0.0.1', 0), _SendGridHandler))
+    config.SENDGRID_API_KEY = 'SG.benchmark'
+    config.SENDGRID_API_BASE_URL = f"http://127.0.0.1:{http_port}/v3"
+    mail = Mail(from_email='bench@example.com', to_emails='driver@example.com', subject='Bench', html_content='<p>Hi</p>')
+
+    before = _time_per_message("SendGrid, new client per message:",
+                               lambda: SendGridAPIClient(config.SENDGRID_API_KEY, host=f"http://127.0.0.1:{http_port}").send(mail),
+                               messages)
+    after = _time_per_message("SendGrid, persistent keep-alive client:", lambda: notification_service._sendgrid_send(mail), messages)
+    print(f"{'':<38} {before / after:7.1f}x faster\n")
+
+    # --- SMTP ---
+    smtp_port = _serve(_ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler))
+    body = MIMEText("Hi", "plain").as_string()
+
+    def fresh_session():
+        with smtplib.SMTP('127.0.0.1', smtp_port, timeout=10) as server:
+            server.login('bench@example.com', 'app-password')
+            server.sendmail('bench@example.com', ['driver@example.com'], body)
+
+    pool = SMTPPool('127.0.0.1', smtp_port, 'bench@example.com', 'app-password', use_ssl=False, size=2)
+    before = _time_per_message("SMTP, connect + login per message:", fresh_session, messages)
+    after = _time_per_message("SMTP, pooled authenticated session:",
+                              lambda: pool.sendmail('bench@example.com', ['driver@example.com'], body), messages)
+    print(f"{'':<38} {before / after:7.1f}x faster")
+    print(f"SMTP pool: {pool.stats()}")
+    pool.close()
+    notification_service.close_notification_clients()
+
+
+if __name__ == '__main__':
+    main()
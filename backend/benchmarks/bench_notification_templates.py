@@ -0,0 +1,52 @@
+# backend/benchmarks/bench_notification_templates.py
+"""
+Benchmarks rendering precompiled notification templates (subject + text + HTML
+per message), against the hand-built f-strings they replaced.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_notification_templates [iterations]
+"""
+import sys
+import time
+
+from ..config import config
+from ..services.notification_templates import notification_templates
+
+CONTEXTS = {
+    'customer_registration': {},
+    'customer_order_placed': {'order_number': 'EA-104233'},
+    'customer_item_shipped': {'order_number': 'EA-104233', 'item_name': 'Brake Pads <Front> & Rotors', 'eta_days': 3},
+}
+
+
+def _fstring_item_shipped(order_number: str, item_name: str, eta_days: int | None):
+    subject = f"An item from your {config.COMPANY_NAME} Order #{order_number} has shipped!"
+    eta_text = f" Estimated delivery in {eta_days} days." if eta_days else ""
+    html_body = f"<p>Hi,</p><p>Good news! Your item '{item_name}' from order {order_number} has shipped.{eta_text}</p><p>Regards,<br>The {config.COMPANY_NAME} Team</p>"
+    text_body = f"Hi,\n\nGood news! Your item '{item_name}' from order {order_number} has shipped.{eta_text}\n\nRegards,\nThe {config.COMPANY_NAME} Team"
+    return subject, text_body, html_body
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    start = time.perf_counter()
+    count = notification_templates.load_all()
+    print(f"Loaded and compiled {count} templates in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    for name, context in CONTEXTS.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            notification_templates.render(name, **context)
+        per_message_us = (time.perf_counter() - start) / iterations * 1_000_000
+        print(f"{name:<24} {per_message_us:6.1f} us/message (subject + text + html)")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _fstring_item_shipped(**CONTEXTS['customer_item_shipped'])
+    per_message_us = (time.perf_counter() - start) / iterations * 1_000_000
+    print(f"{'f-string baseline':<24} {per_message_us:6.1f} us/message (item shipped, unescaped)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_parts_search.py
+"""
+Benchmarks the in-memory parts search index on a synthetic catalog: build time
+and per-query latency (p50/p99) for exact, prefix, typo and part-number queries.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_parts_search [parts] [iterations]
+"""
+import random
+import sys
+import time
+
+from ..database.part_repository import PartRecord
+from ..services.part_service import PartSearchIndex
+
+BRANDS = ['Bosch', 'Denso', 'ACDelco', 'Motorcraft', 'NGK', 'Brembo', 'Mann-Filter', 'Mahle', 'Gates', 'Moog',
+          'Monroe', 'KYB', 'Wagner', 'Akebono', 'Valeo', 'Delphi', 'Febi', 'Lemforder', 'Sachs', 'Continental']
+CATEGORIES = {
+    'Brakes': ['Brake Pad Set', 'Brake Rotor', 'Brake Caliper', 'Brake Hose', 'Brake Drum'],
+    'Filters': ['Oil Filter', 'Air Filter', 'Cabin Air Filter', 'Fuel Filter'],
+    'Ignition': ['Spark Plug', 'Ignition Coil', 'Glow Plug'],
+    'Suspension': ['Shock Absorber', 'Strut Assembly', 'Control Arm', 'Ball Joint', 'Sway Bar Link'],
+    'Engine': ['Timing Belt Kit', 'Water Pump', 'Thermostat', 'Serpentine Belt', 'Valve Cover Gasket'],
+    'Electrical': ['Alternator', 'Starter Motor', 'Oxygen Sensor', 'Mass Air Flow Sensor'],
+}
+POSITIONS = ['Front', 'Rear', 'Front Left', 'Front Right', 'Upper', 'Lower', '']
+QUERIES = {
+    'exact word': 'alternator',
+    'brand + words': 'bosch oil filter',
+    'common word': 'brake',
+    'prefix (typing)': 'brak pa',
+    'typo': 'altenator',
+    'typo brand': 'bosh spark plug',
+    'part number': None, # Filled from the catalog
+    'part number, dashed': None,
+    'part number prefix': None,
+}
+
+
+def synthetic_catalog(count: int, seed: int = 7) -> list[PartRecord]:
+    rng = random.Random(seed)
+    parts = []
+    for i in range(count):
+        category = rng.choice(list(CATEGORIES))
+        brand = rng.choice(BRANDS)
+        name = f"{rng.choice(POSITIONS)} {rng.choice(CATEGORIES[category])}".strip()
+        number = f"{rng.randint(10000, 99999)}-{rng.randint(10000, 99999)}"
+        oem = tuple(f"{rng.randint(100000, 999999)}{rng.choice('ABCDEFGH')}{rng.randint(10, 99)}" for _ in range(rng.randint(0, 3)))
+        parts.append(PartRecord(f"{i:08d}", f"EA-{i:07d}", name, brand, category, number, oem,
+                                round(rng.uniform(5, 500), 2), rng.randint(0, 50), True, '2025-01-01T00:00:00+00:00'))
+    return parts
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    catalog = synthetic_catalog(count)
+    sample = catalog[count // 2]
+    QUERIES['part number'] = sample.part_number.replace('-', '')
+    QUERIES['part number, dashed'] = sample.part_number
+    QUERIES['part number prefix'] = sample.part_number[:7]
+
+    start = time.perf_counter()
+    index = PartSearchIndex.build(catalog)
+    print(f"Built index over {index.size} parts in {time.perf_counter() - start:.2f} s: {index.stats()['terms']}\n")
+
+    for label, query in QUERIES.items():
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            result = index.search(query, limit=20)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1]
+        top = result['results'][0]['name'] if result['results'] else '-'
+        print(f"{label:<22} {query!r:<20} total {result['total']:>7}  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  top: {top}")
+
+
+if __name__ == '__main__':
+    main()
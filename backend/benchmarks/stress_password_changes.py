@@ -0,0 +1,70 @@
+# backend/benchmarks/stress_password_changes.py
+"""
+Stress test for concurrent password changes.
+
+Runs hundreds of change_user_password calls in parallel, each with its own
+user token, and checks that every user ends up with exactly the password that
+was requested with their token (no cross-user contamination) and that the
+token used for the change was revoked. The run is repeated without a service
+key, so the changes go through the pooled session-isolated auth clients
+(isolated_auth_client) instead of the admin API.
+
+Runs against the in-memory fake Supabase backend (DB_BACKEND=fake); set
+FAKE_SUPABASE_LATENCY_MS to simulate network latency (default here: 5-20).
+
+Run from the repository root:
+    python -m backend.benchmarks.stress_password_changes [count]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from ..config import config
+from ..database import supabase_client
+from ..database.fake_supabase import fake_store
+from ..models.user_models import UserPasswordChange
+from ..services.auth_service import change_user_password
+
+
+async def _run(count: int, label: str) -> None:
+    expected: dict[str, str] = {}
+    tokens: dict[str, str] = {}
+    for i in range(count):
+        user = fake_store.create_user(f"stress-{label}-{i}@example.com", 'old-password')
+        tokens[user['id']] = fake_store.issue_session(user['id']).access_token
+        expected[user['id']] = f"new-password-{i}"
+
+    calls = [
+        change_user_password(
+            tokens[user_id],
+            UserPasswordChange(current_password='old-password', new_password=password, confirm_new_password=password),
+        )
+        for user_id, password in expected.items()
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - start
+
+    failures = [r for r in results if not r[0]]
+    contaminated = [uid for uid, pw in expected.items() if fake_store.users[uid]['password'] != pw]
+    still_active = [uid for uid in expected if uid in fake_store.sessions.values()]
+    print(f"[{label}] {count} concurrent password changes in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+    print(f"failures: {len(failures)}, cross-user contamination: {len(contaminated)}, sessions not revoked: {len(still_active)}")
+    if failures or contaminated or still_active:
+        raise SystemExit(1)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    config.DB_BACKEND = 'fake'
+    config.FAKE_SUPABASE_LATENCY_MS = os.environ.get('FAKE_SUPABASE_LATENCY_MS', '5-20')
+    supabase_client.init_supabase_client()
+    asyncio.run(_run(count, 'service-key'))
+    supabase_client.supabase_service = None # As when SUPABASE_SERVICE_KEY is not set
+    asyncio.run(_run(count, 'isolated-clients'))
+    print(f"isolated auth clients pooled: {supabase_client._auth_client_pool.qsize()} (max {config.AUTH_CLIENT_POOL_SIZE})")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,7 @@ class Config:
     SUPABASE_URL = os.environ.get('SUPABASE_URL')
     SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
     SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+    SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET')
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
@@ -26,6 +27,140 @@ class Config:
     FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
     EMAIL_CONFIRMATION_REDIRECT_URL = os.environ.get('EMAIL_CONFIRMATION_REDIRECT_URL', f'{FRONTEND_URL}/login')
 
+    # --- Local JWT Verification (Supabase access tokens) ---
+    SUPABASE_JWT_AUDIENCE = os.environ.get('SUPABASE_JWT_AUDIENCE', 'authenticated')
+    SUPABASE_JWT_ISSUER = os.environ.get('SUPABASE_JWT_ISSUER', f"{SUPABASE_URL}/auth/v1" if SUPABASE_URL else None)
+    SUPABASE_JWKS_URL = os.environ.get('SUPABASE_JWKS_URL', f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+    SUPABASE_JWKS_CACHE_SECONDS = int(os.environ.get('SUPABASE_JWKS_CACHE_SECONDS', '600'))
+    JWT_LEEWAY_SECONDS = int(os.environ.get('JWT_LEEWAY_SECONDS', '10'))
+
+    # --- Auth Client Pool (session-isolated clients for password flows) ---
+    AUTH_CLIENT_POOL_SIZE = int(os.environ.get('AUTH_CLIENT_POOL_SIZE', '32'))
+
+    # --- Database Backend ---
+    # 'supabase' (default) or 'fake': an in-memory stand-in for offline benchmarks and CI perf runs
+    DB_BACKEND = os.environ.get('DB_BACKEND', 'supabase').lower()
+    FAKE_SUPABASE_LATENCY_MS = os.environ.get('FAKE_SUPABASE_LATENCY_MS', '0') # "5" or a "2-20" range
+    FAKE_SUPABASE_FAILURE_RATE = float(os.environ.get('FAKE_SUPABASE_FAILURE_RATE', '0'))
+    FAKE_SUPABASE_AUTOCONFIRM = os.environ.get('FAKE_SUPABASE_AUTOCONFIRM', 'true').lower() == 'true'
+    FAKE_SUPABASE_SEED_FILE = os.environ.get('FAKE_SUPABASE_SEED_FILE') # JSON: {"table": [rows...]}
+
+    # --- Async Data Access Layer (PostgREST over a shared keep-alive pool) ---
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '100'))
+    DB_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('DB_MAX_KEEPALIVE_CONNECTIONS', '20'))
+    DB_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get('DB_KEEPALIVE_EXPIRY_SECONDS', '30'))
+    DB_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS', '5'))
+    DB_READ_TIMEOUT_SECONDS = float(os.environ.get('DB_READ_TIMEOUT_SECONDS', '15'))
+    DB_POOL_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', '10')) # Wait for a free connection
+    DB_HTTP2 = os.environ.get('DB_HTTP2', 'true').lower() == 'true'
+    DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', '500'))
+    DB_SLOW_QUERY_LOG_SIZE = int(os.environ.get('DB_SLOW_QUERY_LOG_SIZE', '200'))
+    DB_QUERY_METRICS_MAX_SHAPES = int(os.environ.get('DB_QUERY_METRICS_MAX_SHAPES', '500'))
+
+    # --- Upstream Resilience (timeouts, retries, circuit breakers) ---
+    SUPABASE_DB_TIMEOUT_SECONDS = float(os.environ.get('SUPABASE_DB_TIMEOUT_SECONDS', '10'))
+    SUPABASE_AUTH_TIMEOUT_SECONDS = float(os.environ.get('SUPABASE_AUTH_TIMEOUT_SECONDS', '10'))
+    OPENAI_TIMEOUT_SECONDS = float(os.environ.get('OPENAI_TIMEOUT_SECONDS', '60'))
+    TWILIO_TIMEOUT_SECONDS = float(os.environ.get('TWILIO_TIMEOUT_SECONDS', '15'))
+    SENDGRID_TIMEOUT_SECONDS = float(os.environ.get('SENDGRID_TIMEOUT_SECONDS', '15'))
+    SMTP_TIMEOUT_SECONDS = float(os.environ.get('SMTP_TIMEOUT_SECONDS', '20'))
+    UPSTREAM_MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', '2')) # Idempotent reads only
+    UPSTREAM_RETRY_BASE_DELAY_SECONDS = float(os.environ.get('UPSTREAM_RETRY_BASE_DELAY_SECONDS', '0.1'))
+    UPSTREAM_RETRY_MAX_DELAY_SECONDS = float(os.environ.get('UPSTREAM_RETRY_MAX_DELAY_SECONDS', '2'))
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+    BREAKER_RECOVERY_SECONDS = float(os.environ.get('BREAKER_RECOVERY_SECONDS', '30'))
+    DB_HEDGE_AFTER_MS = float(os.environ.get('DB_HEDGE_AFTER_MS', '250')) # Hedged profile lookups; 0 disables
+
+    # --- Blocking Work Executors (one bounded pool per dependency kind) ---
+    EXECUTOR_DB_WORKERS = int(os.environ.get('EXECUTOR_DB_WORKERS', '32'))
+    EXECUTOR_EMAIL_WORKERS = int(os.environ.get('EXECUTOR_EMAIL_WORKERS', '8'))
+    EXECUTOR_SMS_WORKERS = int(os.environ.get('EXECUTOR_SMS_WORKERS', '8'))
+    EXECUTOR_DEFAULT_WORKERS = int(os.environ.get('EXECUTOR_DEFAULT_WORKERS', '8'))
+    EXECUTOR_MAX_QUEUE = int(os.environ.get('EXECUTOR_MAX_QUEUE', '1000')) # Per executor; beyond this calls are rejected
+
+    # --- Notification Providers (connection reuse, throughput) ---
+    SENDGRID_API_BASE_URL = os.environ.get('SENDGRID_API_BASE_URL', 'https://api.sendgrid.com/v3')
+    SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', '465'))
+    SMTP_USE_SSL = os.environ.get('SMTP_USE_SSL', 'true').lower() == 'true'
+    SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', '4')) # Authenticated sessions kept open
+    SMTP_POOL_MAX_IDLE_SECONDS = float(os.environ.get('SMTP_POOL_MAX_IDLE_SECONDS', '60'))
+    SMTP_POOL_HEALTHCHECK_SECONDS = float(os.environ.get('SMTP_POOL_HEALTHCHECK_SECONDS', '5')) # NOOP sessions idle longer than this
+    TWILIO_MESSAGES_PER_SECOND = float(os.environ.get('TWILIO_MESSAGES_PER_SECOND', '1')) # Account throughput (1/s per long code)
+    TWILIO_RATE_BURST = float(os.environ.get('TWILIO_RATE_BURST', '1'))
+    TWILIO_FANOUT_CONCURRENCY = int(os.environ.get('TWILIO_FANOUT_CONCURRENCY', '8'))
+
+    # --- Bulk Email Campaigns (SendGrid personalizations) ---
+    SENDGRID_REQUESTS_PER_SECOND = float(os.environ.get('SENDGRID_REQUESTS_PER_SECOND', '5')) # mail/send calls, each up to 1000 recipients
+    CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE', '1000')) # Personalizations per call (SendGrid max 1000)
+    CAMPAIGN_PAGE_SIZE = int(os.environ.get('CAMPAIGN_PAGE_SIZE', '1000')) # Profiles per keyset page
+    CAMPAIGN_MAX_BATCH_ATTEMPTS = int(os.environ.get('CAMPAIGN_MAX_BATCH_ATTEMPTS', '4'))
+
+    # --- Notification Outbox (handlers enqueue; a background worker delivers) ---
+    NOTIFICATION_OUTBOX_BACKEND = os.environ.get('NOTIFICATION_OUTBOX_BACKEND', 'sqlite') # 'sqlite' (local) or 'postgres' (Supabase table)
+    NOTIFICATION_OUTBOX_SQLITE_PATH = os.environ.get('NOTIFICATION_OUTBOX_SQLITE_PATH', 'notification_outbox.sqlite3')
+    OUTBOX_EMAIL_CONCURRENCY = int(os.environ.get('OUTBOX_EMAIL_CONCURRENCY', '4'))
+    OUTBOX_SMS_CONCURRENCY = int(os.environ.get('OUTBOX_SMS_CONCURRENCY', '2'))
+    OUTBOX_WHATSAPP_CONCURRENCY = int(os.environ.get('OUTBOX_WHATSAPP_CONCURRENCY', '2'))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '6')) # Then the message is dead-lettered
+    OUTBOX_RETRY_BASE_SECONDS = float(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', '10'))
+    OUTBOX_RETRY_MAX_SECONDS = float(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', '900'))
+    OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '120')) # A claim not settled by then is retried
+    OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', '2'))
+    OUTBOX_SENT_RETENTION_HOURS = float(os.environ.get('OUTBOX_SENT_RETENTION_HOURS', '72'))
+
+    # --- Job State (checkpoints of bulk email campaigns and supplier inventory imports) ---
+    # Default to the outbox's store, where these checkpoints used to live, so existing ones still resume
+    JOB_STATE_BACKEND = os.environ.get('JOB_STATE_BACKEND', NOTIFICATION_OUTBOX_BACKEND) # 'sqlite' (local) or 'postgres' (Supabase tables)
+    JOB_STATE_SQLITE_PATH = os.environ.get('JOB_STATE_SQLITE_PATH', NOTIFICATION_OUTBOX_SQLITE_PATH)
+
+    # --- Admin Notification Digests (burst coalescing) ---
+    ADMIN_DIGEST_WINDOW_SECONDS = float(os.environ.get('ADMIN_DIGEST_WINDOW_SECONDS', '60')) # 0 disables coalescing
+    ADMIN_DIGEST_TOP_ITEMS = int(os.environ.get('ADMIN_DIGEST_TOP_ITEMS', '10'))
+    ADMIN_NOTIFY_URGENT_CATEGORIES = [c.strip() for c in os.environ.get('ADMIN_NOTIFY_URGENT_CATEGORIES', '').split(',') if c.strip()]
+
+    # --- Delivery Status Webhooks (SendGrid events, Twilio status callbacks) ---
+    SENDGRID_WEBHOOK_PUBLIC_KEY = os.environ.get('SENDGRID_WEBHOOK_PUBLIC_KEY') # Signed Event Webhook verification key
+    TWILIO_STATUS_CALLBACK_URL = os.environ.get('TWILIO_STATUS_CALLBACK_URL') # Public URL of /api/notifications/webhooks/twilio
+    DELIVERY_LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get('DELIVERY_LOG_FLUSH_INTERVAL_SECONDS', '2'))
+    DELIVERY_LOG_BATCH_SIZE = int(os.environ.get('DELIVERY_LOG_BATCH_SIZE', '200')) # Also bounds the message_id list of the pre-read
+    DELIVERY_LOG_MAX_BUFFER = int(os.environ.get('DELIVERY_LOG_MAX_BUFFER', '50000')) # Beyond this webhooks answer 503
+
+    # --- Parts Catalog Search (in-memory index) ---
+    PARTS_INDEX_REFRESH_SECONDS = float(os.environ.get('PARTS_INDEX_REFRESH_SECONDS', '60')) # Incremental, by updated_at
+    PARTS_INDEX_REBUILD_SECONDS = float(os.environ.get('PARTS_INDEX_REBUILD_SECONDS', '21600')) # Full reload: drops deleted rows, compacts
+    PARTS_INDEX_PAGE_SIZE = int(os.environ.get('PARTS_INDEX_PAGE_SIZE', '1000'))
+    PARTS_SEARCH_MAX_EXPANSIONS = int(os.environ.get('PARTS_SEARCH_MAX_EXPANSIONS', '50')) # Prefix/typo terms per query word
+    PARTS_SEARCH_MAX_LIMIT = int(os.environ.get('PARTS_SEARCH_MAX_LIMIT', '100'))
+    FITMENT_INDEX_PATH = os.environ.get('FITMENT_INDEX_PATH', 'fitment_index.bin') # Built offline, memory-mapped by every worker
+
+    # --- Supplier Inventory Import (python -m backend.scripts.import_supplier_inventory) ---
+    INVENTORY_IMPORT_CHUNK_SIZE = int(os.environ.get('INVENTORY_IMPORT_CHUNK_SIZE', '500')) # Rows per diff read + upsert; also the sku IN (...) list length
+    INVENTORY_IMPORT_CONCURRENCY = int(os.environ.get('INVENTORY_IMPORT_CONCURRENCY', '4')) # Chunks applied at once
+    INVENTORY_IMPORT_MAX_CHUNK_ATTEMPTS = int(os.environ.get('INVENTORY_IMPORT_MAX_CHUNK_ATTEMPTS', '4')) # Transient failures retried
+    INVENTORY_IMPORT_PROGRESS_SECONDS = float(os.environ.get('INVENTORY_IMPORT_PROGRESS_SECONDS', '10'))
+
+    # --- HTTP Caching & Compression (ETag'd JSON GETs, e.g. parts listing) ---
+    HTTP_CACHE_MAX_AGE_SECONDS = int(os.environ.get('HTTP_CACHE_MAX_AGE_SECONDS', '0')) # 0: clients revalidate each time (304)
+    HTTP_COMPRESS_MIN_BYTES = int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', '1024')) # Smaller bodies are sent as-is
+    HTTP_GZIP_LEVEL = int(os.environ.get('HTTP_GZIP_LEVEL', '6'))
+    HTTP_BROTLI_QUALITY = int(os.environ.get('HTTP_BROTLI_QUALITY', '5')) # Only if the brotli package is installed
+    HTTP_BODY_CACHE_SIZE = int(os.environ.get('HTTP_BODY_CACHE_SIZE', '512')) # Encoded bodies kept per worker
+    HTTP_BODY_CACHE_TTL_SECONDS = float(os.environ.get('HTTP_BODY_CACHE_TTL_SECONDS', '300'))
+
+    # --- Site Information Cache ---
+    SITE_INFO_REFRESH_SECONDS = float(os.environ.get('SITE_INFO_REFRESH_SECONDS', '300'))
+    SITE_INFO_WEBHOOK_SECRET = os.environ.get('SITE_INFO_WEBHOOK_SECRET') # Shared secret for the DB change webhook
+
+    # --- Bulk Account Provisioning (business customers) ---
+    BULK_REGISTRATION_MAX_ROWS = int(os.environ.get('BULK_REGISTRATION_MAX_ROWS', '5000'))
+    BULK_REGISTRATION_CONCURRENCY = int(os.environ.get('BULK_REGISTRATION_CONCURRENCY', '25'))
+    BULK_REGISTRATION_PROFILE_BATCH_SIZE = int(os.environ.get('BULK_REGISTRATION_PROFILE_BATCH_SIZE', '200'))
+
+    # --- Profile Cache (authenticated request hot path) ---
+    PROFILE_CACHE_TTL_SECONDS = float(os.environ.get('PROFILE_CACHE_TTL_SECONDS', '300'))
+    PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+
     # --- Hardcoded Public-Facing Site Information ---
     COMPANY_NAME = "Everything Automotive"
     COMPANY_MISSION = "To be the leading provider of quality automotive parts and services in Nigeria, leveraging technology and expertise."
@@ -47,5 +182,18 @@ class Config:
     ADMIN_EMAIL_RECIPIENT_KEYS = ['admin_notification_email_1', 'admin_notification_email_2', 'admin_notification_email_3']
     # Add other keys here if needed, e.g., MAIN_EMAIL_KEY = 'main_email' if you decide to fetch it instead
 
+    # --- Admin Access ---
+    # Comma-separated list of emails allowed to use the /api/admin endpoints
+    ADMIN_USER_EMAILS = [e.strip().lower() for e in os.environ.get('ADMIN_USER_EMAILS', '').split(',') if e.strip()]
+
+    # --- AI Usage Metering & Quotas ---
+    # Daily token quotas per account type (0 = unlimited). Per-user overrides live in 'ai_usage_quotas'.
+    # Each worker checks its own totals, re-synced from 'ai_usage_logs' every flush interval: across workers a
+    # user can exceed the quota by what they all admit within one AI_USAGE_FLUSH_INTERVAL_SECONDS.
+    AI_DAILY_TOKEN_QUOTA_PERSONAL = int(os.environ.get('AI_DAILY_TOKEN_QUOTA_PERSONAL', '100000'))
+    AI_DAILY_TOKEN_QUOTA_BUSINESS = int(os.environ.get('AI_DAILY_TOKEN_QUOTA_BUSINESS', '500000'))
+    AI_USAGE_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AI_USAGE_FLUSH_INTERVAL_SECONDS', '30'))
+    AI_USAGE_FLUSH_BATCH_SIZE = int(os.environ.get('AI_USAGE_FLUSH_BATCH_SIZE', '50'))
+
 # Export an instance
 config = Config()
\ No newline at end of file
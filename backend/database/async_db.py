@@ -0,0 +1,219 @@
+# backend/database/async_db.py
+"""
+Async data access layer for Supabase (PostgREST).
+
+All table queries go through one AsyncPostgrestClient backed by a shared httpx
+connection pool (keep-alive, HTTP/2, configurable limits and timeouts). Flask
+runs each async view in its own short-lived event loop, which cannot own
+long-lived connections, so the pool lives on a dedicated background loop and
+queries are submitted to it. Callers only see:
+
+    response = await run_query(table('profiles').select('*').eq('id', user_id))
+
+Queries run under the 'supabase_db' resilience policy: a timeout, a circuit
+breaker, retries for reads, and optionally a hedged second read (hedge=True).
+
+Database concurrency is bounded by DB_MAX_CONNECTIONS instead of the size of
+the default thread pool. Every query is timed and recorded by query_metrics.
+Auth (GoTrue) calls still use the supabase-py clients. With DB_BACKEND=fake
+the pool talks to an in-memory PostgREST stand-in (see fake_supabase).
+"""
+import asyncio
+import threading
+import time
+from typing import Any
+
+import httpx
+from postgrest import AsyncPostgrestClient, APIResponse
+
+from ..config import config
+from ..utils import resilience
+from . import query_metrics
+from .fake_supabase import FakePostgrestTransport, fake_store, init_fake_supabase
+
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_clients: dict[str, AsyncPostgrestClient] = {}
+_init_lock = threading.Lock()
+
+# Plain counters; only touched from the background loop
+_stats = {'queries': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0, 'total_ms': 0.0}
+
+
+def _http_client(api_key: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=f"{config.SUPABASE_URL}/rest/v1",
+        headers={
+            'apikey': api_key,
+            'Authorization': f"Bearer {api_key}",
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        },
+        limits=httpx.Limits(
+            max_connections=config.DB_MAX_CONNECTIONS,
+            max_keepalive_connections=config.DB_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.DB_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            config.DB_READ_TIMEOUT_SECONDS,
+            connect=config.DB_CONNECT_TIMEOUT_SECONDS,
+            pool=config.DB_POOL_TIMEOUT_SECONDS,
+        ),
+        http2=config.DB_HTTP2,
+        follow_redirects=True,
+        event_hooks={'response': [query_metrics.capture_response_size]},
+        transport=FakePostgrestTransport(fake_store) if config.DB_BACKEND == 'fake' else None,
+    )
+
+
+async def _create_clients() -> None:
+    keys = {'anon': config.SUPABASE_KEY, 'service': config.SUPABASE_SERVICE_KEY}
+    for role, api_key in keys.items():
+        if api_key:
+            _clients[role] = AsyncPostgrestClient(
+                f"{config.SUPABASE_URL}/rest/v1",
+                http_client=_http_client(api_key),
+            )
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def init_async_db() -> None:
+    """Starts the background loop and creates the pooled PostgREST clients. Idempotent."""
+    global _loop, _thread
+    if _loop is not None:
+        return
+    with _init_lock:
+        if _loop is not None:
+            return
+        if config.DB_BACKEND == 'fake':
+            init_fake_supabase()
+        if not config.SUPABASE_URL or not config.SUPABASE_KEY:
+            raise ValueError("Supabase URL and Key must be set in environment variables.")
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=_run_loop, args=(loop,), name='async-db', daemon=True)
+        thread.start()
+        asyncio.run_coroutine_threadsafe(_create_clients(), loop).result(timeout=10)
+        _loop, _thread = loop, thread
+        print(f"✅ Async DB layer ready (max {config.DB_MAX_CONNECTIONS} connections, "
+              f"{config.DB_MAX_KEEPALIVE_CONNECTIONS} keep-alive, http2={config.DB_HTTP2}).")
+
+
+def close_async_db() -> None:
+    """Closes pooled connections and stops the background loop."""
+    global _loop, _thread
+    loop = _loop
+    if loop is None:
+        return
+
+    async def _close():
+        for client in _clients.values():
+            await client.aclose()
+        _clients.clear()
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=5)
+    except Exception as e:
+        print(f"WARN: Error closing async DB clients: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    _loop, _thread = None, None
+
+
+def table(name: str, *, service: bool = True):
+    """
+    Returns a query builder for `name`. Uses the service-role client by default
+    (bypasses RLS, as the services already did); `service=False` uses the anon key.
+    """
+    if _loop is None:
+        init_async_db()
+    role = 'service' if service else 'anon'
+    client = _clients.get(role)
+    if client is None:
+        raise RuntimeError(f"Supabase {role} key not configured; cannot query '{name}'.")
+    return client.table(name)
+
+
+def rpc(name: str, params: dict | None = None, *, service: bool = True):
+    """Returns a query builder calling the Postgres function `name` (POST /rpc/<name>)."""
+    if _loop is None:
+        init_async_db()
+    role = 'service' if service else 'anon'
+    client = _clients.get(role)
+    if client is None:
+        raise RuntimeError(f"Supabase {role} key not configured; cannot call '{name}'.")
+    return client.rpc(name, params or {})
+
+
+async def _execute_once(query) -> APIResponse:
+    _stats['queries'] += 1
+    _stats['in_flight'] += 1
+    _stats['max_in_flight'] = max(_stats['max_in_flight'], _stats['in_flight'])
+    sizes = query_metrics.start_capture()
+    response, error = None, None
+    started = time.perf_counter()
+    try:
+        response = await query.execute()
+        return response
+    except Exception as e:
+        _stats['errors'] += 1
+        error = e
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _stats['in_flight'] -= 1
+        _stats['total_ms'] += elapsed_ms
+        try:
+            query_metrics.record(query, elapsed_ms, response, error, sizes)
+        except Exception as metrics_error:
+            print(f"WARN: Could not record query metrics: {metrics_error}")
+
+
+def _is_read(query) -> bool:
+    method = query.request.http_method
+    return (method.value if hasattr(method, 'value') else str(method)) in ('GET', 'HEAD')
+
+
+async def _execute(query, hedge: bool = False) -> APIResponse:
+    # Only reads are retried or hedged; a repeated write could apply twice
+    return await resilience.call('supabase_db', lambda: _execute_once(query), idempotent=_is_read(query), hedge=hedge)
+
+
+async def run_query(query, *, hedge: bool = False) -> APIResponse:
+    """
+    Executes a built query on the shared pool and returns its APIResponse.
+    `hedge=True` sends a second copy of a slow read (latency-critical point lookups only).
+    Raises postgrest APIError, asyncio.TimeoutError or resilience.CircuitOpenError.
+    """
+    if _loop is None:
+        init_async_db()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        return await _execute(query, hedge)
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_execute(query, hedge), _loop))
+
+
+def run_query_sync(query, timeout: float | None = None) -> APIResponse:
+    """Blocking variant for code that runs outside any event loop (startup, background threads)."""
+    if _loop is None:
+        init_async_db()
+    return asyncio.run_coroutine_threadsafe(_execute(query), _loop).result(timeout=timeout)
+
+
+def pool_stats() -> dict[str, Any]:
+    queries = _stats['queries']
+    return {
+        'running': _loop is not None,
+        'max_connections': config.DB_MAX_CONNECTIONS,
+        'max_keepalive_connections': config.DB_MAX_KEEPALIVE_CONNECTIONS,
+        'queries': queries,
+        'errors': _stats['errors'],
+        'in_flight': _stats['in_flight'],
+        'max_in_flight': _stats['max_in_flight'],
+        'avg_ms': round(_stats['total_ms'] / queries, 3) if queries else 0.0,
+    }
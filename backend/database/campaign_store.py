@@ -0,0 +1,81 @@
+# backend/database/campaign_store.py
+"""
+Progress checkpoints for bulk email campaigns (services/campaign_service).
+
+A checkpoint records the last profile id whose batch SendGrid accepted, so an
+interrupted campaign resumes after it. Stored with the inventory import
+checkpoints: in the JOB_STATE_SQLITE_PATH file locally, or this Supabase table
+when JOB_STATE_BACKEND is 'postgres':
+
+    create table email_campaigns (
+        campaign_id text primary key,
+        template text not null,
+        status text not null,            -- running | completed | failed
+        last_profile_id text,
+        sent int not null default 0,
+        skipped int not null default 0,
+        batches int not null default 0,
+        last_error text,
+        started_at double precision,     -- epoch seconds
+        updated_at double precision
+    );
+"""
+import sqlite3
+import threading
+
+from ..config import config
+from .async_db import run_query, table
+
+CAMPAIGNS_TABLE = 'email_campaigns'
+CHECKPOINT_FIELDS = ('campaign_id', 'template', 'status', 'last_profile_id', 'sent', 'skipped', 'batches',
+                     'last_error', 'started_at', 'updated_at')
+
+
+class SQLiteCampaignStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CAMPAIGNS_TABLE} (
+                campaign_id TEXT PRIMARY KEY,
+                template TEXT NOT NULL,
+                status TEXT NOT NULL,
+                last_profile_id TEXT,
+                sent INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                batches INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                started_at REAL,
+                updated_at REAL
+            )""")
+
+    async def load(self, campaign_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT * FROM {CAMPAIGNS_TABLE} WHERE campaign_id = ?", (campaign_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def save(self, checkpoint: dict) -> None:
+        values = [checkpoint.get(field) for field in CHECKPOINT_FIELDS]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {CAMPAIGNS_TABLE} ({', '.join(CHECKPOINT_FIELDS)}) "
+                f"VALUES ({', '.join('?' for _ in CHECKPOINT_FIELDS)})",
+                values,
+            )
+
+
+class PostgresCampaignStore:
+    async def load(self, campaign_id: str) -> dict | None:
+        response = await run_query(table(CAMPAIGNS_TABLE).select('*').eq('campaign_id', campaign_id).limit(1))
+        return response.data[0] if response.data else None
+
+    async def save(self, checkpoint: dict) -> None:
+        await run_query(table(CAMPAIGNS_TABLE).upsert({field: checkpoint.get(field) for field in CHECKPOINT_FIELDS}))
+
+
+def create_campaign_store() -> SQLiteCampaignStore | PostgresCampaignStore:
+    if config.JOB_STATE_BACKEND == 'postgres':
+        return PostgresCampaignStore()
+    return SQLiteCampaignStore(config.JOB_STATE_SQLITE_PATH)
@@ -0,0 +1,577 @@
+# backend/database/fake_supabase.py
+"""
+In-memory stand-in for Supabase, selected with DB_BACKEND=fake.
+
+Lets the services run without a Supabase project (offline benchmarks, CI perf
+runs). Two pieces share one FakeSupabaseStore:
+
+- FakePostgrestTransport: an httpx transport that answers the PostgREST table
+  API, so the real query builders, async_db and query_metrics code paths run
+  unchanged (select/insert/upsert/update/delete, eq/neq/gt/gte/lt/lte/like/
+  ilike/in/is filters, order, limit/offset, single()).
+- FakeSupabaseClient: the GoTrue calls the services use (sign_up,
+  sign_in_with_password, get_user, set_session, update_user, sign_out,
+  reset_password_for_email and the admin API). Access tokens are real HS256
+  JWTs, so local verification in utils/security.py works against them.
+
+Every call sleeps for FAKE_SUPABASE_LATENCY_MS ("5" or a "2-20" range) and
+fails with probability FAKE_SUPABASE_FAILURE_RATE.
+"""
+import asyncio
+import functools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import jwt
+from gotrue.errors import AuthApiError, AuthRetryableError, AuthSessionMissingError
+
+from ..config import config
+
+FAKE_SUPABASE_URL = 'http://fake-supabase.local'
+FAKE_JWT_SECRET = 'fake-supabase-jwt-secret-for-offline-runs'
+ACCESS_TOKEN_LIFETIME_SECONDS = 3600
+
+_OBJECT_MEDIA_TYPE = 'application/vnd.pgrst.object+json'
+_STRUCTURAL_PARAMS = {'select', 'order', 'limit', 'offset', 'columns', 'on_conflict'}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_latency(spec: str | float | None) -> tuple[float, float]:
+    """'5' -> (5, 5); '2-20' -> (2, 20). Milliseconds."""
+    if spec in (None, ''):
+        return 0.0, 0.0
+    if isinstance(spec, (int, float)):
+        return float(spec), float(spec)
+    low, _, high = str(spec).partition('-')
+    return float(low), float(high or low)
+
+
+class FakeSupabaseStore:
+    """Tables, auth users and sessions for the fake backend. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.tables: dict[str, list[dict]] = {}
+        self.users: dict[str, dict] = {}          # user id -> auth user record
+        self.user_ids_by_email: dict[str, str] = {}
+        self.sessions: dict[str, str] = {}        # session id -> user id (active sessions only)
+        self.password_reset_requests: list[str] = []
+        self.latency_ms = (0.0, 0.0)
+        self.failure_rate = 0.0
+        self.calls = 0
+        self.injected_failures = 0
+
+    def configure(self, latency_ms: str | float | None = None, failure_rate: float | None = None) -> None:
+        if latency_ms is not None:
+            self.latency_ms = _parse_latency(latency_ms)
+        if failure_rate is not None:
+            self.failure_rate = float(failure_rate)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tables.clear()
+            self.users.clear()
+            self.user_ids_by_email.clear()
+            self.sessions.clear()
+            self.password_reset_requests.clear()
+            self.calls = 0
+            self.injected_failures = 0
+
+    def seed(self, tables: dict[str, list[dict]]) -> None:
+        """Adds rows to tables, e.g. {'site_information': [{'info_key': ..., 'info_value': ...}]}."""
+        with self._lock:
+            for name, rows in tables.items():
+                self.tables.setdefault(name, []).extend(dict(row) for row in rows)
+
+    # --- Latency / failure injection ---
+    def _next_delay(self) -> tuple[float, bool]:
+        with self._lock:
+            self.calls += 1
+            failed = self.failure_rate > 0 and random.random() < self.failure_rate
+            if failed:
+                self.injected_failures += 1
+        low, high = self.latency_ms
+        return random.uniform(low, high) / 1000 if high else 0.0, failed
+
+    async def simulate_async(self) -> bool:
+        """Sleeps for the injected latency. Returns True if this call should fail."""
+        delay, failed = self._next_delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return failed
+
+    def simulate(self) -> bool:
+        delay, failed = self._next_delay()
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    # --- Auth helpers (also used directly by benchmarks to set up users) ---
+    def create_user(self, email: str, password: str, user_metadata: dict | None = None, confirmed: bool = True) -> dict:
+        with self._lock:
+            email_key = email.lower()
+            if email_key in self.user_ids_by_email:
+                raise AuthApiError("A user with this email address has already been registered", 422, 'email_exists')
+            user = {
+                'id': str(uuid.uuid4()),
+                'email': email,
+                'password': password,
+                'user_metadata': dict(user_metadata or {}),
+                'created_at': _now_iso(),
+                'email_confirmed_at': _now_iso() if confirmed else None,
+            }
+            self.users[user['id']] = user
+            self.user_ids_by_email[email_key] = user['id']
+            return user
+
+    def user_by_email(self, email: str) -> dict | None:
+        user_id = self.user_ids_by_email.get(email.lower())
+        return self.users.get(user_id) if user_id else None
+
+    def issue_session(self, user_id: str) -> SimpleNamespace:
+        user = self.users[user_id]
+        session_id = str(uuid.uuid4())
+        issued_at = int(time.time())
+        claims = {
+            'sub': user_id,
+            'email': user['email'],
+            'aud': config.SUPABASE_JWT_AUDIENCE,
+            'role': 'authenticated',
+            'iat': issued_at,
+            'exp': issued_at + ACCESS_TOKEN_LIFETIME_SECONDS,
+            'session_id': session_id,
+            'user_metadata': user['user_metadata'],
+        }
+        if config.SUPABASE_JWT_ISSUER:
+            claims['iss'] = config.SUPABASE_JWT_ISSUER
+        with self._lock:
+            self.sessions[session_id] = user_id
+        return SimpleNamespace(
+            access_token=jwt.encode(claims, config.SUPABASE_JWT_SECRET, algorithm='HS256'),
+            token_type='bearer',
+            expires_in=ACCESS_TOKEN_LIFETIME_SECONDS,
+            refresh_token=uuid.uuid4().hex,
+            user=_user_object(user),
+        )
+
+    def claims_for_token(self, token: str) -> dict:
+        """Validates a token and its session like Supabase Auth does. Raises AuthApiError."""
+        try:
+            claims = jwt.decode(
+                token, config.SUPABASE_JWT_SECRET, algorithms=['HS256'],
+                audience=config.SUPABASE_JWT_AUDIENCE, options={'verify_iss': False},
+            )
+        except jwt.ExpiredSignatureError:
+            raise AuthApiError("invalid JWT: unable to parse or verify signature, token is expired", 401, 'bad_jwt')
+        except jwt.InvalidTokenError as e:
+            raise AuthApiError(f"invalid JWT: unable to parse or verify signature, {e}", 401, 'bad_jwt')
+        with self._lock:
+            if self.sessions.get(claims.get('session_id')) != claims['sub']:
+                raise AuthApiError("Session from session_id claim in JWT does not exist", 403, 'session_not_found')
+        return claims
+
+    def revoke(self, token_claims: dict, scope: str) -> None:
+        with self._lock:
+            user_id, session_id = token_claims['sub'], token_claims.get('session_id')
+            for sid, uid in list(self.sessions.items()):
+                if uid != user_id:
+                    continue
+                if scope == 'global' or (scope == 'local' and sid == session_id) or (scope == 'others' and sid != session_id):
+                    del self.sessions[sid]
+
+    def update_user(self, user_id: str, attributes: dict) -> dict:
+        with self._lock:
+            user = self.users.get(user_id)
+            if user is None:
+                raise AuthApiError("User not found", 404, 'user_not_found')
+            password = attributes.get('password')
+            if password is not None:
+                if len(password) < 6:
+                    raise AuthApiError("Password should be at least 6 characters.", 422, 'weak_password')
+                user['password'] = password
+            if attributes.get('email'):
+                self.user_ids_by_email.pop(user['email'].lower(), None)
+                user['email'] = attributes['email']
+                self.user_ids_by_email[user['email'].lower()] = user_id
+            metadata = attributes.get('data', attributes.get('user_metadata'))
+            if metadata:
+                user['user_metadata'].update(metadata)
+            return user
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'tables': {name: len(rows) for name, rows in self.tables.items()},
+                'users': len(self.users),
+                'active_sessions': len(self.sessions),
+                'calls': self.calls,
+                'injected_failures': self.injected_failures,
+                'latency_ms': self.latency_ms,
+                'failure_rate': self.failure_rate,
+            }
+
+
+fake_store = FakeSupabaseStore()
+
+
+def _user_object(user: dict, identities: bool = True) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=user['id'],
+        email=user['email'],
+        user_metadata=dict(user['user_metadata']),
+        created_at=user['created_at'],
+        email_confirmed_at=user['email_confirmed_at'],
+        identities=[SimpleNamespace(provider='email', identity_id=user['id'])] if identities else [],
+    )
+
+
+# --- GoTrue stand-in ---
+
+class _FakeAdminAPI:
+    def __init__(self, store: FakeSupabaseStore):
+        self._store = store
+
+    def _simulate(self):
+        if self._store.simulate():
+            raise AuthRetryableError("Injected failure (fake Supabase)", 503)
+
+    def create_user(self, attributes: dict) -> SimpleNamespace:
+        self._simulate()
+        user = self._store.create_user(
+            attributes['email'], attributes.get('password', ''),
+            attributes.get('user_metadata'), confirmed=bool(attributes.get('email_confirm')),
+        )
+        return SimpleNamespace(user=_user_object(user))
+
+    def get_user_by_id(self, uid: str) -> SimpleNamespace:
+        self._simulate()
+        user = self._store.users.get(uid)
+        if user is None:
+            raise AuthApiError("User not found", 404, 'user_not_found')
+        return SimpleNamespace(user=_user_object(user))
+
+    def update_user_by_id(self, uid: str, attributes: dict) -> SimpleNamespace:
+        self._simulate()
+        return SimpleNamespace(user=_user_object(self._store.update_user(uid, attributes)))
+
+    def sign_out(self, jwt: str, scope: str = 'global') -> None:
+        self._simulate()
+        self._store.revoke(self._store.claims_for_token(jwt), scope)
+
+
+class _FakeAuthAPI:
+    """Per-client auth API; like supabase-py it holds at most one session (set_session/update_user)."""
+
+    def __init__(self, store: FakeSupabaseStore):
+        self._store = store
+        self._session_token: str | None = None
+        self.admin = _FakeAdminAPI(store)
+
+    def _simulate(self):
+        if self._store.simulate():
+            raise AuthRetryableError("Injected failure (fake Supabase)", 503)
+
+    def sign_up(self, credentials: dict) -> SimpleNamespace:
+        self._simulate()
+        password = credentials.get('password', '')
+        if len(password) < 6:
+            raise AuthApiError("Password should be at least 6 characters.", 422, 'weak_password')
+        existing = self._store.user_by_email(credentials['email'])
+        if existing:
+            # Supabase obfuscates existing users: a user without identities and no session
+            return SimpleNamespace(user=_user_object(existing, identities=False), session=None)
+        options = credentials.get('options') or {}
+        user = self._store.create_user(credentials['email'], password, options.get('data'), confirmed=config.FAKE_SUPABASE_AUTOCONFIRM)
+        session = self._store.issue_session(user['id']) if config.FAKE_SUPABASE_AUTOCONFIRM else None
+        return SimpleNamespace(user=_user_object(user), session=session)
+
+    def sign_in_with_password(self, credentials: dict) -> SimpleNamespace:
+        self._simulate()
+        user = self._store.user_by_email(credentials.get('email', ''))
+        if not user or user['password'] != credentials.get('password'):
+            raise AuthApiError("Invalid login credentials", 400, 'invalid_credentials')
+        if not user['email_confirmed_at']:
+            raise AuthApiError("Email not confirmed", 400, 'email_not_confirmed')
+        session = self._store.issue_session(user['id'])
+        return SimpleNamespace(user=session.user, session=session)
+
+    def get_user(self, jwt: str | None = None) -> SimpleNamespace | None:
+        self._simulate()
+        token = jwt or self._session_token
+        if not token:
+            return None
+        claims = self._store.claims_for_token(token)
+        user = self._store.users.get(claims['sub'])
+        if user is None:
+            raise AuthApiError("User from sub claim in JWT does not exist", 403, 'user_not_found')
+        return SimpleNamespace(user=_user_object(user))
+
+    def set_session(self, access_token: str, refresh_token: str) -> SimpleNamespace:
+        self._simulate()
+        claims = self._store.claims_for_token(access_token)
+        self._session_token = access_token
+        return SimpleNamespace(user=_user_object(self._store.users[claims['sub']]), session=None)
+
+    def update_user(self, attributes: dict) -> SimpleNamespace:
+        self._simulate()
+        if not self._session_token:
+            raise AuthSessionMissingError()
+        claims = self._store.claims_for_token(self._session_token)
+        return SimpleNamespace(user=_user_object(self._store.update_user(claims['sub'], attributes)))
+
+    def sign_out(self, options: dict | None = None) -> None:
+        self._simulate()
+        if self._session_token:
+            try:
+                claims = self._store.claims_for_token(self._session_token)
+                self._store.revoke(claims, (options or {}).get('scope', 'global'))
+            except AuthApiError:
+                pass
+        self._session_token = None
+
+    def reset_password_for_email(self, email: str, options: dict | None = None) -> None:
+        self._simulate()
+        self._store.password_reset_requests.append(email)
+
+    def _remove_session(self) -> None:
+        self._session_token = None
+
+
+class FakeSupabaseClient:
+    """Drop-in for the supabase-py Client as far as the services use it (the auth API)."""
+
+    def __init__(self, store: FakeSupabaseStore = fake_store):
+        self.auth = _FakeAuthAPI(store)
+
+
+# --- PostgREST stand-in ---
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """Converts a filter value to the type of the stored column value."""
+    if isinstance(sample, bool):
+        return raw.lower() == 'true'
+    if isinstance(sample, (int, float)):
+        try:
+            return type(sample)(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _like_regex(pattern: str, case_insensitive: bool) -> re.Pattern:
+    parts = [re.escape(p) for p in re.split(r'[%*]', pattern)]
+    return re.compile('^' + '.*'.join(parts) + '$', (re.IGNORECASE if case_insensitive else 0) | re.DOTALL)
+
+
+def _split_in_values(raw: str) -> list[str]:
+    inner = raw.strip()[1:-1] if raw.startswith('(') else raw
+    values, current, quoted = [], '', False
+    for ch in inner:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ',' and not quoted:
+            values.append(current)
+            current = ''
+        else:
+            current += ch
+    if current or inner.endswith(','):
+        values.append(current)
+    return values
+
+
+@functools.lru_cache(maxsize=256)
+def _in_set(raw: str, column_type: type) -> frozenset[str]:
+    """An in.(...) list coerced to the column's type; parsed once per filter, not once per row."""
+    sample = column_type()
+    return frozenset(str(_coerce(v, sample)) for v in _split_in_values(raw))
+
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    operator, _, raw = expression.partition('.')
+    value = row.get(column)
+
+    if operator == 'is':
+        result = value is None if raw == 'null' else value is (raw == 'true')
+    elif operator == 'in':
+        result = value is not None and str(value) in _in_set(raw, type(value))
+    elif value is None:
+        result = False
+    elif operator in ('like', 'ilike'):
+        result = bool(_like_regex(raw, operator == 'ilike').match(str(value)))
+    else:
+        target = _coerce(raw, value)
+        if not isinstance(value, (int, float, bool)):
+            value = str(value)
+        try:
+            result = {
+                'eq': value == target, 'neq': value != target,
+                'gt': value > target, 'gte': value >= target,
+                'lt': value < target, 'lte': value <= target,
+            }[operator]
+        except KeyError:
+            raise ValueError(f"Unsupported filter operator '{operator}'")
+    return not result if negate else result
+
+
+def _project(row: dict, select: str | None) -> dict:
+    if not select or select.strip() == '*':
+        return dict(row)
+    projected = {}
+    for column in (c.strip() for c in select.split(',')):
+        if not column or '(' in column:
+            continue # Embedded resources are not supported
+        alias, _, name = column.rpartition(':')
+        name = name.split('::', 1)[0]
+        if name == '*':
+            projected.update(row)
+        else:
+            projected[alias or name] = row.get(name)
+    return projected
+
+
+def _sort(rows: list[dict], order: str) -> list[dict]:
+    for term in reversed([t for t in order.split(',') if t]):
+        parts = term.split('.')
+        column = parts[0]
+        descending = 'desc' in parts[1:]
+        nulls_first = 'nullsfirst' in parts[1:] or ('nullslast' not in parts[1:] and descending)
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _error_response(status: int, code: str, message: str, details: str | None = None) -> httpx.Response:
+    return httpx.Response(status, json={'code': code, 'message': message, 'details': details, 'hint': None})
+
+
+class FakePostgrestTransport(httpx.AsyncBaseTransport):
+    """httpx transport that serves PostgREST requests from a FakeSupabaseStore."""
+
+    def __init__(self, store: FakeSupabaseStore = fake_store):
+        self._store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if await self._store.simulate_async():
+            return _error_response(503, 'PGRST000', "Injected failure (fake Supabase)")
+        await request.aread()
+        try:
+            return self._handle(request)
+        except ValueError as e:
+            return _error_response(400, 'PGRST100', str(e))
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        table_name = request.url.path.rstrip('/').rsplit('/', 1)[-1]
+        params = request.url.params
+        prefer = request.headers.get('prefer', '')
+        filters = [(k, v) for k, v in params.multi_items() if k not in _STRUCTURAL_PARAMS]
+        body = json.loads(request.content) if request.content else None
+
+        with self._store._lock:
+            rows = self._store.tables.setdefault(table_name, [])
+            if request.method in ('GET', 'HEAD'):
+                result = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                total = len(result)
+                if params.get('order'):
+                    result = _sort(result, params['order'])
+                offset = int(params.get('offset', 0))
+                limit = params.get('limit')
+                result = result[offset:offset + int(limit)] if limit is not None else result[offset:]
+                result = [_project(r, params.get('select')) for r in result]
+                status = 200
+            elif request.method == 'POST':
+                result = self._insert(rows, body, prefer, params.get('on_conflict'))
+                result = [_project(r, params.get('select')) for r in result]
+                total, status = len(result), 201
+            elif request.method == 'PATCH':
+                matched = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                for r in matched:
+                    r.update(body or {})
+                result = [_project(r, params.get('select')) for r in matched]
+                total, status = len(result), 200
+            elif request.method == 'DELETE':
+                matched = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                self._store.tables[table_name] = [r for r in rows if r not in matched]
+                result = [_project(r, params.get('select')) for r in matched]
+                total, status = len(result), 200
+            else:
+                return _error_response(405, 'PGRST117', f"Unsupported HTTP method: {request.method}")
+
+        headers = {'Content-Range': f"0-{max(len(result) - 1, 0)}/{total if 'count=' in prefer else '*'}"}
+        if request.method == 'HEAD' or 'return=minimal' in prefer:
+            return httpx.Response(204 if request.method != 'HEAD' else 200, headers=headers)
+        if _OBJECT_MEDIA_TYPE in request.headers.get('accept', ''):
+            if len(result) != 1:
+                return _error_response(406, 'PGRST116', "JSON object requested, multiple (or no) rows returned",
+                                       f"The result contains {len(result)} rows")
+            return httpx.Response(status, json=result[0], headers=headers)
+        return httpx.Response(status, json=result, headers=headers)
+
+    @staticmethod
+    def _insert(rows: list[dict], body, prefer: str, on_conflict: str | None) -> list[dict]:
+        incoming = body if isinstance(body, list) else [body or {}]
+        upsert = 'resolution=' in prefer
+        ignore_duplicates = 'resolution=ignore-duplicates' in prefer
+        conflict_columns = [c.strip().strip('"') for c in (on_conflict or 'id').split(',')]
+        written = []
+        for item in incoming:
+            record = dict(item)
+            existing = None
+            if upsert:
+                key = tuple(record.get(c) for c in conflict_columns)
+                existing = next((r for r in rows if tuple(r.get(c) for c in conflict_columns) == key), None)
+            if existing is None:
+                record.setdefault('id', str(uuid.uuid4())) # After the lookup: an upsert on another key keeps the row's id
+                if not upsert and any(r.get('id') == record['id'] for r in rows):
+                    raise ValueError(f"duplicate key value violates unique constraint (id={record['id']})")
+            if existing is not None:
+                if not ignore_duplicates:
+                    existing.update(record)
+                    written.append(existing)
+                continue
+            record.setdefault('created_at', _now_iso())
+            rows.append(record)
+            written.append(record)
+        return written
+
+
+# --- Setup ---
+
+_initialized = False
+
+
+def init_fake_supabase() -> None:
+    """Fills in placeholder project settings and applies latency/failure/seed config. Idempotent."""
+    global _initialized
+    if _initialized:
+        return
+    # Placeholder project settings, so the real clients and token verification can be set up
+    config.SUPABASE_URL = config.SUPABASE_URL or FAKE_SUPABASE_URL
+    config.SUPABASE_KEY = config.SUPABASE_KEY or 'fake-anon-key'
+    config.SUPABASE_SERVICE_KEY = config.SUPABASE_SERVICE_KEY or 'fake-service-role-key'
+    config.SUPABASE_JWT_SECRET = config.SUPABASE_JWT_SECRET or FAKE_JWT_SECRET
+    config.SUPABASE_JWT_ISSUER = config.SUPABASE_JWT_ISSUER or f"{config.SUPABASE_URL}/auth/v1"
+
+    fake_store.configure(config.FAKE_SUPABASE_LATENCY_MS, config.FAKE_SUPABASE_FAILURE_RATE)
+    if config.FAKE_SUPABASE_SEED_FILE:
+        with open(config.FAKE_SUPABASE_SEED_FILE, encoding='utf-8') as f:
+            fake_store.seed(json.load(f))
+        print(f"Seeded fake Supabase from {config.FAKE_SUPABASE_SEED_FILE}: {fake_store.stats()['tables']}")
+    _initialized = True
+    print(f"WARN: Using in-memory fake Supabase backend (latency {fake_store.latency_ms} ms, "
+          f"failure rate {fake_store.failure_rate}). Data is not persisted.")
@@ -0,0 +1,92 @@
+# backend/database/import_store.py
+"""
+Progress checkpoints for supplier inventory imports (services/inventory_import_service).
+
+A checkpoint records the last file line up to which every row has been applied
+to the catalog (or rejected), with the counters for those lines, so a failed
+import resumes after it. Stored with the campaign checkpoints: in the
+JOB_STATE_SQLITE_PATH file locally, or this Supabase table when
+JOB_STATE_BACKEND is 'postgres':
+
+    create table inventory_imports (
+        import_id text primary key,
+        source text not null,            -- file name
+        fingerprint text not null,       -- size + hash of the file's ends; a changed file cannot resume
+        status text not null,            -- running | completed | failed
+        last_line int not null default 0,
+        row_count int not null default 0, -- data rows through last_line
+        unchanged int not null default 0, -- set on completion
+        updated int not null default 0,
+        inserted int not null default 0,
+        rejected int not null default 0,
+        last_error text,
+        elapsed_seconds double precision not null default 0, -- summed over runs
+        started_at double precision,     -- epoch seconds
+        updated_at double precision
+    );
+
+The import runs from a script, outside any request, so these calls block.
+"""
+import sqlite3
+import threading
+
+from ..config import config
+from .async_db import run_query_sync, table
+
+IMPORTS_TABLE = 'inventory_imports'
+CHECKPOINT_FIELDS = ('import_id', 'source', 'fingerprint', 'status', 'last_line', 'row_count', 'unchanged', 'updated',
+                     'inserted', 'rejected', 'last_error', 'elapsed_seconds', 'started_at', 'updated_at')
+
+
+class SQLiteImportStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {IMPORTS_TABLE} (
+                import_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status TEXT NOT NULL,
+                last_line INTEGER NOT NULL DEFAULT 0,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                unchanged INTEGER NOT NULL DEFAULT 0,
+                updated INTEGER NOT NULL DEFAULT 0,
+                inserted INTEGER NOT NULL DEFAULT 0,
+                rejected INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                elapsed_seconds REAL NOT NULL DEFAULT 0,
+                started_at REAL,
+                updated_at REAL
+            )""")
+
+    def load(self, import_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT * FROM {IMPORTS_TABLE} WHERE import_id = ?", (import_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save(self, checkpoint: dict) -> None:
+        values = [checkpoint.get(field) for field in CHECKPOINT_FIELDS]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {IMPORTS_TABLE} ({', '.join(CHECKPOINT_FIELDS)}) "
+                f"VALUES ({', '.join('?' for _ in CHECKPOINT_FIELDS)})",
+                values,
+            )
+
+
+class PostgresImportStore:
+    def load(self, import_id: str) -> dict | None:
+        response = run_query_sync(table(IMPORTS_TABLE).select('*').eq('import_id', import_id).limit(1))
+        return response.data[0] if response.data else None
+
+    def save(self, checkpoint: dict) -> None:
+        run_query_sync(table(IMPORTS_TABLE).upsert({field: checkpoint.get(field) for field in CHECKPOINT_FIELDS}))
+
+
+def create_import_store() -> SQLiteImportStore | PostgresImportStore:
+    if config.JOB_STATE_BACKEND == 'postgres':
+        return PostgresImportStore()
+    return SQLiteImportStore(config.JOB_STATE_SQLITE_PATH)
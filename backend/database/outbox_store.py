@@ -0,0 +1,254 @@
+# backend/database/outbox_store.py
+"""
+Durable storage for the notification outbox.
+
+Request handlers only insert a row; services/notification_outbox delivers it
+later. Two interchangeable backends, chosen by NOTIFICATION_OUTBOX_BACKEND:
+
+- 'sqlite' (local/dev): a WAL-mode SQLite file, so enqueueing is one local write.
+- 'postgres' (production): the Supabase table below, reached through PostgREST.
+
+Row lifecycle: pending -> in_flight (claimed, leased until available_at) ->
+sent | pending (retry at available_at) | dead (attempts exhausted). A claim
+whose lease expired (worker crashed mid-delivery) is claimed again.
+
+Postgres schema (run once in the Supabase SQL editor):
+
+    create table notification_outbox (
+        id bigserial primary key,
+        channel text not null,
+        recipients jsonb not null,
+        subject text,
+        body text not null,
+        html_body text,
+        status text not null default 'pending',
+        attempts int not null default 0,
+        available_at timestamptz not null default now(),
+        last_error text,
+        created_at timestamptz not null default now(),
+        updated_at timestamptz not null default now()
+    );
+    create index notification_outbox_due on notification_outbox (channel, status, available_at);
+
+    create function claim_notification_outbox(p_channel text, p_limit int, p_lease_seconds int)
+    returns setof notification_outbox language sql as $$
+        update notification_outbox o
+           set status = 'in_flight', attempts = o.attempts + 1, updated_at = now(),
+               available_at = now() + make_interval(secs => p_lease_seconds)
+         where o.id in (
+            select id from notification_outbox
+             where channel = p_channel and status in ('pending', 'in_flight') and available_at <= now()
+             order by available_at
+             limit p_limit
+             for update skip locked)
+        returning o.*;
+    $$;
+"""
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from ..config import config
+from .async_db import rpc, run_query, table
+
+OUTBOX_TABLE = 'notification_outbox'
+STATUSES = ('pending', 'in_flight', 'sent', 'dead')
+
+
+class OutboxMessage(NamedTuple):
+    id: int
+    channel: str # 'email' | 'sms' | 'whatsapp'
+    recipients: list[str]
+    subject: str | None
+    body: str
+    html_body: str | None
+    attempts: int # Including the delivery in progress
+    last_error: str | None = None
+
+
+def _decode(row) -> OutboxMessage:
+    recipients = row['recipients']
+    if isinstance(recipients, str):
+        recipients = json.loads(recipients)
+    return OutboxMessage(int(row['id']), row['channel'], recipients, row['subject'], row['body'],
+                         row['html_body'], int(row['attempts']), row['last_error'])
+
+
+class SQLiteOutboxStore:
+    """Outbox in a local SQLite file. One shared connection; calls are short and serialized by a lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # Durable across app crashes; WAL fsyncs on checkpoint
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {OUTBOX_TABLE} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                recipients TEXT NOT NULL,
+                subject TEXT,
+                body TEXT NOT NULL,
+                html_body TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {OUTBOX_TABLE}_due ON {OUTBOX_TABLE} (channel, status, available_at)")
+
+    async def enqueue(self, channel: str, recipients: list[str], subject: str | None, body: str,
+                      html_body: str | None = None) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO {OUTBOX_TABLE} (channel, recipients, subject, body, html_body, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (channel, json.dumps(recipients), subject, body, html_body, now, now, now),
+            )
+            return cursor.lastrowid
+
+    async def claim(self, channel: str, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT * FROM {OUTBOX_TABLE} WHERE channel = ? AND status IN ('pending', 'in_flight') "
+                    "AND available_at <= ? ORDER BY available_at LIMIT ?",
+                    (channel, now, limit),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        f"UPDATE {OUTBOX_TABLE} SET status = 'in_flight', attempts = attempts + 1, "
+                        "available_at = ?, updated_at = ? WHERE id = ?",
+                        [(now + lease_seconds, now, row['id']) for row in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [_decode({**dict(row), 'attempts': row['attempts'] + 1}) for row in rows]
+
+    def _set(self, message_id: int, status: str, available_at: float | None = None, error: str | None = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE {OUTBOX_TABLE} SET status = ?, available_at = COALESCE(?, available_at), "
+                "last_error = COALESCE(?, last_error), updated_at = ? WHERE id = ?",
+                (status, available_at, error, now, message_id),
+            )
+
+    async def mark_sent(self, message_id: int) -> None:
+        self._set(message_id, 'sent')
+
+    async def mark_retry(self, message_id: int, error: str, delay_seconds: float) -> None:
+        self._set(message_id, 'pending', time.time() + delay_seconds, error)
+
+    async def mark_dead(self, message_id: int, error: str) -> None:
+        self._set(message_id, 'dead', error=error)
+
+    async def requeue(self, message_id: int) -> bool:
+        """Moves a dead-lettered message back to pending with a fresh attempt budget."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE {OUTBOX_TABLE} SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'dead'",
+                (now, now, message_id),
+            )
+            return cursor.rowcount > 0
+
+    async def dead_letters(self, limit: int = 50) -> list[OutboxMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM {OUTBOX_TABLE} WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_decode(row) for row in rows]
+
+    async def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT status, COUNT(*) AS n FROM {OUTBOX_TABLE} GROUP BY status").fetchall()
+        return {status: 0 for status in STATUSES} | {row['status']: row['n'] for row in rows}
+
+    async def purge_sent(self, older_than_seconds: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {OUTBOX_TABLE} WHERE status = 'sent' AND updated_at < ?", (time.time() - older_than_seconds,)
+            )
+            return cursor.rowcount
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class PostgresOutboxStore:
+    """Outbox in the Supabase 'notification_outbox' table; claims use claim_notification_outbox (SKIP LOCKED)."""
+
+    async def enqueue(self, channel: str, recipients: list[str], subject: str | None, body: str,
+                      html_body: str | None = None) -> int:
+        response = await run_query(table(OUTBOX_TABLE).insert({
+            'channel': channel, 'recipients': recipients, 'subject': subject, 'body': body, 'html_body': html_body,
+        }))
+        return int(response.data[0]['id'])
+
+    async def claim(self, channel: str, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        response = await run_query(rpc('claim_notification_outbox', {
+            'p_channel': channel, 'p_limit': limit, 'p_lease_seconds': int(lease_seconds),
+        }))
+        return [_decode(row) for row in response.data or []]
+
+    async def _set(self, message_id: int, payload: dict) -> None:
+        payload['updated_at'] = _iso(time.time())
+        await run_query(table(OUTBOX_TABLE).update(payload).eq('id', message_id))
+
+    async def mark_sent(self, message_id: int) -> None:
+        await self._set(message_id, {'status': 'sent'})
+
+    async def mark_retry(self, message_id: int, error: str, delay_seconds: float) -> None:
+        await self._set(message_id, {'status': 'pending', 'available_at': _iso(time.time() + delay_seconds), 'last_error': error})
+
+    async def mark_dead(self, message_id: int, error: str) -> None:
+        await self._set(message_id, {'status': 'dead', 'last_error': error})
+
+    async def requeue(self, message_id: int) -> bool:
+        now = _iso(time.time())
+        response = await run_query(
+            table(OUTBOX_TABLE).update({'status': 'pending', 'attempts': 0, 'available_at': now, 'updated_at': now})
+            .eq('id', message_id).eq('status', 'dead')
+        )
+        return bool(response.data)
+
+    async def dead_letters(self, limit: int = 50) -> list[OutboxMessage]:
+        response = await run_query(
+            table(OUTBOX_TABLE).select('id, channel, recipients, subject, body, html_body, attempts, last_error')
+            .eq('status', 'dead').order('updated_at', desc=True).limit(limit)
+        )
+        return [_decode(row) for row in response.data or []]
+
+    async def counts(self) -> dict[str, int]:
+        counts = {}
+        for status in STATUSES:
+            response = await run_query(table(OUTBOX_TABLE).select('id', count='exact', head=True).eq('status', status))
+            counts[status] = response.count or 0
+        return counts
+
+    async def purge_sent(self, older_than_seconds: float) -> int:
+        response = await run_query(
+            table(OUTBOX_TABLE).delete().eq('status', 'sent').lt('updated_at', _iso(time.time() - older_than_seconds))
+        )
+        return len(response.data or [])
+
+
+def create_outbox_store() -> SQLiteOutboxStore | PostgresOutboxStore:
+    if config.NOTIFICATION_OUTBOX_BACKEND == 'postgres':
+        return PostgresOutboxStore()
+    return SQLiteOutboxStore(config.NOTIFICATION_OUTBOX_SQLITE_PATH)
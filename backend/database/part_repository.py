@@ -0,0 +1,143 @@
+# backend/database/part_repository.py
+"""
+Typed access to the 'parts' catalog table.
+
+Reads here feed the in-memory search index (services/part_service), which
+runs on a background thread, and the supplier inventory import
+(services/inventory_import_service), which runs from a script, so these are
+blocking calls over run_query_sync.
+
+Expected 'parts' table:
+    id uuid primary key, sku text unique, name text, brand text, category text,
+    part_number text,            -- the brand's own (aftermarket) number
+    oem_numbers text[],          -- OEM cross-references
+    price numeric, stock int, is_active bool default true,
+    updated_at timestamptz       -- maintained by trigger; drives incremental refresh
+    create index on parts (updated_at, id);
+
+Expected 'part_fitments' table (read only by the offline fitment index build):
+    id bigint primary key, part_id uuid references parts, make text, model text,
+    year_from int, year_to int,  -- inclusive range
+    engine text                  -- null = every engine of that model-year
+"""
+from typing import Iterator, NamedTuple
+
+from postgrest.types import ReturnMethod
+
+from .async_db import run_query_sync, table
+
+PARTS_TABLE = 'parts'
+FITMENTS_TABLE = 'part_fitments'
+PART_COLUMNS = 'id, sku, name, brand, category, part_number, oem_numbers, price, stock, is_active, updated_at'
+FITMENT_COLUMNS = 'id, part_id, make, model, year_from, year_to, engine'
+
+
+class PartRecord(NamedTuple):
+    id: str
+    sku: str
+    name: str
+    brand: str | None
+    category: str | None
+    part_number: str | None
+    oem_numbers: tuple[str, ...]
+    price: float | None
+    stock: int
+    is_active: bool
+    updated_at: str
+
+
+class FitmentRow(NamedTuple):
+    part_id: str
+    make: str
+    model: str
+    year_from: int | None
+    year_to: int | None
+    engine: str | None
+
+
+def decode_part(row: dict) -> PartRecord:
+    price = row.get('price')
+    return PartRecord(
+        str(row['id']), row.get('sku') or '', row.get('name') or '', row.get('brand'), row.get('category'),
+        row.get('part_number'), tuple(row.get('oem_numbers') or ()),
+        float(price) if price is not None else None, int(row.get('stock') or 0),
+        row.get('is_active', True) is not False, str(row.get('updated_at') or ''),
+    )
+
+
+def iter_active_parts(page_size: int = 1000, timeout: float | None = None) -> Iterator[PartRecord]:
+    """Streams every active part in id order, one keyset page (id > last seen) per query."""
+    after_id = None
+    while True:
+        query = table(PARTS_TABLE).select(PART_COLUMNS).eq('is_active', True).order('id').limit(page_size)
+        if after_id:
+            query = query.gt('id', after_id)
+        rows = run_query_sync(query, timeout=timeout).data or []
+        for row in rows:
+            yield decode_part(row)
+        if len(rows) < page_size:
+            return
+        after_id = str(rows[-1]['id'])
+
+
+def iter_parts_changed_since(since: str, page_size: int = 1000, timeout: float | None = None) -> Iterator[PartRecord]:
+    """
+    Streams parts (active or not) with updated_at >= `since`, oldest first, by
+    keyset pages on (updated_at, id): rows updated while the scan runs move past
+    the current position without shifting the rest, so none is skipped (offset
+    paging would drop the row at the next page boundary). Rows sharing the last
+    updated_at (a bulk write commits thousands with one timestamp) are finished
+    by id before moving on. A row may be seen twice; callers treat that as idempotent.
+    """
+    last_at, last_id = None, None
+    while True:
+        rows = []
+        if last_at is not None:
+            # The rest of the rows with the page's last updated_at
+            rows = run_query_sync(
+                table(PARTS_TABLE).select(PART_COLUMNS).eq('updated_at', last_at).gt('id', last_id).order('id')
+                .limit(page_size),
+                timeout=timeout,
+            ).data or []
+        if len(rows) < page_size:
+            query = table(PARTS_TABLE).select(PART_COLUMNS)
+            query = query.gt('updated_at', last_at) if last_at is not None else query.gte('updated_at', since)
+            rows += run_query_sync(query.order('updated_at').order('id').limit(page_size - len(rows)), timeout=timeout).data or []
+        for row in rows:
+            yield decode_part(row)
+        if len(rows) < page_size:
+            return
+        last_at, last_id = rows[-1]['updated_at'], str(rows[-1]['id'])
+
+
+def iter_part_fitments(page_size: int = 5000, timeout: float | None = None) -> Iterator[FitmentRow]:
+    """Streams every fitment row in id order (keyset pages)."""
+    after_id = None
+    while True:
+        query = table(FITMENTS_TABLE).select(FITMENT_COLUMNS).order('id').limit(page_size)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        rows = run_query_sync(query, timeout=timeout).data or []
+        for row in rows:
+            yield FitmentRow(str(row['part_id']), row.get('make') or '', row.get('model') or '',
+                             row.get('year_from'), row.get('year_to'), row.get('engine'))
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1]['id']
+
+
+def get_parts_by_sku(skus: list[str], timeout: float | None = None) -> list[PartRecord]:
+    """Current rows (active or not) for the given SKUs; unknown SKUs are simply absent."""
+    if not skus:
+        return []
+    rows = run_query_sync(table(PARTS_TABLE).select(PART_COLUMNS).in_('sku', skus), timeout=timeout).data or []
+    return [decode_part(row) for row in rows]
+
+
+def upsert_parts_by_sku(rows: list[dict], timeout: float | None = None) -> None:
+    """
+    Inserts or updates parts keyed by SKU, in one statement. Every row must carry
+    the same columns (PostgREST bulk upsert); columns not sent are left unchanged.
+    """
+    if rows:
+        run_query_sync(table(PARTS_TABLE).upsert(rows, on_conflict='sku', returning=ReturnMethod.minimal), timeout=timeout)
@@ -0,0 +1,126 @@
+# backend/database/profile_repository.py
+"""
+Typed access to the 'profiles' table.
+
+Every profile read goes through here: each use case selects an explicit column
+projection instead of '*', rows are decoded into models in one place, and
+multi-gets are a single `in_` query (chunked to keep URLs short) instead of
+one round trip per user. Callers own caching (see services/user_service).
+"""
+import asyncio
+from typing import AsyncIterator, Iterable, NamedTuple
+from uuid import UUID
+
+from ..models.user_models import UserProfile
+from .async_db import run_query, table
+
+PROFILES_TABLE = 'profiles'
+
+# --- Column projections per use case ---
+PROFILE_COLUMNS = 'id, email, full_name, phone, address, account_type, company_name, created_at' # Full UserProfile
+CONTACT_COLUMNS = 'id, email, full_name, phone' # Notifications
+SUMMARY_COLUMNS = 'id, email, full_name, account_type, company_name' # Admin listings
+
+# PostgREST filters travel in the URL; 36-char UUIDs x 150 stays well under common URL limits
+MULTI_GET_CHUNK_SIZE = 150
+
+
+class ProfileContact(NamedTuple):
+    id: str
+    email: str | None
+    full_name: str | None
+    phone: str | None
+
+
+class ProfileSummary(NamedTuple):
+    id: str
+    email: str | None
+    full_name: str | None
+    account_type: str | None
+    company_name: str | None
+
+
+def decode_profile(row: dict) -> UserProfile:
+    """Builds a UserProfile from a 'profiles' row (ids and timestamps come back as strings)."""
+    row = dict(row)
+    row['id'] = str(row['id'])
+    row['created_at'] = str(row.get('created_at') or '')
+    return UserProfile(**row)
+
+
+def decode_contact(row: dict) -> ProfileContact:
+    return ProfileContact(str(row['id']), row.get('email'), row.get('full_name'), row.get('phone'))
+
+
+def decode_summary(row: dict) -> ProfileSummary:
+    return ProfileSummary(str(row['id']), row.get('email'), row.get('full_name'), row.get('account_type'), row.get('company_name'))
+
+
+async def get_profile(user_id: UUID | str) -> UserProfile | None:
+    """Returns the profile for a user, or None if no row exists. Raises postgrest APIError on DB errors."""
+    response = await run_query(
+        table(PROFILES_TABLE).select(PROFILE_COLUMNS).eq('id', str(user_id)).limit(1),
+        hedge=True, # On the path of every authenticated request
+    )
+    return decode_profile(response.data[0]) if response.data else None
+
+
+async def profile_exists(user_id: UUID | str) -> bool:
+    response = await run_query(table(PROFILES_TABLE).select('id').eq('id', str(user_id)).limit(1))
+    return bool(response.data)
+
+
+async def _multi_get(ids: Iterable[UUID | str], columns: str) -> list[dict]:
+    unique_ids = list(dict.fromkeys(str(i) for i in ids if i))
+    if not unique_ids:
+        return []
+    chunks = [unique_ids[i:i + MULTI_GET_CHUNK_SIZE] for i in range(0, len(unique_ids), MULTI_GET_CHUNK_SIZE)]
+    responses = await asyncio.gather(*(
+        run_query(table(PROFILES_TABLE).select(columns).in_('id', chunk)) for chunk in chunks
+    ))
+    return [row for response in responses for row in response.data or []]
+
+
+async def get_profiles(ids: Iterable[UUID | str]) -> dict[str, UserProfile]:
+    """Full profiles for many users in one round trip per chunk. Missing ids are absent from the result."""
+    return {str(row['id']): decode_profile(row) for row in await _multi_get(ids, PROFILE_COLUMNS)}
+
+
+async def get_profile_contacts(ids: Iterable[UUID | str]) -> dict[str, ProfileContact]:
+    """Email/phone for many users, e.g. to fan out a notification."""
+    return {str(row['id']): decode_contact(row) for row in await _multi_get(ids, CONTACT_COLUMNS)}
+
+
+async def get_profile_summaries(ids: Iterable[UUID | str]) -> dict[str, ProfileSummary]:
+    """Name, email and account type for many users, e.g. for admin listings."""
+    return {str(row['id']): decode_summary(row) for row in await _multi_get(ids, SUMMARY_COLUMNS)}
+
+
+async def iter_profile_contacts(after_id: str | None = None, page_size: int = 1000) -> AsyncIterator[ProfileContact]:
+    """
+    Streams every profile's contact columns in id order, one keyset page
+    (id > last seen id) per query, so deep pages cost the same as the first.
+    Pass the last id seen as `after_id` to resume.
+    """
+    while True:
+        query = table(PROFILES_TABLE).select(CONTACT_COLUMNS).order('id').limit(page_size)
+        if after_id:
+            query = query.gt('id', after_id)
+        rows = (await run_query(query)).data or []
+        for row in rows:
+            yield decode_contact(row)
+        if len(rows) < page_size:
+            return
+        after_id = str(rows[-1]['id'])
+
+
+async def update_profile(user_id: UUID | str, payload: dict) -> UserProfile | None:
+    """Applies `payload` and returns the updated profile (PostgREST returns the row), or None if no row matched."""
+    response = await run_query(table(PROFILES_TABLE).update(payload).eq('id', str(user_id)))
+    return decode_profile(response.data[0]) if response.data else None
+
+
+async def upsert_profiles(rows: list[dict]) -> None:
+    """Inserts or updates many profile rows in one request."""
+    if rows:
+        await run_query(table(PROFILES_TABLE).upsert(rows))
@@ -0,0 +1,221 @@
+# backend/database/query_metrics.py
+"""
+Instrumentation for PostgREST queries issued through async_db.run_query.
+
+Each query is reduced to a shape - table, operation and filters with their
+values redacted (``user_id=eq.?``) - and timings, row counts and response
+sizes are aggregated per shape into fixed-bucket histograms. Queries slower
+than DB_SLOW_QUERY_MS also go to a bounded slow-query log.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Any
+
+import httpx
+
+from ..config import config
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+# Query params that describe the result shape, not user data; kept verbatim
+_STRUCTURAL_PARAMS = {'select', 'order', 'limit', 'offset', 'columns', 'on_conflict'}
+
+_lock = threading.Lock()
+_shapes: dict[tuple[str, str, str], '_ShapeStats'] = {}
+_slow_queries: deque = deque(maxlen=config.DB_SLOW_QUERY_LOG_SIZE)
+_dropped_shapes = 0
+
+# Response sizes seen by the httpx hook for the query running in this context
+_response_sizes: contextvars.ContextVar[list | None] = contextvars.ContextVar('db_response_sizes', default=None)
+
+
+class _ShapeStats:
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms', 'rows', 'max_rows', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.max_rows = 0 # A growing max_rows on a select with no limit is an unbounded read
+        self.bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (a histogram estimate)."""
+        target = q * self.count
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            cumulative += n
+            if cumulative >= target and n:
+                return self.max_ms if bound == float('inf') else float(bound)
+        return self.max_ms
+
+
+def _operation(request) -> str:
+    method = request.http_method.value if hasattr(request.http_method, 'value') else str(request.http_method)
+    if '/rpc/' in request.path.path:
+        return 'rpc'
+    if method == 'POST':
+        return 'upsert' if 'merge-duplicates' in request.headers.get('prefer', '') else 'insert'
+    return {'GET': 'select', 'HEAD': 'count', 'PATCH': 'update', 'DELETE': 'delete'}.get(method, method.lower())
+
+
+def _redact(params: httpx.QueryParams) -> tuple[str, str]:
+    """Returns (filters, modifiers) strings with filter values replaced by '?'."""
+    filters, modifiers = [], []
+    for name, value in params.multi_items():
+        if name in _STRUCTURAL_PARAMS:
+            modifiers.append(f"{name}={value}")
+            continue
+        operator = value.split('.', 1)[0] if '.' in value else ''
+        if operator == 'not':
+            operator = '.'.join(value.split('.', 2)[:2])
+        filters.append(f"{name}={operator}.?" if operator else f"{name}=?")
+    return '&'.join(filters), '&'.join(m for m in modifiers if not m.startswith('columns='))
+
+
+def describe_query(query) -> dict[str, str]:
+    """Table, operation and redacted filters of a built (not yet executed) query."""
+    request = query.request
+    filters, modifiers = _redact(request.params)
+    return {
+        'table': request.path.path.rsplit('/', 1)[-1],
+        'operation': _operation(request),
+        'filters': filters,
+        'modifiers': modifiers,
+    }
+
+
+def _row_count(response) -> int:
+    data = getattr(response, 'data', None)
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+async def capture_response_size(response: httpx.Response) -> None:
+    """httpx response hook; attributes the response size to the query being recorded."""
+    sizes = _response_sizes.get()
+    if sizes is None:
+        return
+    await response.aread()
+    sizes.append(len(response.content))
+
+
+def start_capture() -> list:
+    """Starts collecting response sizes for the query about to run in the current context."""
+    sizes: list = []
+    _response_sizes.set(sizes)
+    return sizes
+
+
+def record(query, elapsed_ms: float, response=None, error: Exception | None = None, sizes: list | None = None) -> None:
+    """Adds one executed query to the per-shape histograms (and the slow log if over the threshold)."""
+    global _dropped_shapes
+    shape = describe_query(query)
+    key = (shape['table'], shape['operation'], shape['filters'])
+    rows = _row_count(response) if response is not None else 0
+    size = sum(sizes) if sizes else 0
+
+    with _lock:
+        stats = _shapes.get(key)
+        if stats is None:
+            if len(_shapes) >= config.DB_QUERY_METRICS_MAX_SHAPES:
+                _dropped_shapes += 1
+                stats = None
+            else:
+                stats = _shapes[key] = _ShapeStats()
+        if stats is not None:
+            stats.count += 1
+            stats.errors += error is not None
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += rows
+            stats.max_rows = max(stats.max_rows, rows)
+            stats.bytes += size
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    stats.buckets[i] += 1
+                    break
+
+        if elapsed_ms >= config.DB_SLOW_QUERY_MS:
+            _slow_queries.append({
+                'at': time.time(),
+                **shape,
+                'ms': round(elapsed_ms, 2),
+                'rows': rows,
+                'bytes': size,
+                'error': f"{type(error).__name__}: {error}" if error is not None else None,
+            })
+
+    if elapsed_ms >= config.DB_SLOW_QUERY_MS:
+        print(f"WARN: Slow query {elapsed_ms:.0f}ms: {shape['operation']} {shape['table']} "
+              f"[{shape['filters']}] [{shape['modifiers']}] rows={rows} bytes={size}")
+
+
+_SORT_KEYS = {
+    'total_ms': lambda s: s.total_ms,
+    'count': lambda s: s.count,
+    'bytes': lambda s: s.bytes,
+    'rows': lambda s: s.rows,
+    'max_rows': lambda s: s.max_rows,
+    'max_ms': lambda s: s.max_ms,
+    'p95_ms': lambda s: s.percentile(0.95),
+}
+
+
+def top_queries(limit: int = 10, sort: str = 'total_ms') -> list[dict[str, Any]]:
+    """Top-N query shapes by the given metric (total_ms, count, bytes, rows, max_rows, max_ms, p95_ms)."""
+    key_fn = _SORT_KEYS.get(sort, _SORT_KEYS['total_ms'])
+    with _lock:
+        ranked = sorted(_shapes.items(), key=lambda item: key_fn(item[1]), reverse=True)[:limit]
+        return [
+            {
+                'table': table,
+                'operation': operation,
+                'filters': filters,
+                'count': s.count,
+                'errors': s.errors,
+                'total_ms': round(s.total_ms, 2),
+                'avg_ms': round(s.total_ms / s.count, 2) if s.count else 0.0,
+                'p50_ms': s.percentile(0.50),
+                'p95_ms': s.percentile(0.95),
+                'p99_ms': s.percentile(0.99),
+                'max_ms': round(s.max_ms, 2),
+                'rows': s.rows,
+                'avg_rows': round(s.rows / s.count, 1) if s.count else 0.0,
+                'max_rows': s.max_rows,
+                'bytes': s.bytes,
+                'histogram': dict(zip(('le_inf' if b == float('inf') else f"le_{b}" for b in LATENCY_BUCKETS_MS), s.buckets)),
+            }
+            for (table, operation, filters), s in ranked
+        ]
+
+
+def slow_queries(limit: int = 50) -> list[dict[str, Any]]:
+    """Most recent slow queries, newest first."""
+    with _lock:
+        return list(reversed(_slow_queries))[:limit]
+
+
+def metrics_summary() -> dict[str, Any]:
+    with _lock:
+        return {
+            'shapes': len(_shapes),
+            'dropped_shapes': _dropped_shapes,
+            'slow_query_threshold_ms': config.DB_SLOW_QUERY_MS,
+            'slow_queries_logged': len(_slow_queries),
+        }
+
+
+def reset() -> None:
+    global _dropped_shapes
+    with _lock:
+        _shapes.clear()
+        _slow_queries.clear()
+        _dropped_shapes = 0
@@ -1,7 +1,13 @@
 import os
-from supabase import create_client, Client
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from supabase import create_client, Client, ClientOptions
 # Import config to get the database keys
 from ..config import config
+from .fake_supabase import FakeSupabaseClient, fake_store, init_fake_supabase
+from .async_db import init_async_db, run_query, run_query_sync, table
 
 # Global Supabase client instance (using Anon Key for most operations)
 supabase_anon: Client | None = None
@@ -11,6 +17,13 @@ supabase_service: Client | None = None
 def init_supabase_client():
     """Initializes the Supabase clients."""
     global supabase_anon, supabase_service
+    if config.DB_BACKEND == 'fake':
+        init_fake_supabase()
+        supabase_anon = FakeSupabaseClient(fake_store)
+        supabase_service = FakeSupabaseClient(fake_store)
+        init_async_db()
+        return
+
     url: str = config.SUPABASE_URL
     key: str = config.SUPABASE_KEY
     service_key: str | None = config.SUPABASE_SERVICE_KEY
@@ -29,6 +42,9 @@ def init_supabase_client():
     else:
          print("Supabase Service Key not found, Service Client not initialized.")
 
+    # Table queries go through the pooled async layer
+    init_async_db()
+
 def get_supabase_anon_client() -> Client:
     """Returns the initialized Supabase client (Anon Key)."""
     if supabase_anon is None:
@@ -43,49 +59,152 @@ def get_supabase_service_client() -> Client | None:
     """
     return supabase_service
 
+# --- Isolated Auth Client Pool ---
+# Flows that need a user session on the client (set_session -> update_user -> sign_out)
+# must never use the shared supabase_anon client, or concurrent requests overwrite each
+# other's session. These lightweight clients keep no persisted session and are handed
+# out to one request at a time.
+_auth_client_pool: queue.LifoQueue = queue.LifoQueue(maxsize=config.AUTH_CLIENT_POOL_SIZE)
+
+def _create_isolated_auth_client() -> Client:
+    if config.DB_BACKEND == 'fake':
+        return FakeSupabaseClient(fake_store)
+    return create_client(
+        config.SUPABASE_URL,
+        config.SUPABASE_KEY,
+        options=ClientOptions(persist_session=False, auto_refresh_token=False),
+    )
+
+@contextmanager
+def isolated_auth_client():
+    """
+    Checks out a session-isolated anon client for the duration of one auth flow.
+    The client's session is cleared before it goes back to the pool.
+    """
+    try:
+        client = _auth_client_pool.get_nowait()
+    except queue.Empty:
+        client = _create_isolated_auth_client()
+    try:
+        yield client
+    finally:
+        try:
+            client.auth._remove_session() # Local only; never leak a session to the next user
+        except Exception:
+            client = None
+        if client is not None:
+            try:
+                _auth_client_pool.put_nowait(client)
+            except queue.Full:
+                pass
+
+# --- Site Information Cache ---
+# site_information changes rarely (admin toggles, recipient numbers) but is read on
+# every notification. All rows are held in memory, loaded at startup and refreshed
+# in the background; invalidate_site_info_cache() triggers an immediate refresh.
+# If a refresh fails, the last known values keep being served.
+_site_info: dict[str, str | None] = {}
+_site_info_loaded_at: float | None = None # time.time() of the last successful load
+_site_info_last_error: str | None = None
+_site_info_refreshes = 0
+_site_info_lock = threading.Lock()
+_site_info_refresh_event = threading.Event()
+_site_info_thread: threading.Thread | None = None
+
+def _site_info_query():
+    # Anon key: ensure RLS allows reading the necessary keys (e.g., make notification keys public read)
+    return table('site_information', service=False).select('info_key, info_value')
+
+def _store_site_info(rows: list[dict]) -> None:
+    global _site_info, _site_info_loaded_at, _site_info_last_error, _site_info_refreshes
+    values = {row['info_key']: row['info_value'] for row in rows or []}
+    with _site_info_lock:
+        _site_info = values # Swap the whole dict; readers never see a partial load
+        _site_info_loaded_at = time.time()
+        _site_info_last_error = None
+        _site_info_refreshes += 1
+
+def _site_info_refresh_failed(e: Exception) -> bool:
+    global _site_info_last_error
+    with _site_info_lock:
+        _site_info_last_error = f"{type(e).__name__}: {e}"
+    print(f"WARN: Site info refresh failed, serving cached values: {type(e).__name__} - {e}")
+    return False
+
+def refresh_site_info_cache() -> bool:
+    """Reloads every site_information row into memory. Returns False (keeping old values) on error."""
+    try:
+        response = run_query_sync(_site_info_query(), timeout=config.DB_READ_TIMEOUT_SECONDS + config.DB_POOL_TIMEOUT_SECONDS)
+    except Exception as e:
+        return _site_info_refresh_failed(e)
+    _store_site_info(response.data)
+    return True
+
+def invalidate_site_info_cache() -> None:
+    """Asks the background refresher to reload site_information now."""
+    _site_info_refresh_event.set()
+
+def _site_info_refresher_loop() -> None:
+    while True:
+        _site_info_refresh_event.wait(timeout=config.SITE_INFO_REFRESH_SECONDS)
+        _site_info_refresh_event.clear()
+        refresh_site_info_cache()
+
+def init_site_info_cache() -> None:
+    """Loads site_information and starts the background refresher. Safe to call more than once."""
+    global _site_info_thread
+    if _site_info_thread is not None:
+        return
+    if refresh_site_info_cache():
+        print(f"✅ Site info cache loaded ({len(_site_info)} keys).")
+    _site_info_thread = threading.Thread(target=_site_info_refresher_loop, name='site-info-refresher', daemon=True)
+    _site_info_thread.start()
+
+def site_info_cache_stats() -> dict:
+    with _site_info_lock:
+        return {
+            'name': 'site_information',
+            'size': len(_site_info),
+            'age_seconds': round(time.time() - _site_info_loaded_at, 1) if _site_info_loaded_at else None,
+            'refresh_interval_seconds': config.SITE_INFO_REFRESH_SECONDS,
+            'refreshes': _site_info_refreshes,
+            'last_error': _site_info_last_error,
+        }
+
+async def _ensure_site_info_loaded() -> None:
+    # Startup load failed (DB unreachable); retry on demand rather than serving nothing
+    if _site_info_loaded_at is not None:
+        return
+    try:
+        response = await run_query(_site_info_query())
+    except Exception as e:
+        _site_info_refresh_failed(e)
+        return
+    _store_site_info(response.data)
+
 # --- RESTORED HELPER FUNCTIONS ---
 
 async def fetch_site_info(key: str) -> str | None:
-    """Fetches a specific value from the site_information table."""
-    client = get_supabase_anon_client() # Use anon client if RLS allows reading needed keys
-    try:
-        # Ensure RLS allows reading the necessary keys (e.g., make notification keys public read or allow service_role)
-        response = await client.table('site_information')\
-                             .select('info_value')\
-                             .eq('info_key', key)\
-                             .limit(1)\
-                             .execute()
-        if response.data:
-            return response.data[0]['info_value']
+    """Returns a specific value from the site_information cache."""
+    await _ensure_site_info_loaded()
+    value = _site_info.get(key)
+    if value is None:
         print(f"WARN: Site info key '{key}' not found in database.")
-        return None
-    except Exception as e:
-        print(f"Error fetching site info for key '{key}': {e}")
-        return None
+    return value
 
 async def fetch_multiple_site_info(keys: list[str]) -> dict[str, str | None]:
-    """Fetches multiple values from the site_information table."""
-    client = get_supabase_anon_client() # Use anon client if RLS allows reading needed keys
+    """Returns multiple values from the site_information cache."""
     results = {key: None for key in keys}
     if not keys:
         return results
-    try:
-        # Ensure RLS allows reading the necessary keys
-        response = await client.table('site_information')\
-                             .select('info_key, info_value')\
-                             .in_('info_key', keys)\
-                             .execute()
-        if response.data:
-            for item in response.data:
-                results[item['info_key']] = item['info_value']
+    await _ensure_site_info_loaded()
+    values = _site_info
+    for key in keys:
+        results[key] = values.get(key)
         # Log warnings for keys not found
-        for key in keys:
-            if results[key] is None:
-                 print(f"WARN: Site info key '{key}' not found in database.")
-        return results
-    except Exception as e:
-        print(f"Error fetching multiple site info for keys '{keys}': {e}")
-        return results # Return dict with Nones for failed keys
+        if results[key] is None:
+             print(f"WARN: Site info key '{key}' not found in database.")
+    return results
 
 async def fetch_admin_notification_settings() -> dict:
     """Fetches all relevant admin notification settings and recipients from DB."""
@@ -102,9 +221,9 @@ async def fetch_admin_notification_settings() -> dict:
     db_values = await fetch_multiple_site_info(keys_to_fetch)
 
     settings = {
-        'sms_enabled': db_values.get(config.ADMIN_NOTIFY_SMS_ENABLED_KEY, 'false').lower() == 'true',
-        'whatsapp_enabled': db_values.get(config.ADMIN_NOTIFY_WHATSAPP_ENABLED_KEY, 'false').lower() == 'true',
-        'email_enabled': db_values.get(config.ADMIN_NOTIFY_EMAIL_ENABLED_KEY, 'false').lower() == 'true',
+        'sms_enabled': (db_values.get(config.ADMIN_NOTIFY_SMS_ENABLED_KEY) or 'false').lower() == 'true',
+        'whatsapp_enabled': (db_values.get(config.ADMIN_NOTIFY_WHATSAPP_ENABLED_KEY) or 'false').lower() == 'true',
+        'email_enabled': (db_values.get(config.ADMIN_NOTIFY_EMAIL_ENABLED_KEY) or 'false').lower() == 'true',
         'sms_recipients': [db_values.get(k) for k in config.ADMIN_SMS_RECIPIENT_KEYS if db_values.get(k)],
         'whatsapp_recipients': [db_values.get(k) for k in config.ADMIN_WHATSAPP_RECIPIENT_KEYS if db_values.get(k)],
         'email_recipients': [db_values.get(k) for k in config.ADMIN_EMAIL_RECIPIENT_KEYS if db_values.get(k)],
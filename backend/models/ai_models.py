@@ -30,4 +30,9 @@ class ConversationContentQuery(BaseModel):
     """Input model for the conversation history retrieval tool BY CONTENT."""
     search_query: str = Field(..., description="The text phrase or keywords to search for within the conversation history.")
     # Make optional and remove default from Field definition
-    max_results: Optional[int] = Field(None, description="Optional: Maximum number of matching messages to return. Defaults to 5 if not provided.")
\ No newline at end of file
+    max_results: Optional[int] = Field(None, description="Optional: Maximum number of matching messages to return. Defaults to 5 if not provided.")
+
+class DtcLookupQuery(BaseModel):
+    """Input model for the OBD-II fault code lookup tool."""
+    codes: List[str] = Field(..., description="One or more OBD-II trouble codes to look up, e.g. ['P0420', 'P0171']. Partial codes like 'P04' are allowed.")
+    vehicle_make: Optional[str] = Field(None, description="Optional: The vehicle manufacturer (e.g. 'toyota', 'honda') to include manufacturer-specific code meanings.")
\ No newline at end of file
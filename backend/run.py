@@ -2,20 +2,27 @@
 from flask import Flask, jsonify
 from .config import config
 from .extensions import init_app as init_extensions
-from .database.supabase_client import init_supabase_client
+from .database.supabase_client import init_supabase_client, init_site_info_cache
 import asyncio
 
 # Import Blueprints
 from .api.auth import auth_bp
 # Import other blueprints as they are created
-# from .api.parts import parts_bp
+from .api.parts import parts_bp
 # from .api.orders import orders_bp
 # from .api.services import services_bp
 # from .api.users import users_bp
 # from .api.store import store_bp
 # from .api.delivery import delivery_bp
-# from .api.admin import admin_bp
+from .api.admin import admin_bp
 from .api.ai import ai_bp
+from .api.notifications import notifications_bp
+from .services.usage_service import init_usage_metering
+from .services.delivery_status_service import init_delivery_status_log
+from .services.dtc_service import load_dtc_database
+from .services.part_service import init_parts_search
+from .services.notification_service import init_notification_outbox
+from .services.notification_templates import load_notification_templates
 
 # <<< Import the tracing config function >>>
 from agents import set_tracing_disabled
@@ -30,6 +37,13 @@ def create_app():
 
     # 3. Initialize Supabase (or other services that don't depend on 'app')
     init_supabase_client()
+    init_site_info_cache()
+    init_usage_metering()
+    load_dtc_database()
+    init_parts_search()
+    load_notification_templates()
+    init_notification_outbox()
+    init_delivery_status_log()
 
     # <<< Disable OpenAI Agents Tracing Globally >>>
     print("Disabling OpenAI Agents tracing globally...")
@@ -42,14 +56,15 @@ def create_app():
 
     # 5. Register blueprints onto the 'app'
     app.register_blueprint(auth_bp)
-    # app.register_blueprint(parts_bp)
+    app.register_blueprint(parts_bp)
     # app.register_blueprint(orders_bp)
     # app.register_blueprint(services_bp)
     # app.register_blueprint(users_bp)
     # app.register_blueprint(store_bp)
     # app.register_blueprint(delivery_bp)
-    # app.register_blueprint(admin_bp)
+    app.register_blueprint(admin_bp)
     app.register_blueprint(ai_bp)
+    app.register_blueprint(notifications_bp)
 
     # 6. Define routes on the 'app'
     @app.route('/')
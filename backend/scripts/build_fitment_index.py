@@ -0,0 +1,28 @@
+# backend/scripts/build_fitment_index.py
+"""
+Builds the vehicle fitment index file from 'parts' and 'part_fitments'.
+
+Run from the repository root (e.g. nightly, or after a fitment data import):
+    python -m backend.scripts.build_fitment_index [output_path]
+
+The file is replaced atomically; running workers pick it up on their next
+parts index refresh (see services/part_service).
+"""
+import sys
+import time
+
+from ..config import config
+from ..database.supabase_client import init_supabase_client
+from ..services.part_service import build_fitment_index_from_db
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else config.FITMENT_INDEX_PATH
+    init_supabase_client()
+    start = time.perf_counter()
+    counts = build_fitment_index_from_db(path)
+    print(f"✅ Built fitment index '{path}' in {time.perf_counter() - start:.1f}s: {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# backend/scripts/import_supplier_inventory.py
+"""
+Imports a supplier inventory / price list (CSV or XLSX) into the parts catalog.
+
+Run from the repository root:
+    python -m backend.scripts.import_supplier_inventory <file> [--import-id ID] [--restart]
+
+Rerunning a failed import resumes where it stopped (same file, same id); see
+services/inventory_import_service. Exits 1 if the import did not complete.
+"""
+import argparse
+import sys
+
+from ..database.supabase_client import init_supabase_client
+from ..services.inventory_import_service import run_import
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a supplier inventory file into the parts catalog.")
+    parser.add_argument('path', help="CSV or XLSX file with a SKU column plus any of name, brand, category, part_number, price, stock")
+    parser.add_argument('--import-id', help="Checkpoint id (default: file name + fingerprint)")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start from the first row")
+    args = parser.parse_args()
+    init_supabase_client()
+    try:
+        run_import(args.path, import_id=args.import_id, restart=args.restart)
+    except Exception as e:
+        print(f"❌ Import failed: {type(e).__name__} - {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,13 @@
 # backend/services/ai_service.py
-import asyncio
 import uuid
 import json
 from datetime import datetime, timedelta, timezone
 import traceback
 
 # --- Corrected Imports for Streaming ---
-from agents import Agent, Runner, RunContextWrapper, function_tool
+from agents import Agent, Runner, RunContextWrapper, function_tool, set_default_openai_client
 from agents.result import RunResultStreaming
+from openai import AsyncOpenAI
 from openai.types.responses import ResponseTextDeltaEvent
 from typing import Optional, List, AsyncIterator
 # --- End Imports ---
@@ -17,8 +17,16 @@ from ..config import config
 # <<< END ADDED >>>
 
 from ..models.user_models import UserProfile
-from ..models.ai_models import ChatMessage, ConversationTimeQuery, ConversationContentQuery
+from ..models.ai_models import ChatMessage, ConversationTimeQuery, ConversationContentQuery, DtcLookupQuery
 from ..database.supabase_client import get_supabase_anon_client, get_supabase_service_client
+from ..database.async_db import run_query, table
+from .usage_service import check_quota, record_run_usage
+from ..utils.resilience import dependency
+from .dtc_service import lookup_codes
+
+# --- OpenAI client with a bounded timeout (the SDK default waits up to 10 minutes) ---
+if config.OPENAI_API_KEY:
+    set_default_openai_client(AsyncOpenAI(api_key=config.OPENAI_API_KEY, timeout=config.OPENAI_TIMEOUT_SECONDS))
 
 # --- Keep AiMechanicContext class ---
 class AiMechanicContext:
@@ -49,14 +57,14 @@ async def get_conversation_by_time_tool(
         end_time_iso = end_dt.isoformat() + "+00:00"
 
         print(f"Querying DB for user {user_id} between {start_time_iso} and {end_time_iso}")
-        response = await asyncio.to_thread(
-            supabase_service.table('ai_chat_logs')
+        response = await run_query(
+            table('ai_chat_logs')
             .select('sender, message_text, timestamp')
             .eq('user_id', user_id)
             .gte('timestamp', start_time_iso)
             .lte('timestamp', end_time_iso)
             .order('timestamp', desc=False)
-            .limit(10).execute
+            .limit(10)
         )
         if response.data:
             results = [{"timestamp": msg['timestamp'], "sender": msg['sender'], "message": msg['message_text']} for msg in response.data]
@@ -87,13 +95,13 @@ async def search_conversation_history_tool(
     supabase_service = get_supabase_service_client()
     if not supabase_service: return "Error: Database service is unavailable."
     try:
-        response = await asyncio.to_thread(
-            supabase_service.table('ai_chat_logs')
+        response = await run_query(
+            table('ai_chat_logs')
             .select('sender, message_text, timestamp')
             .eq('user_id', user_id)
             .ilike('message_text', f'%{search_term}%')
             .order('timestamp', desc=True)
-            .limit(limit).execute
+            .limit(limit)
         )
         if response.data:
             results = [{"timestamp": msg['timestamp'], "sender": msg['sender'], "message": msg['message_text']} for msg in reversed(response.data)]
@@ -207,6 +215,26 @@ We offer a comprehensive suite of services designed to meet all your vehicle nee
 """
     return content.strip()
 
+# --- lookup_dtc_codes_tool function (OBD-II fault code lookup) ---
+@function_tool
+async def lookup_dtc_codes_tool(
+    ctx: RunContextWrapper[AiMechanicContext],
+    query: DtcLookupQuery
+) -> str:
+    """
+    Looks up the meaning of one or more OBD-II diagnostic trouble codes (e.g. P0420, P0171, U0100).
+    Use this tool whenever the user mentions a fault code or check engine light code.
+    """
+    print(f"Tool 'lookup_dtc_codes_tool' called with codes: {query.codes}, make: {query.vehicle_make}")
+    if not query.codes:
+        return "Error: No trouble codes provided."
+    try:
+        results = lookup_codes(query.codes[:20], query.vehicle_make)
+        return json.dumps(results)
+    except Exception as e:
+        print(f"Error looking up DTC codes: {type(e).__name__} - {e}")
+        return f"An error occurred while looking up the trouble codes: {str(e)}"
+
 
 # --- MODIFIED: ai_mechanic_agent definition (Instructions) ---
 ai_mechanic_agent = Agent[AiMechanicContext](
@@ -253,6 +281,7 @@ ai_mechanic_agent = Agent[AiMechanicContext](
         "3. `get_about_page_content_tool`: Use this when the user asks about the company itself, its mission, vision, leadership, or a general overview.\n"
         "4. `get_contact_page_content_tool`: Use this when the user asks for contact details like phone numbers, email addresses, physical locations, or operating hours.\n"
         "5. `get_services_page_content_tool`: Use this when the user asks about the range of services offered by Everything Automotive.\n"
+        "6. `lookup_dtc_codes_tool`: Use this whenever the user mentions one or more OBD-II fault codes (e.g. P0420). Look up all codes in a single call and base your diagnosis on the returned descriptions. If the match is 'fuzzy', mention the code you think they meant.\n"
         "\n**IMPORTANT:** When providing information from the About, Contact, or Services tools, clearly state which page the information comes from. Do not invent information not provided by the tools."
     ),
     model="gpt-4o-mini",
@@ -262,6 +291,7 @@ ai_mechanic_agent = Agent[AiMechanicContext](
         get_about_page_content_tool,
         get_contact_page_content_tool,
         get_services_page_content_tool,
+        lookup_dtc_codes_tool,
     ],
 )
 # --- END MODIFIED: ai_mechanic_agent definition ---
@@ -273,11 +303,11 @@ async def get_full_user_chat_history(user_id: str) -> List[ChatMessage]:
     if not supabase_service: return []
     print(f"Fetching FULL chat history for user: {user_id}")
     try:
-        response = await asyncio.to_thread(
-            supabase_service.table('ai_chat_logs')
+        response = await run_query(
+            table('ai_chat_logs')
             .select('sender, message_text, timestamp, context, metadata')
             .eq('user_id', user_id)
-            .order('timestamp').execute
+            .order('timestamp')
         )
         if response.data:
             history = []
@@ -315,19 +345,27 @@ async def run_ai_mechanic_agent(
         yield f"event: error\ndata: {error_detail}\n\n"
         return
 
+    # --- Enforce Daily Token Quota (in-memory check, no DB query) ---
+    quota_ok, quota_message = check_quota(user_profile)
+    if not quota_ok:
+        print(f"Quota exceeded for user {user_id}; refusing agent run.")
+        error_detail = json.dumps({"error": quota_message, "code": "quota_exceeded"})
+        yield f"event: error\ndata: {error_detail}\n\n"
+        return
+
     # --- Save User Message ---
     current_utc_time = datetime.now(timezone.utc)
     lagos_time_now = current_utc_time + timedelta(hours=1)
     timestamp_to_save = lagos_time_now.isoformat()
     user_message_db = ChatMessage(sender="user", text=user_message)
     try:
-        await asyncio.to_thread(
-            supabase_service.table('ai_chat_logs').insert({
+        await run_query(
+            table('ai_chat_logs').insert({
                 'user_id': user_id, 'session_id': session_id, 'sender': user_message_db.sender,
                 'message_text': user_message_db.text, 'context': user_message_db.context,
                 'metadata': user_message_db.metadata,
                 'timestamp': timestamp_to_save
-            }).execute
+            })
         )
         print(f"✅ User message saved to DB: session {session_id}, user {user_id} at {timestamp_to_save}")
     except Exception as e:
@@ -343,27 +381,33 @@ async def run_ai_mechanic_agent(
     # --- Run the AI Agent with Streaming ---
     context_instance = AiMechanicContext(user_profile=user_profile)
     full_response_text = ""
+    tool_call_count = 0
     result_stream: Optional[RunResultStreaming] = None
     stream_error: Optional[Exception] = None
+    openai_dep = dependency('openai') # A stream cannot be retried; only the breaker applies
 
     try:
-        print("DEBUG: About to call Runner.run_streamed (NO AWAIT)")
-        result_stream = Runner.run_streamed(
-            ai_mechanic_agent,
-            agent_history,
-            context=context_instance,
-        )
-        print(f"DEBUG: Runner.run_streamed returned object of type: {type(result_stream)}")
-
-        print("DEBUG: Starting async for loop over stream_events()")
-        async for event in result_stream.stream_events():
-            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
-                text_chunk = event.data.delta
-                if text_chunk:
-                    full_response_text += text_chunk
-                    # <<< YIELD SSE Formatted Data >>>
-                    sse_message = f"data: {json.dumps({'response': text_chunk})}\n\n"
-                    yield sse_message
+        # guard() settles the breaker even when the client disconnects mid-stream (GeneratorExit/CancelledError)
+        with openai_dep.guard():
+            print("DEBUG: About to call Runner.run_streamed (NO AWAIT)")
+            result_stream = Runner.run_streamed(
+                ai_mechanic_agent,
+                agent_history,
+                context=context_instance,
+            )
+            print(f"DEBUG: Runner.run_streamed returned object of type: {type(result_stream)}")
+
+            print("DEBUG: Starting async for loop over stream_events()")
+            async for event in result_stream.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    text_chunk = event.data.delta
+                    if text_chunk:
+                        full_response_text += text_chunk
+                        # <<< YIELD SSE Formatted Data >>>
+                        sse_message = f"data: {json.dumps({'response': text_chunk})}\n\n"
+                        yield sse_message
+                elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                    tool_call_count += 1
 
         print("DEBUG: Finished async for loop")
         # <<< YIELD SSE End Event >>>
@@ -391,6 +435,13 @@ async def run_ai_mechanic_agent(
         # <<< MODIFICATION END >>>
 
     finally:
+        # --- Record Token Usage (in-memory, flushed to DB in batches) ---
+        if result_stream is not None:
+            try:
+                record_run_usage(user_id, session_id, result_stream.context_wrapper.usage, tool_call_count)
+            except Exception as usage_e:
+                print(f"❌ ERROR recording AI usage: {type(usage_e).__name__} - {usage_e}")
+
         # --- Save Full AI Response After Streaming (in finally block) ---
         print("DEBUG: Entering finally block for AI response saving.")
         if full_response_text:
@@ -411,8 +462,8 @@ async def run_ai_mechanic_agent(
             }
             print(f"DEBUG: Payload for saving AI response: {payload_to_save}")
             try:
-                await asyncio.to_thread(
-                    supabase_service.table('ai_chat_logs').insert(payload_to_save).execute
+                await run_query(
+                    table('ai_chat_logs').insert(payload_to_save)
                 )
                 print(f"✅ AI response saved to DB: session {session_id}, user {user_id} at {ai_timestamp_to_save}")
             except Exception as save_e:
@@ -438,12 +489,12 @@ async def get_chat_history(user_id: str, session_id: str) -> List[ChatMessage]:
     if not supabase_service: return []
     print(f"Fetching SESSION chat history for user: {user_id}, session: {session_id}")
     try:
-        response = await asyncio.to_thread(
-            supabase_service.table('ai_chat_logs')
+        response = await run_query(
+            table('ai_chat_logs')
             .select('sender, message_text, timestamp, context, metadata')
             .eq('user_id', user_id)
             .eq('session_id', session_id)
-            .order('timestamp').execute
+            .order('timestamp')
         )
         if response.data:
             history = []
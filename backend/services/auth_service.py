@@ -4,12 +4,17 @@ from supabase import Client, create_client
 from postgrest.exceptions import APIError
 from gotrue.errors import AuthApiError, AuthSessionMissingError
 # Import BOTH client getters
-from ..database.supabase_client import get_supabase_anon_client, get_supabase_service_client
+from ..database.supabase_client import get_supabase_anon_client, get_supabase_service_client, isolated_auth_client
+from ..database.profile_repository import get_profile
 # --- Import necessary models ---
 from ..models.user_models import UserRegistration, UserLogin, UserProfile, UserSession, UserPasswordChange, UserForgotPassword, UserResetPassword
 from ..config import config
-import asyncio
+from ..utils.security import verify_access_token, LocalVerificationUnavailable
+from ..utils.singleflight import SingleFlight
+from ..utils.resilience import call_blocking
+from .user_service import get_cached_profile, cache_profile
 import traceback
+import jwt
 
 # --- register_user function (MODIFIED REDIRECT URL) ---
 async def register_user(user_data: UserRegistration) -> tuple[UserProfile | None, str | None]:
@@ -26,7 +31,8 @@ async def register_user(user_data: UserRegistration) -> tuple[UserProfile | None
             user_meta['full_name'] = user_data.full_name
 
         # --- Sign Up (Synchronous) ---
-        auth_response = await asyncio.to_thread(
+        auth_response = await call_blocking(
+            'supabase_auth',
             supabase.auth.sign_up,
             {
                 "email": user_data.email,
@@ -70,11 +76,13 @@ async def register_user(user_data: UserRegistration) -> tuple[UserProfile | None
             supabase_service = get_supabase_service_client()
             if supabase_service:
                 try:
-                    user_lookup = await asyncio.to_thread(
+                    user_lookup = await call_blocking(
+                        'supabase_auth',
                         supabase_service.auth.admin.get_user_by_id, # Use admin client to check
                         # Need a way to get user ID if possible, or just assume unconfirmed if error is about link
                         # This part is tricky without knowing the exact Supabase error structure for this case
                         # Let's assume if the error mentions "email link", they need confirmation
+                        idempotent=True,
                     )
                     # Simplified logic: If error mentions email link, assume confirmation needed
                     if "email link" in error_message_lower:
@@ -113,7 +121,8 @@ async def login_user(login_data: UserLogin) -> tuple[UserSession | None, str | N
 
     try:
         print(f"Attempting Supabase sign_in_with_password for: {login_data.email}")
-        auth_response = await asyncio.to_thread(
+        auth_response = await call_blocking(
+            'supabase_auth',
             supabase_anon.auth.sign_in_with_password,
             {
                 "email": login_data.email,
@@ -125,15 +134,13 @@ async def login_user(login_data: UserLogin) -> tuple[UserSession | None, str | N
             print(f"User {login_data.email} logged in successfully via Supabase Auth.")
             try:
                 user_id = auth_response.user.id
-                profile_response = await asyncio.to_thread(
-                    supabase_service.table('profiles').select('*').eq('id', user_id).limit(1).single().execute # Use single()
-                )
-
-                if profile_response.data:
-                    profile_data = profile_response.data
-                    profile_data['id'] = str(profile_data['id'])
-                    profile_data['created_at'] = str(profile_data.get('created_at', ''))
-                    profile = UserProfile(**profile_data)
+                profile = get_cached_profile(user_id)
+                if not profile:
+                    profile = await get_profile(user_id)
+                    if profile:
+                        cache_profile(profile)
+
+                if profile:
                     user_session = UserSession(
                         access_token=auth_response.session.access_token,
                         token_type=auth_response.session.token_type,
@@ -163,29 +170,10 @@ async def login_user(login_data: UserLogin) -> tuple[UserSession | None, str | N
                     return user_session, "Login successful." # Still return success
 
             except APIError as db_e:
-                 # Handle case where single() finds no rows specifically
-                if db_e.code == 'PGRST116':
-                    print(f"WARN: Login successful for {login_data.email}, but profile not found (ID: {user_id}) - PGRST116.")
-                    basic_profile_data = {
-                        'id': str(auth_response.user.id),
-                        'email': auth_response.user.email,
-                        'created_at': str(auth_response.user.created_at),
-                        'full_name': auth_response.user.user_metadata.get('full_name')
-                    }
-                    profile = UserProfile(**basic_profile_data)
-                    user_session = UserSession(
-                        access_token=auth_response.session.access_token,
-                        token_type=auth_response.session.token_type,
-                        expires_in=auth_response.session.expires_in,
-                        refresh_token=auth_response.session.refresh_token,
-                        user=profile
-                    )
-                    return user_session, "Login successful."
-                else:
-                    print(f"Supabase DB Error fetching profile for {user_id} during login: {db_e}")
-                    traceback.print_exc()
-                    # Log in but indicate profile issue
-                    return None, "Login successful, but failed to load user profile due to database error."
+                print(f"Supabase DB Error fetching profile for {user_id} during login: {db_e}")
+                traceback.print_exc()
+                # Log in but indicate profile issue
+                return None, "Login successful, but failed to load user profile due to database error."
             except Exception as profile_e:
                  print(f"Unexpected Error fetching profile for {user_id} during login: {profile_e}")
                  traceback.print_exc()
@@ -217,40 +205,93 @@ async def login_user(login_data: UserLogin) -> tuple[UserSession | None, str | N
 # --- End login_user function ---
 
 
-# --- logout_user function (No changes needed) ---
+# --- logout_user function (Stateless server-side sign out) ---
 async def logout_user(access_token: str | None) -> tuple[bool, str | None]:
-    """Logs out a user - instructs client to clear tokens. Optionally tries server-side signout."""
+    """Logs out a user - instructs client to clear tokens. Optionally revokes the session server-side."""
     message = "Logout successful. Please clear local tokens."
     success = True
 
     if access_token:
-        supabase = get_supabase_anon_client()
-        if supabase:
+        supabase_service = get_supabase_service_client()
+        if supabase_service:
             try:
-                # Use the client associated with the token to sign out
-                # Note: Supabase Python client sign_out doesn't take a token,
-                # it signs out the *client's* current session.
-                # If using anon client, this might not do much server-side.
-                # Relying on client-side token clearing is primary.
-                await asyncio.to_thread(supabase.auth.sign_out)
-                print("Attempted server-side sign out (cleared local client session).")
-                message = "Logout successful. Server session state cleared locally. Please clear browser tokens."
+                # Revoke just this session via the admin API; the JWT is passed explicitly,
+                # so no shared client session state is involved.
+                await call_blocking('supabase_auth', supabase_service.auth.admin.sign_out, access_token, 'local', idempotent=True)
+                print("Server-side session revoked.")
+                message = "Logout successful. Server session revoked. Please clear browser tokens."
             except AuthApiError as e:
                 print(f"Supabase Auth Error during server-side sign out: {e}. Proceeding.")
             except Exception as e:
                  print(f"Unexpected Error during server-side sign out: {type(e).__name__} - {e}. Proceeding.")
                  traceback.print_exc()
         else:
-            print("WARN: Supabase client not available for server-side sign out attempt.")
+            print("WARN: Supabase service client not available for server-side sign out attempt.")
 
     print("Logout processed. Instructing client to clear tokens.")
     return success, message
 # --- End logout_user function ---
 
 
-# --- get_user_from_token function (No changes needed) ---
-async def get_user_from_token(access_token: str) -> UserProfile | None:
-    """Gets user details from Supabase using an access token and fetches profile using service client."""
+# --- get_user_from_token function (Local JWT verification) ---
+async def _resolve_token_identity(access_token: str, verify_remote: bool) -> dict | None:
+    """
+    Resolves the auth identity behind an access token.
+    Verifies the JWT locally unless `verify_remote` is set (revocation-sensitive routes)
+    or local verification is unavailable, in which case Supabase Auth is asked.
+    Returns {'id', 'email', 'created_at', 'user_metadata'} or None if the token is invalid.
+    """
+    if not verify_remote:
+        try:
+            claims = verify_access_token(access_token)
+            return {
+                'id': claims['sub'],
+                'email': claims.get('email'),
+                'created_at': '', # Not part of the JWT; only used if the profile row is missing
+                'user_metadata': claims.get('user_metadata') or {},
+            }
+        except jwt.InvalidTokenError as e:
+            print(f"Auth error verifying token locally: {type(e).__name__} - {e}")
+            return None
+        except LocalVerificationUnavailable as e:
+            print(f"WARN: Local token verification unavailable ({e}); falling back to Supabase Auth.")
+
+    supabase_anon = get_supabase_anon_client()
+    user_response = await call_blocking('supabase_auth', supabase_anon.auth.get_user, jwt=access_token, idempotent=True)
+    if not user_response or not user_response.user:
+        print(f"No user found for the provided token (get_user response invalid).")
+        return None
+    return {
+        'id': user_response.user.id,
+        'email': user_response.user.email,
+        'created_at': str(user_response.user.created_at),
+        'user_metadata': user_response.user.user_metadata or {},
+    }
+
+def _basic_profile_from_identity(identity: dict) -> UserProfile:
+    """Builds a minimal profile from auth data when the profiles row is missing."""
+    return UserProfile(
+        id=str(identity['id']),
+        email=identity['email'],
+        created_at=identity['created_at'],
+        full_name=identity['user_metadata'].get('full_name'),
+    )
+
+# Concurrent resolutions of the same token (e.g. parallel calls on page load) share one lookup
+token_resolution_flight = SingleFlight('auth_token_resolution')
+
+async def get_user_from_token(access_token: str, verify_remote: bool = False) -> UserProfile | None:
+    """
+    Gets user details for an access token and fetches the profile using the service client.
+    The token is verified locally by default; pass verify_remote=True on routes that must
+    see revoked sessions immediately. Concurrent calls for the same token are coalesced.
+    """
+    return await token_resolution_flight.do(
+        (access_token, verify_remote),
+        lambda: _load_user_from_token(access_token, verify_remote),
+    )
+
+async def _load_user_from_token(access_token: str, verify_remote: bool) -> UserProfile | None:
     supabase_anon = get_supabase_anon_client()
     supabase_service = get_supabase_service_client()
 
@@ -259,57 +300,35 @@ async def get_user_from_token(access_token: str) -> UserProfile | None:
         return None
 
     try:
-        # Validate token first
-        user_response = await asyncio.to_thread(supabase_anon.auth.get_user, jwt=access_token)
-
-        if user_response and user_response.user:
-            user_id = user_response.user.id
-            try:
-                # Fetch profile using service client for potentially bypassing RLS if needed
-                profile_response = await asyncio.to_thread(
-                    supabase_service.table('profiles').select('*').eq('id', user_id).limit(1).single().execute
-                )
-
-                if profile_response.data:
-                    profile_data = profile_response.data
-                    profile_data['id'] = str(profile_data['id'])
-                    profile_data['created_at'] = str(profile_data.get('created_at', ''))
-                    profile = UserProfile(**profile_data)
-                    return profile
-                else:
-                    # Profile might not exist yet
-                    print(f"WARN: Profile not found for user_id: {user_id} (using service client)")
-                    # Return basic info from token if profile missing
-                    basic_profile_data = {
-                        'id': str(user_id),
-                        'email': user_response.user.email,
-                        'created_at': str(user_response.user.created_at),
-                        'full_name': user_response.user.user_metadata.get('full_name')
-                    }
-                    return UserProfile(**basic_profile_data)
+        identity = await _resolve_token_identity(access_token, verify_remote)
+        if not identity:
+            return None
 
-            except APIError as db_e:
-                 if db_e.code == 'PGRST116': # No profile row found
-                    print(f"WARN: Profile not found for user_id: {user_id} (PGRST116)")
-                    basic_profile_data = {
-                        'id': str(user_id),
-                        'email': user_response.user.email,
-                        'created_at': str(user_response.user.created_at),
-                        'full_name': user_response.user.user_metadata.get('full_name')
-                    }
-                    return UserProfile(**basic_profile_data)
-                 else:
-                    print(f"Supabase DB Error fetching profile for {user_id}: {db_e}")
-                    traceback.print_exc()
-                    return None # Indicate error fetching profile
-            except Exception as profile_e:
-                 print(f"Unexpected Error fetching profile for {user_id}: {profile_e}")
-                 traceback.print_exc()
-                 return None
+        user_id = identity['id']
+        cached = get_cached_profile(user_id)
+        if cached:
+            return cached
+        try:
+            # Fetch profile using service client for potentially bypassing RLS if needed
+            profile = await get_profile(user_id)
+            if profile:
+                cache_profile(profile)
+                return profile
+            else:
+                # Profile might not exist yet
+                print(f"WARN: Profile not found for user_id: {user_id} (using service client)")
+                # Return basic info from token if profile missing
+                return _basic_profile_from_identity(identity)
+
+        except APIError as db_e:
+            print(f"Supabase DB Error fetching profile for {user_id}: {db_e}")
+            traceback.print_exc()
+            return None # Indicate error fetching profile
+        except Exception as profile_e:
+             print(f"Unexpected Error fetching profile for {user_id}: {profile_e}")
+             traceback.print_exc()
+             return None
 
-        else:
-            print(f"No user found for the provided token (get_user response invalid).")
-            return None
     except AuthApiError as e:
         # This specifically catches invalid/expired tokens
         print(f"Auth error getting user from token: {e}")
@@ -332,7 +351,8 @@ async def request_password_reset(forgot_password_data: UserForgotPassword) -> tu
     print(f"Attempting password reset for email: {forgot_password_data.email}")
 
     try:
-        await asyncio.to_thread(
+        await call_blocking(
+            'supabase_auth',
             supabase.auth.reset_password_for_email,
             email=forgot_password_data.email,
             options={'redirect_to': reset_redirect_url}
@@ -353,57 +373,79 @@ async def request_password_reset(forgot_password_data: UserForgotPassword) -> tu
 # --- End request_password_reset function ---
 
 
-# --- change_user_password function (No changes needed) ---
-async def change_user_password(access_token: str, password_data: UserPasswordChange) -> tuple[bool, str | None]:
+# --- Session-isolated password update (shared by change/reset flows) ---
+async def _set_password_for_token(access_token: str, new_password: str, user_id: str | None = None) -> str | None:
+    """
+    Sets a new password for the user owning `access_token` without touching the shared
+    supabase_anon session, so concurrent password operations cannot interfere.
+    Prefers the stateless admin API; falls back to a pooled, session-isolated client.
+    `user_id`: the token's owner when the route already confirmed the session with
+    Supabase Auth (require_auth(verify_remote=True)), saving a second lookup.
+    Returns the user id. Raises AuthApiError / AuthSessionMissingError for invalid tokens.
+    """
+    supabase_service = get_supabase_service_client()
+    if supabase_service:
+        if user_id is None:
+            # Confirm the session with Supabase Auth (stateless: the JWT is passed explicitly)
+            supabase_anon = get_supabase_anon_client()
+            user_response = await call_blocking('supabase_auth', supabase_anon.auth.get_user, jwt=access_token, idempotent=True)
+            if not user_response or not user_response.user:
+                raise AuthSessionMissingError()
+            user_id = user_response.user.id
+        await call_blocking(
+            'supabase_auth',
+            supabase_service.auth.admin.update_user_by_id,
+            user_id,
+            {'password': new_password},
+            idempotent=True, # Setting the same password twice is harmless
+        )
+        # Revoke the user's sessions so every device has to log in again
+        try:
+            await call_blocking('supabase_auth', supabase_service.auth.admin.sign_out, access_token, 'global', idempotent=True)
+        except Exception as signout_e:
+            print(f"WARN: Failed to revoke sessions after password update for {user_id}: {signout_e}")
+        return user_id
+
+    def isolated_flow() -> str | None:
+        with isolated_auth_client() as client:
+            client.auth.set_session(access_token=access_token, refresh_token="dummy_refresh_token_placeholder")
+            response = client.auth.update_user({'password': new_password})
+            try:
+                client.auth.sign_out()
+            except Exception as signout_e:
+                print(f"WARN: Failed to sign out isolated session after password update: {signout_e}")
+            return response.user.id if response.user else None
+
+    return await call_blocking('supabase_auth', isolated_flow)
+
+
+# --- change_user_password function (Session-isolated) ---
+async def change_user_password(access_token: str, password_data: UserPasswordChange,
+                               user_id: str | None = None) -> tuple[bool, str | None]:
     """
     Changes the password for the user associated with the access token.
-    Requires the user to be authenticated.
+    Requires the user to be authenticated; pass `user_id` if the session was already confirmed remotely.
     """
-    supabase_anon = get_supabase_anon_client()
-    if not supabase_anon:
+    if not get_supabase_anon_client():
         return False, "Password change failed: Server configuration error."
 
-    # Set the session for the anon client using the provided token
-    # This is necessary because update_user operates on the client's current session
-    try:
-        print(f"Setting session for password update...")
-        await asyncio.to_thread(
-             supabase_anon.auth.set_session,
-             access_token=access_token,
-             refresh_token="dummy_refresh_token_placeholder" # Refresh token isn't strictly needed for update_user
-        )
-        print(f"Session set for password update.")
-    except Exception as set_session_e:
-         print(f"Error setting session before password update: {set_session_e}")
-         # Check if it's an invalid token error
-         if "invalid JWT" in str(set_session_e).lower() or "token is expired" in str(set_session_e).lower():
-              return False, "Your session has expired or is invalid. Please log in again."
-         return False, "Password change failed: Could not verify current session."
-
-    # Now attempt the update
     try:
-        print(f"Attempting password update for user associated with the client's session...")
-        response = await asyncio.to_thread(
-            supabase_anon.auth.update_user,
-            attributes={'password': password_data.new_password}
-            # Supabase implicitly requires current password validation via RLS or security settings,
-            # The `current_password` field from the model is for frontend validation.
-        )
+        print(f"Attempting password update for the user owning the provided token...")
+        user_id = await _set_password_for_token(access_token, password_data.new_password, user_id)
+        # Supabase implicitly requires current password validation via RLS or security settings,
+        # The `current_password` field from the model is for frontend validation.
 
-        if response.user:
-            print(f"Password updated successfully for user: {response.user.id}")
-            # Sign out after successful password change for security
-            try:
-                await asyncio.to_thread(supabase_anon.auth.sign_out)
-                print("User signed out after password change.")
-            except Exception as signout_e:
-                print(f"WARN: Failed to sign out user after password change: {signout_e}")
+        if user_id:
+            print(f"Password updated successfully for user: {user_id}")
             return True, "Password updated successfully. Please log in again for security."
         else:
             print(f"WARN: Supabase password update response did not contain user object.")
             # Assume success if no error, but recommend re-login
             return True, "Password update processed. Please log in again."
 
+    except AuthSessionMissingError as e:
+        print(f"Session missing during password change: {e}")
+        return False, "Your session has expired or is invalid. Please log in again."
     except AuthApiError as e:
         print(f"Supabase Auth Error during password change: {e}")
         error_message_lower = str(e.message).lower() if e.message else ""
@@ -414,7 +456,7 @@ async def change_user_password(access_token: str, password_data: UserPasswordCha
              return False, "New password must be at least 6 characters long."
         elif "token is expired" in error_message_lower or "invalid jwt" in error_message_lower:
              return False, "Your session has expired. Please log in again to change your password."
-        elif "user not found" in error_message_lower: # Should not happen if session was set
+        elif "user not found" in error_message_lower:
              return False, "Password change failed: User not found."
         # Check for specific error related to incorrect current password if Supabase provides one
         # elif "incorrect password" in error_message_lower: # Hypothetical check
@@ -424,22 +466,17 @@ async def change_user_password(access_token: str, password_data: UserPasswordCha
         print(f"Unexpected Error during password change: {type(e).__name__} - {e}")
         traceback.print_exc()
         return False, "An unexpected error occurred during password change."
-    finally:
-        # Attempt to clear the potentially temporary session from the client instance
-        try:
-            await asyncio.to_thread(supabase_anon.auth.sign_out)
-        except:
-            pass # Ignore errors during cleanup signout
 # --- End change_user_password function ---
 
 
-# --- reset_user_password function (No changes needed) ---
-async def reset_user_password(access_token: str, reset_data: UserResetPassword) -> tuple[bool, str | None]:
+# --- reset_user_password function (Session-isolated) ---
+async def reset_user_password(access_token: str, reset_data: UserResetPassword,
+                              user_id: str | None = None) -> tuple[bool, str | None]:
     """
     Updates the user's password using the temporary access token from a password reset link.
+    Pass `user_id` if the session was already confirmed remotely.
     """
-    supabase = get_supabase_anon_client()
-    if not supabase:
+    if not get_supabase_anon_client():
         return False, "Password reset failed: Server configuration error."
 
     if not access_token:
@@ -447,28 +484,10 @@ async def reset_user_password(access_token: str, reset_data: UserResetPassword)
 
     try:
         print(f"Attempting password reset confirmation with new password...")
-        # Set the temporary session using the token from the reset link
-        await asyncio.to_thread(
-            supabase.auth.set_session,
-            access_token=access_token,
-            refresh_token="dummy_placeholder" # Refresh token isn't usually provided/needed here
-        )
-        print("Temporary session set successfully for reset.")
-
-        # Update the user's password
-        response = await asyncio.to_thread(
-            supabase.auth.update_user,
-            attributes={'password': reset_data.new_password}
-        )
+        user_id = await _set_password_for_token(access_token, reset_data.new_password, user_id)
 
-        if response.user:
-            print(f"Password reset successfully for user: {response.user.id}")
-            # Sign out the temporary session
-            try:
-                await asyncio.to_thread(supabase.auth.sign_out)
-                print("Temporary session signed out after password reset.")
-            except Exception as signout_e:
-                print(f"WARN: Failed to sign out temporary session after password reset: {signout_e}")
+        if user_id:
+            print(f"Password reset successfully for user: {user_id}")
             return True, "Password has been reset successfully. Please log in with your new password."
         else:
             print(f"WARN: Supabase password reset response did not contain user object.")
@@ -476,8 +495,8 @@ async def reset_user_password(access_token: str, reset_data: UserResetPassword)
 
     except (AuthApiError, AuthSessionMissingError) as e:
         print(f"Supabase Auth Error during password reset confirmation: {e}")
-        error_message_lower = str(e.message).lower() if e.message else ""
-        if "invalid jwt" in error_message_lower or "token is expired" in error_message_lower or "invalid refresh token" in error_message_lower:
+        error_message_lower = str(e.message).lower() if getattr(e, 'message', None) else ""
+        if isinstance(e, AuthSessionMissingError) or "invalid jwt" in error_message_lower or "token is expired" in error_message_lower or "invalid refresh token" in error_message_lower:
              return False, "Password reset failed. The reset link has expired or is invalid. Please request a new one."
         elif "password should be at least 6 characters" in error_message_lower:
              return False, "New password must be at least 6 characters long."
@@ -486,10 +505,4 @@ async def reset_user_password(access_token: str, reset_data: UserResetPassword)
         print(f"Unexpected Error during password reset confirmation: {type(e).__name__} - {e}")
         traceback.print_exc()
         return False, "An unexpected error occurred during password reset."
-    finally:
-        # Attempt to clear the potentially temporary session from the client instance
-        try:
-            await asyncio.to_thread(supabase.auth.sign_out)
-        except:
-            pass # Ignore errors during cleanup signout
 # --- End reset_user_password function ---
\ No newline at end of file
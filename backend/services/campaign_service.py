@@ -0,0 +1,205 @@
+# backend/services/campaign_service.py
+"""
+Bulk email campaigns to the whole customer base via SendGrid personalizations.
+
+A campaign renders one notification template (subject/text/html) once, then
+streams recipients from 'profiles' in keyset pages and sends them in batches
+of up to CAMPAIGN_BATCH_SIZE personalizations per mail/send call, each with
+its own To and substitutions (-name- / -name_html-), so no customer sees
+another's address. API calls are paced by a token bucket and the checkpoint
+(last profile id sent) is saved after every accepted batch: restarting a
+campaign with the same id resumes where it stopped. Delivery is at least
+once - a crash between a send and its checkpoint re-sends that one batch.
+"""
+import asyncio
+import random
+import threading
+import time
+from html import escape
+
+from ..config import config
+from ..database.campaign_store import create_campaign_store
+from ..database.profile_repository import ProfileContact, iter_profile_contacts
+from ..utils.rate_limit import TokenBucket
+from ..utils.resilience import call_blocking, is_transient
+from .notification_service import post_sendgrid_mail
+from .notification_templates import RenderedMessage, render_notification
+
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+_store = None
+_sendgrid_rate_limiter = TokenBucket(config.SENDGRID_REQUESTS_PER_SECOND, config.SENDGRID_REQUESTS_PER_SECOND)
+_running: dict[str, dict] = {} # campaign_id -> live progress of campaigns running in this process
+_running_lock = threading.Lock()
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        _store = create_campaign_store()
+    return _store
+
+
+def _first_name(full_name: str | None) -> str:
+    return full_name.split()[0] if full_name and full_name.strip() else 'there'
+
+
+def _payload(campaign_id: str, message: RenderedMessage, batch: list[ProfileContact]) -> dict:
+    return {
+        'from': {'email': config.SENDGRID_FROM_EMAIL, 'name': config.COMPANY_NAME},
+        'subject': message.subject,
+        'content': [{'type': 'text/plain', 'value': message.text}, {'type': 'text/html', 'value': message.html}],
+        'personalizations': [
+            {
+                'to': [{'email': contact.email}],
+                'substitutions': {'-name-': _first_name(contact.full_name), '-name_html-': escape(_first_name(contact.full_name))},
+            }
+            for contact in batch
+        ],
+        'custom_args': {'campaign_id': campaign_id},
+        'categories': ['campaign'],
+    }
+
+
+async def _send_batch(campaign_id: str, message: RenderedMessage, batch: list[ProfileContact]) -> None:
+    """One mail/send call; transient failures (429/5xx/timeouts) are retried with backoff - SendGrid did not accept them."""
+    payload = _payload(campaign_id, message, batch)
+    for attempt in range(1, config.CAMPAIGN_MAX_BATCH_ATTEMPTS + 1):
+        await _sendgrid_rate_limiter.acquire()
+        try:
+            await call_blocking('sendgrid', post_sendgrid_mail, payload)
+            return
+        except Exception as e:
+            if attempt == config.CAMPAIGN_MAX_BATCH_ATTEMPTS or not is_transient(e):
+                raise
+            delay = min(60.0, 2 ** attempt) * random.uniform(0.8, 1.2)
+            print(f"WARN: Campaign '{campaign_id}' batch failed ({type(e).__name__}); retry {attempt} in {delay:.0f}s.")
+            await asyncio.sleep(delay)
+
+
+def _claim(campaign_id: str) -> dict | None:
+    """Registers a run of the campaign in this process; None if one is already running."""
+    with _running_lock:
+        if campaign_id in _running:
+            return None
+        progress = _running[campaign_id] = {'sent_this_run': 0, 'started': time.perf_counter()}
+        return progress
+
+
+async def _run_claimed(campaign_id: str, template: str, context: dict | None, progress: dict) -> dict:
+    try:
+        return await _send_campaign(campaign_id, template, context, progress)
+    finally:
+        with _running_lock:
+            _running.pop(campaign_id, None)
+
+
+async def run_campaign(campaign_id: str, template: str, context: dict | None = None) -> dict:
+    """
+    Sends `template` to every profile with an email, resuming from the saved checkpoint.
+    Returns the final checkpoint with this run's throughput. Raises if a batch cannot
+    be sent (progress is kept) or the campaign is already running in this process.
+    """
+    progress = _claim(campaign_id)
+    if progress is None:
+        raise RuntimeError(f"Campaign '{campaign_id}' is already running.")
+    return await _run_claimed(campaign_id, template, context, progress)
+
+
+async def _send_campaign(campaign_id: str, template: str, context: dict | None, progress: dict) -> dict:
+    if not config.SENDGRID_API_KEY or not config.SENDGRID_FROM_EMAIL:
+        raise RuntimeError("SendGrid API Key or From Email not configured.")
+    store = _get_store()
+    message = render_notification(template, **(context or {}))
+    batch_size = min(config.CAMPAIGN_BATCH_SIZE, SENDGRID_MAX_PERSONALIZATIONS)
+
+    checkpoint = await store.load(campaign_id)
+    if checkpoint and checkpoint['status'] == 'completed':
+        print(f"INFO: Campaign '{campaign_id}' already completed; nothing to send.")
+        return checkpoint
+    now = time.time()
+    checkpoint = checkpoint or {'campaign_id': campaign_id, 'sent': 0, 'skipped': 0, 'batches': 0, 'started_at': now}
+    checkpoint.update({'template': template, 'status': 'running', 'last_error': None, 'updated_at': now})
+    await store.save(checkpoint)
+    progress['started'] = time.perf_counter() # Throughput covers sending only, not the setup above
+    print(f"📤 Campaign '{campaign_id}' ({template}) starting after profile {checkpoint.get('last_profile_id') or '(beginning)'}.")
+
+    async def flush(batch: list[ProfileContact], last_id: str, skipped: int) -> None:
+        await _send_batch(campaign_id, message, batch)
+        checkpoint.update({
+            'last_profile_id': last_id,
+            'sent': checkpoint['sent'] + len(batch),
+            'skipped': checkpoint['skipped'] + skipped,
+            'batches': checkpoint['batches'] + 1,
+            'updated_at': time.time(),
+        })
+        await store.save(checkpoint)
+        progress['sent_this_run'] += len(batch)
+        elapsed = time.perf_counter() - progress['started']
+        print(f"INFO: Campaign '{campaign_id}': {progress['sent_this_run']} sent this run, {checkpoint['sent']} in total "
+              f"({progress['sent_this_run'] / elapsed:.0f}/s).")
+
+    batch: list[ProfileContact] = []
+    seen: set[str] = set() # Addresses in the current batch
+    skipped, last_id = 0, checkpoint.get('last_profile_id')
+    try:
+        async for contact in iter_profile_contacts(checkpoint.get('last_profile_id'), config.CAMPAIGN_PAGE_SIZE):
+            last_id = contact.id
+            email = (contact.email or '').strip().lower()
+            if not email or '@' not in email or email in seen:
+                skipped += 1
+                continue
+            seen.add(email)
+            batch.append(contact._replace(email=email))
+            if len(batch) == batch_size:
+                await flush(batch, last_id, skipped)
+                batch, seen, skipped = [], set(), 0
+        if batch:
+            await flush(batch, last_id, skipped)
+            skipped = 0
+        checkpoint.update({'status': 'completed', 'last_profile_id': last_id, 'skipped': checkpoint['skipped'] + skipped,
+                           'updated_at': time.time()})
+    except Exception as e:
+        checkpoint.update({'status': 'failed', 'last_error': f"{type(e).__name__}: {e}", 'updated_at': time.time()})
+        print(f"❌ Campaign '{campaign_id}' stopped: {checkpoint['last_error']} (resume by running it again).")
+        raise
+    finally:
+        await store.save(checkpoint)
+
+    elapsed = time.perf_counter() - progress['started']
+    checkpoint['sent_this_run'] = progress['sent_this_run'] # 'sent' also counts earlier runs of a resumed campaign
+    checkpoint['elapsed_seconds'] = round(elapsed, 3)
+    checkpoint['recipients_per_second'] = round(progress['sent_this_run'] / elapsed, 1) if elapsed else 0.0
+    print(f"✅ Campaign '{campaign_id}' completed: {progress['sent_this_run']} sent this run in {elapsed:.1f}s "
+          f"({checkpoint['recipients_per_second']}/s), {checkpoint['batches']} batches total.")
+    return checkpoint
+
+
+def start_campaign(campaign_id: str, template: str, context: dict | None = None) -> bool:
+    """Runs a campaign on a background thread. False if it is already running in this process."""
+    progress = _claim(campaign_id) # Claimed here so a second request is refused before the thread starts
+    if progress is None:
+        return False
+
+    def runner():
+        try:
+            asyncio.run(_run_claimed(campaign_id, template, context, progress))
+        except Exception as e:
+            print(f"❌ Campaign '{campaign_id}' did not complete: {type(e).__name__} - {e}")
+
+    threading.Thread(target=runner, name=f"campaign-{campaign_id}", daemon=True).start()
+    return True
+
+
+async def campaign_status(campaign_id: str) -> dict | None:
+    checkpoint = await _get_store().load(campaign_id)
+    if checkpoint is None:
+        return None
+    with _running_lock:
+        progress = dict(_running.get(campaign_id) or {})
+    if progress:
+        elapsed = time.perf_counter() - progress['started']
+        checkpoint['running_in_this_process'] = True
+        checkpoint['sent_this_run'] = progress['sent_this_run']
+        checkpoint['recipients_per_second'] = round(progress['sent_this_run'] / elapsed, 1) if elapsed else 0.0
+    return checkpoint
@@ -0,0 +1,196 @@
+# backend/services/delivery_status_service.py
+"""
+Delivery status log for outgoing notifications.
+
+Sends record an 'accepted' row per recipient (Twilio SID / SendGrid
+X-Message-Id), and the provider webhooks (api/notifications.py) report what
+happened next: delivered, bounced, failed, opened... Updates are merged in
+memory - per (provider, message_id, recipient) only the most advanced status
+is kept - and a background thread upserts them into 'notification_log' in
+batches, so a webhook request is parse + verify + dict update. Each batch
+first reads the stored statuses for its message ids and drops updates that
+would move a row backwards (e.g. a late 'sent' after 'delivered').
+
+Expected 'notification_log' table:
+    provider text, message_id text, recipient text,   -- primary key (all three)
+    channel text, status text, error text, event_at timestamptz, updated_at timestamptz
+"""
+import atexit
+import threading
+import traceback
+from datetime import datetime, timezone
+
+from ..config import config
+from ..database.async_db import run_query_sync, table
+
+LOG_TABLE = 'notification_log'
+
+# Later stages win over earlier ones when events arrive out of order
+_STATUS_RANK = {
+    'accepted': 1, 'queued': 1, 'scheduled': 1,
+    'sending': 2, 'sent': 2,
+    'deferred': 3,
+    'delivered': 5, 'undelivered': 5, 'failed': 5, 'bounced': 5, 'dropped': 5, 'canceled': 5,
+    'read': 6, 'opened': 6,
+    'clicked': 7,
+    'spam_reported': 8, 'unsubscribed': 8,
+}
+
+# SendGrid event types -> log status
+SENDGRID_EVENT_STATUS = {
+    'processed': 'accepted', 'deferred': 'deferred', 'delivered': 'delivered', 'bounce': 'bounced',
+    'dropped': 'dropped', 'open': 'opened', 'click': 'clicked', 'spamreport': 'spam_reported',
+    'unsubscribe': 'unsubscribed', 'group_unsubscribe': 'unsubscribed',
+}
+
+_lock = threading.Lock()
+_pending: dict[tuple[str, str, str], dict] = {}
+_flush_event = threading.Event()
+_flusher_thread: threading.Thread | None = None
+_stats = {'recorded': 0, 'merged': 0, 'rejected': 0, 'flushed': 0, 'stale': 0, 'flush_errors': 0}
+
+
+def _rank(status: str) -> int:
+    return _STATUS_RANK.get(status, 0)
+
+
+def _iso(value: datetime | float | None) -> str:
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    return (value or datetime.now(timezone.utc)).isoformat()
+
+
+def _merge_locked(row: dict) -> None:
+    key = (row['provider'], row['message_id'], row['recipient'])
+    current = _pending.get(key)
+    if current is None:
+        _pending[key] = row
+        return
+    _stats['merged'] += 1
+    if (_rank(row['status']), row['event_at']) >= (_rank(current['status']), current['event_at']):
+        row['channel'] = row['channel'] or current['channel']
+        _pending[key] = row
+
+
+def record_delivery_statuses(updates: list[dict]) -> bool:
+    """
+    Buffers status updates: dicts with provider, message_id, recipient, status and
+    optionally channel, error, event_at (datetime or epoch seconds). Returns False
+    without buffering anything if the buffer is full (webhooks answer 503 so the
+    provider retries later).
+    """
+    rows = [
+        {
+            'provider': u['provider'],
+            'message_id': str(u['message_id']),
+            'recipient': str(u['recipient']).strip().lower(),
+            'channel': u.get('channel'),
+            'status': u['status'],
+            'error': u.get('error'),
+            'event_at': _iso(u.get('event_at')),
+        }
+        for u in updates if u.get('message_id') and u.get('recipient') and u.get('status')
+    ]
+    with _lock:
+        if len(_pending) + len(rows) > config.DELIVERY_LOG_MAX_BUFFER:
+            _stats['rejected'] += len(rows)
+            return False
+        for row in rows:
+            _merge_locked(row)
+        _stats['recorded'] += len(rows)
+        should_flush = len(_pending) >= config.DELIVERY_LOG_BATCH_SIZE
+    if should_flush:
+        _flush_event.set()
+    return True
+
+
+def record_delivery_status(provider: str, message_id: str | None, recipient: str, channel: str, status: str,
+                           error: str | None = None) -> None:
+    """Single-update convenience for the send path; never raises."""
+    try:
+        record_delivery_statuses([{'provider': provider, 'message_id': message_id, 'recipient': recipient,
+                                   'channel': channel, 'status': status, 'error': error}])
+    except Exception as e:
+        print(f"WARN: Could not record delivery status: {type(e).__name__} - {e}")
+
+
+def _advancing(chunk: list[dict]) -> list[dict]:
+    """Drops updates older than what notification_log already holds; keeps the stored channel if the update has none."""
+    message_ids = sorted({row['message_id'] for row in chunk})
+    response = run_query_sync(
+        table(LOG_TABLE).select('provider,message_id,recipient,channel,status,event_at').in_('message_id', message_ids),
+        timeout=config.SUPABASE_DB_TIMEOUT_SECONDS,
+    )
+    stored = {(r['provider'], r['message_id'], r['recipient']): r for r in response.data or []}
+    rows = []
+    for row in chunk:
+        current = stored.get((row['provider'], row['message_id'], row['recipient']))
+        if current is not None:
+            if (_rank(row['status']), row['event_at']) < (_rank(current['status']), current['event_at'] or ''):
+                continue
+            row = {**row, 'channel': row['channel'] or current['channel']}
+        rows.append(row)
+    return rows
+
+
+def flush_delivery_statuses() -> int:
+    """Upserts buffered updates in batches. Returns rows written."""
+    with _lock:
+        if not _pending:
+            return 0
+        batch = list(_pending.values())
+        _pending.clear()
+
+    written = 0
+    size = config.DELIVERY_LOG_BATCH_SIZE
+    for start in range(0, len(batch), size):
+        chunk = batch[start:start + size]
+        now = _iso(None)
+        try:
+            rows = _advancing(chunk)
+            if rows:
+                run_query_sync(
+                    table(LOG_TABLE).upsert([{**row, 'updated_at': now} for row in rows], on_conflict='provider,message_id,recipient'),
+                    timeout=config.SUPABASE_DB_TIMEOUT_SECONDS * 2,
+                )
+            written += len(rows)
+            with _lock:
+                _stats['stale'] += len(chunk) - len(rows)
+        except Exception as e:
+            print(f"❌ ERROR flushing delivery statuses: {type(e).__name__} - {e}")
+            with _lock:
+                _stats['flush_errors'] += 1
+                # Re-merge what was not written; newer updates that arrived meanwhile still win
+                for row in batch[start:]:
+                    if len(_pending) >= config.DELIVERY_LOG_MAX_BUFFER:
+                        break
+                    _merge_locked(row)
+            break
+    with _lock:
+        _stats['flushed'] += written
+    return written
+
+
+def _flusher_loop() -> None:
+    while True:
+        _flush_event.wait(timeout=config.DELIVERY_LOG_FLUSH_INTERVAL_SECONDS)
+        _flush_event.clear()
+        try:
+            flush_delivery_statuses()
+        except Exception:
+            traceback.print_exc()
+
+
+def init_delivery_status_log() -> None:
+    """Starts the background flusher. Safe to call more than once."""
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    _flusher_thread = threading.Thread(target=_flusher_loop, name='delivery-status-flusher', daemon=True)
+    _flusher_thread.start()
+    atexit.register(flush_delivery_statuses)
+
+
+def delivery_status_stats() -> dict:
+    with _lock:
+        return {**_stats, 'buffered': len(_pending)}
@@ -0,0 +1,405 @@
+# backend/services/inventory_import_service.py
+"""
+Bulk supplier inventory and price-list imports into the 'parts' catalog.
+
+A supplier file (CSV, or XLSX when openpyxl is installed) is streamed row by
+row, never loaded whole, and each row is validated into a compact ImportRow.
+Valid rows are grouped into chunks of INVENTORY_IMPORT_CHUNK_SIZE. For each
+chunk a worker reads the catalog rows with those SKUs, compares the supplied
+columns and upserts only the rows that differ, in one statement (unknown SKUs
+are inserted when the file carries a name, rejected otherwise). At most
+INVENTORY_IMPORT_CONCURRENCY chunks run at once and the reader waits while
+twice that many are outstanding, so memory stays flat whatever the file size.
+
+Chunks finish out of order, so the checkpoint only advances over the
+contiguous run of finished chunks: the last file line up to which everything
+is applied or rejected. Running the same import again resumes after it; work
+past the checkpoint is redone, which the diff turns into no-ops. Updated and
+inserted rows are counted when their chunk is written (a redone chunk finds
+nothing left to change), rows and rejects over the checkpointed lines.
+Rejected rows are written to '<file>.rejects.csv' (line, sku, reason).
+
+Workers' parts search indexes pick the changes up on their next refresh
+(updated_at). Run: python -m backend.scripts.import_supplier_inventory <file>
+"""
+import concurrent.futures
+import csv
+import functools
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Iterator, NamedTuple
+
+from ..config import config
+from ..database.import_store import create_import_store
+from ..database.part_repository import PartRecord, get_parts_by_sku, upsert_parts_by_sku
+from ..utils.resilience import is_transient
+
+try:
+    import openpyxl # Optional: pip install openpyxl (XLSX files)
+except ImportError:
+    openpyxl = None
+
+UPDATE_FIELDS = ('name', 'brand', 'category', 'part_number', 'price', 'stock')
+# Catalog column -> accepted (normalized) header names
+HEADER_ALIASES = {
+    'sku': ('sku', 'item_sku', 'supplier_sku', 'part_sku'),
+    'name': ('name', 'part_name', 'description', 'title'),
+    'brand': ('brand', 'manufacturer', 'make'),
+    'category': ('category',),
+    'part_number': ('part_number', 'part_no', 'mpn', 'mfr_part_number'),
+    'price': ('price', 'unit_price', 'list_price'),
+    'stock': ('stock', 'qty', 'quantity', 'on_hand', 'qty_on_hand'),
+}
+MAX_SKU_LENGTH = 64
+MAX_TEXT_LENGTH = 200
+MAX_PRICE = Decimal('1000000')
+CENTS = Decimal('0.01')
+FINGERPRINT_BYTES = 1 << 20 # Hashed from each end of the file
+_HEADER_RE = re.compile(r'[^0-9a-z]+')
+
+
+class ImportRow(NamedTuple):
+    """One validated file row. None: column absent or cell blank - keep the catalog value."""
+    line: int
+    sku: str
+    name: str | None
+    brand: str | None
+    category: str | None
+    part_number: str | None
+    price: Decimal | None
+    stock: int | None
+
+
+class RowRejected(ValueError):
+    """A file row failed validation; the message is the reason written to the rejects file."""
+
+
+class _Chunk(NamedTuple):
+    seq: int
+    last_line: int # Every file line up to here is in this chunk or an earlier one
+    rows: list[ImportRow]
+    rejected: int # Rows of this chunk's line range that failed validation
+
+
+# --- Reading & Validation ---
+def _csv_rows(path: str) -> Iterator[tuple[int, tuple]]:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        for cells in reader:
+            yield reader.line_num, tuple(cells)
+
+
+def _xlsx_rows(path: str) -> Iterator[tuple[int, tuple]]:
+    if openpyxl is None:
+        raise RuntimeError("XLSX imports need the openpyxl package (pip install openpyxl).")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True) # read_only: streams the sheet XML
+    try:
+        yield from enumerate(workbook.active.iter_rows(values_only=True), start=1)
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(path: str) -> Iterator[tuple[int, tuple]]:
+    """(line number, cells) for every non-blank row of the first sheet/the CSV, header included."""
+    rows = _xlsx_rows(path) if path.lower().endswith(('.xlsx', '.xlsm')) else _csv_rows(path)
+    for line, cells in rows:
+        if any(cell is not None and str(cell).strip() for cell in cells):
+            yield line, cells
+
+
+def column_map(header: tuple) -> dict[str, int]:
+    """Catalog column -> cell index. Raises ValueError without a SKU column or any column to update."""
+    aliases = {alias: field for field, names in HEADER_ALIASES.items() for alias in names}
+    columns = {}
+    for i, cell in enumerate(header):
+        field = aliases.get(_HEADER_RE.sub('_', str(cell or '').strip().lower()).strip('_'))
+        if field and field not in columns:
+            columns[field] = i
+    if 'sku' not in columns:
+        raise ValueError(f"No SKU column in header {list(header)}")
+    if not any(field in columns for field in UPDATE_FIELDS):
+        raise ValueError(f"No columns to import in header {list(header)} (expected some of {', '.join(UPDATE_FIELDS)})")
+    return columns
+
+
+def _text(value: Any, field: str, max_length: int = MAX_TEXT_LENGTH) -> str | None:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value) # XLSX numeric cells: 12345.0 -> '12345'
+    text = str(value).strip() if value is not None else ''
+    if len(text) > max_length:
+        raise RowRejected(f"{field} longer than {max_length} characters")
+    return text or None
+
+
+def _price(value: Any) -> Decimal | None:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        price = Decimal(str(value).strip().lstrip('$').replace(',', ''))
+    except InvalidOperation:
+        raise RowRejected(f"invalid price '{value}'") from None
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise RowRejected(f"price out of range '{value}'")
+    return price.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _stock(value: Any) -> int | None:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = Decimal(str(value).strip().replace(',', ''))
+    except InvalidOperation:
+        raise RowRejected(f"invalid stock '{value}'") from None
+    if not number.is_finite() or number != number.to_integral_value() or number < 0:
+        raise RowRejected(f"stock must be a whole number >= 0, got '{value}'")
+    return int(number)
+
+
+def parse_row(line: int, cells: tuple, columns: dict[str, int]) -> ImportRow:
+    """Validates one data row. Raises RowRejected."""
+    def cell(field: str) -> Any:
+        i = columns.get(field)
+        return cells[i] if i is not None and i < len(cells) else None
+
+    sku = _text(cell('sku'), 'sku', MAX_SKU_LENGTH)
+    if not sku:
+        raise RowRejected("missing sku")
+    row = ImportRow(line, sku, _text(cell('name'), 'name'), _text(cell('brand'), 'brand'),
+                    _text(cell('category'), 'category'), _text(cell('part_number'), 'part_number'),
+                    _price(cell('price')), _stock(cell('stock')))
+    if all(value is None for value in row[2:]):
+        raise RowRejected("no values to import")
+    return row
+
+
+# --- Catalog Diff ---
+def _catalog_value(part: PartRecord, field: str) -> Any:
+    value = getattr(part, field)
+    if field == 'price' and value is not None:
+        return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+    return value
+
+
+def diff_chunk(rows: list[ImportRow], fields: tuple[str, ...]) -> tuple[list[dict], dict, list[tuple[ImportRow, str]]]:
+    """
+    Compares rows with the catalog. Returns the upsert payload (changed and new
+    rows only, all carrying sku + `fields`; blank cells keep the catalog value),
+    counts (updated/inserted) and rows rejected for unknown SKUs.
+    """
+    current = {part.sku: part for part in get_parts_by_sku([row.sku for row in rows],
+                                                           timeout=config.SUPABASE_DB_TIMEOUT_SECONDS * 3)}
+    upserts, rejects = [], []
+    counts = {'updated': 0, 'inserted': 0}
+    for row in rows:
+        part = current.get(row.sku)
+        if part is None:
+            if row.name is None:
+                rejects.append((row, 'unknown sku' if 'name' not in fields else 'new sku without a name'))
+                continue
+            values = {field: getattr(row, field) for field in fields}
+            if 'stock' in values and values['stock'] is None:
+                values['stock'] = 0
+            counts['inserted'] += 1
+        else:
+            values = {field: getattr(row, field) if getattr(row, field) is not None else _catalog_value(part, field)
+                      for field in fields}
+            if all(values[field] == _catalog_value(part, field) for field in fields):
+                continue
+            counts['updated'] += 1
+        upserts.append({'sku': row.sku, **{f: float(v) if isinstance(v, Decimal) else v for f, v in values.items()}})
+    return upserts, counts, rejects
+
+
+def _apply_chunk(chunk: _Chunk, fields: tuple[str, ...]) -> tuple[dict, list[tuple[ImportRow, str]]]:
+    """Diff + upsert of one chunk; transient failures are retried (the diff makes a retry idempotent)."""
+    for attempt in range(1, config.INVENTORY_IMPORT_MAX_CHUNK_ATTEMPTS + 1):
+        try:
+            upserts, counts, rejects = diff_chunk(chunk.rows, fields) if chunk.rows else ([], {}, [])
+            upsert_parts_by_sku(upserts, timeout=config.SUPABASE_DB_TIMEOUT_SECONDS * 3)
+            return counts, rejects
+        except Exception as e:
+            if attempt == config.INVENTORY_IMPORT_MAX_CHUNK_ATTEMPTS or not is_transient(e):
+                raise
+            delay = min(30.0, 2 ** attempt) * random.uniform(0.8, 1.2)
+            print(f"WARN: Import chunk ending at line {chunk.last_line} failed ({type(e).__name__}); retry {attempt} in {delay:.0f}s.")
+            time.sleep(delay)
+
+
+# --- Rejects File ---
+class _RejectsFile:
+    """'<file>.rejects.csv'. On resume, keeps only lines up to the checkpoint (later ones are re-validated)."""
+
+    def __init__(self, path: str, keep_through_line: int):
+        kept = []
+        if keep_through_line and os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                kept = [row for row in csv.reader(f) if row and row[0].isdigit() and int(row[0]) <= keep_through_line]
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(('line', 'sku', 'reason'))
+        self._writer.writerows(kept)
+
+    def write(self, line: int, sku: Any, reason: str) -> None:
+        self._writer.writerow((line, '' if sku is None else sku, reason))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def file_fingerprint(path: str) -> str:
+    """Size plus a hash of the first and last MiB: cheap, and changes if the supplier re-exports the file."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return f"{size}-{digest.hexdigest()[:24]}"
+
+
+# --- Import Run ---
+def run_import(path: str, import_id: str | None = None, restart: bool = False) -> dict:
+    """
+    Imports `path` into the catalog, resuming a previous run with the same
+    `import_id` (default: file name + fingerprint) unless `restart`. Returns the
+    final checkpoint with this run's throughput. Raises if a chunk cannot be
+    applied or the file does not match the checkpoint; progress is kept.
+    """
+    fingerprint = file_fingerprint(path)
+    import_id = import_id or f"{os.path.basename(path)}:{fingerprint}"
+    store = create_import_store()
+    checkpoint = None if restart else store.load(import_id)
+    if checkpoint and checkpoint['fingerprint'] != fingerprint:
+        raise ValueError(f"Import '{import_id}' was started with a different file; use another import id or restart.")
+    if checkpoint and checkpoint['status'] == 'completed':
+        print(f"INFO: Import '{import_id}' already completed; nothing to do.")
+        return checkpoint
+    now = time.time()
+    checkpoint = checkpoint or {'import_id': import_id, 'source': os.path.basename(path), 'fingerprint': fingerprint,
+                                'last_line': 0, 'row_count': 0, 'unchanged': 0, 'updated': 0, 'inserted': 0, 'rejected': 0,
+                                'elapsed_seconds': 0.0, 'started_at': now}
+    checkpoint.update({'status': 'running', 'last_error': None, 'updated_at': now})
+    store.save(checkpoint)
+    resume_after = checkpoint['last_line']
+    rejects = _RejectsFile(f"{path}.rejects.csv", resume_after)
+    print(f"📥 Import '{import_id}' starting after line {resume_after or '(beginning)'}.")
+
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(config.INVENTORY_IMPORT_CONCURRENCY * 2) # Chunks submitted but not finished
+    finished: dict[int, tuple[_Chunk, int]] = {} # seq -> (chunk, rejected), until every earlier chunk has finished
+    failures: list[BaseException] = []
+    progress = {'next_seq': 0, 'rows': 0, 'started': time.perf_counter()}
+
+    def on_done(chunk: _Chunk, future: concurrent.futures.Future) -> None:
+        slots.release()
+        try:
+            counts, unknown = future.result()
+            with lock:
+                for row, reason in unknown:
+                    rejects.write(row.line, row.sku, reason)
+                for key, value in counts.items():
+                    checkpoint[key] += value
+                finished[chunk.seq] = (chunk, chunk.rejected + len(unknown))
+                advanced = False
+                while progress['next_seq'] in finished:
+                    done, rejected = finished.pop(progress['next_seq'])
+                    checkpoint['row_count'] += len(done.rows) + done.rejected
+                    checkpoint['rejected'] += rejected
+                    checkpoint['last_line'] = done.last_line
+                    progress['rows'] += len(done.rows) + done.rejected
+                    progress['next_seq'] += 1
+                    advanced = True
+                if advanced:
+                    rejects.flush()
+                    checkpoint['updated_at'] = time.time()
+                    store.save(checkpoint)
+        except BaseException as e:
+            with lock:
+                failures.append(e)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.INVENTORY_IMPORT_CONCURRENCY,
+                                                     thread_name_prefix='inventory-import')
+    batch: list[ImportRow] = []
+    batch_rejected, seq, line = 0, 0, 0
+    seen: set[int] = set() # hash(sku) of valid rows so far: flat memory, and a false duplicate is vanishingly unlikely
+    last_report = time.monotonic()
+
+    def submit(last_line: int) -> None:
+        nonlocal batch, batch_rejected, seq
+        slots.acquire() # Back-pressure: the reader waits for the database
+        chunk = _Chunk(seq, last_line, batch, batch_rejected)
+        executor.submit(_apply_chunk, chunk, fields).add_done_callback(functools.partial(on_done, chunk))
+        batch, batch_rejected, seq = [], 0, seq + 1
+
+    try:
+        rows = iter_file_rows(path)
+        header_line, header = next(rows, (0, ()))
+        columns = column_map(header)
+        fields = tuple(field for field in UPDATE_FIELDS if field in columns)
+        line = header_line
+        for line, cells in rows:
+            if failures:
+                break
+            try:
+                row = parse_row(line, cells, columns)
+                if hash(row.sku) in seen:
+                    raise RowRejected("duplicate sku (first row applies)")
+                seen.add(hash(row.sku))
+            except RowRejected as e:
+                if line > resume_after:
+                    sku_index = columns['sku']
+                    with lock:
+                        rejects.write(line, cells[sku_index] if sku_index < len(cells) else None, str(e))
+                    batch_rejected += 1
+                continue
+            if line <= resume_after:
+                continue # Applied by an earlier run; parsed only to know its SKUs
+            batch.append(row)
+            if len(batch) >= config.INVENTORY_IMPORT_CHUNK_SIZE:
+                submit(line)
+            if time.monotonic() - last_report >= config.INVENTORY_IMPORT_PROGRESS_SECONDS:
+                last_report = time.monotonic()
+                with lock:
+                    rate = progress['rows'] / (time.perf_counter() - progress['started'])
+                    print(f"INFO: Import '{import_id}': through line {checkpoint['last_line']} ({rate:.0f} rows/s), "
+                          f"{checkpoint['updated']} updated, {checkpoint['inserted']} inserted, {checkpoint['rejected']} rejected.")
+        if not failures and line > resume_after:
+            submit(line) # The rest, possibly only rejected rows: moves the checkpoint to the end of the file
+    except BaseException as e:
+        with lock:
+            failures.insert(0, e)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=bool(failures))
+
+    elapsed = time.perf_counter() - progress['started']
+    checkpoint['elapsed_seconds'] = round(checkpoint['elapsed_seconds'] + elapsed, 3)
+    checkpoint['updated_at'] = time.time()
+    if failures:
+        error = failures[0]
+        checkpoint.update({'status': 'failed', 'last_error': f"{type(error).__name__}: {error}"})
+        store.save(checkpoint)
+        rejects.close()
+        print(f"❌ Import '{import_id}' stopped at line {checkpoint['last_line']}: {checkpoint['last_error']} "
+              f"(resume by running it again).")
+        raise error
+    checkpoint['status'] = 'completed'
+    checkpoint['unchanged'] = checkpoint['row_count'] - checkpoint['updated'] - checkpoint['inserted'] - checkpoint['rejected']
+    store.save(checkpoint)
+    rejects.close()
+
+    report = {**checkpoint, 'resumed_after_line': resume_after, 'rows_this_run': progress['rows'],
+              'rows_per_second': round(progress['rows'] / elapsed, 1) if elapsed else 0.0, 'rejects_path': rejects.path}
+    print(f"✅ Import '{import_id}' completed: {progress['rows']} rows this run in {elapsed:.1f}s "
+          f"({report['rows_per_second']} rows/s); {checkpoint['updated']} updated, {checkpoint['inserted']} inserted, "
+          f"{checkpoint['unchanged']} unchanged, {checkpoint['rejected']} rejected (see {rejects.path}).")
+    return report
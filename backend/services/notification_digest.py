@@ -0,0 +1,129 @@
+# backend/services/notification_digest.py
+"""
+Coalesces bursts of admin notifications into digests.
+
+The first notification of a category goes out immediately and opens a window
+of ADMIN_DIGEST_WINDOW_SECONDS. Further notifications of that category inside
+the window are held, and when it closes they go out as one digest per channel
+(count plus the most frequent items); if the burst continues, a new window
+opens. Urgent notifications bypass the coalescer entirely.
+
+Held notifications live in memory until their window closes; they are flushed
+at interpreter exit, but a hard crash loses at most one window's worth.
+"""
+import asyncio
+import threading
+from collections import Counter
+from html import escape
+from typing import Awaitable, Callable
+
+# send(subject, body, html_body)
+SendFn = Callable[[str, str, str | None], Awaitable[None]]
+
+_ITEM_PREVIEW_CHARS = 200
+
+
+class _Window:
+    __slots__ = ('events', 'timer')
+
+    def __init__(self):
+        self.events: list[tuple[str, str]] = [] # Held (subject, body) pairs
+        self.timer: threading.Timer | None = None
+
+
+class DigestCoalescer:
+    def __init__(self, send: SendFn, window_seconds: float, top_items: int, urgent_categories: set[str]):
+        self.send = send
+        self.window_seconds = window_seconds
+        self.top_items = top_items
+        self.urgent_categories = urgent_categories
+        self._lock = threading.Lock()
+        self._windows: dict[str, _Window] = {}
+        self.counters = {'received': 0, 'sent_immediately': 0, 'urgent': 0, 'coalesced': 0, 'digests': 0}
+
+    async def submit(self, category: str, subject: str, body: str, html_body: str | None = None, urgent: bool = False) -> None:
+        if urgent or category in self.urgent_categories or self.window_seconds <= 0:
+            self._count('received', 'urgent')
+            await self.send(subject, body, html_body)
+            return
+        with self._lock:
+            self.counters['received'] += 1
+            window = self._windows.get(category)
+            if window is not None:
+                window.events.append((subject, body))
+                self.counters['coalesced'] += 1
+                return
+            self._open_window(category)
+            self.counters['sent_immediately'] += 1
+        await self.send(subject, body, html_body)
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self.counters[key] += 1
+
+    def _open_window(self, category: str) -> None:
+        # Caller holds self._lock
+        window = self._windows[category] = _Window()
+        window.timer = threading.Timer(self.window_seconds, self._close_window, args=(category,))
+        window.timer.daemon = True
+        window.timer.start()
+
+    def _close_window(self, category: str) -> None:
+        with self._lock:
+            window = self._windows.pop(category, None)
+            if window is None or not window.events:
+                return # Quiet window: the next notification goes out immediately
+            self._open_window(category) # Still bursting; keep coalescing
+            self.counters['digests'] += 1
+        self._send_digest(category, window.events)
+
+    def _send_digest(self, category: str, events: list[tuple[str, str]]) -> None:
+        subject, body, html_body = self.build_digest(category, events)
+        try:
+            asyncio.run(self.send(subject, body, html_body)) # Runs on the timer thread, outside any loop
+        except Exception as e:
+            print(f"❌ ERROR sending '{category}' admin digest: {type(e).__name__} - {e}")
+
+    def build_digest(self, category: str, events: list[tuple[str, str]]) -> tuple[str, str, str]:
+        """(subject, text body, html body) summarizing the held notifications of one window."""
+        total = len(events)
+        items = Counter(body.strip().splitlines()[0][:_ITEM_PREVIEW_CHARS] if body.strip() else subject for subject, body in events)
+        top = items.most_common(self.top_items)
+        remaining = len(items) - len(top)
+        window = f"{self.window_seconds:g}s"
+
+        subject = f"[Digest] {total} more '{category}' notification{'s' if total != 1 else ''} in the last {window}"
+        lines = [f"{total} more '{category}' notification(s) arrived within {window}.", ""]
+        lines += [f"- {text}" + (f" (x{n})" if n > 1 else "") for text, n in top]
+        if remaining:
+            lines.append(f"...and {remaining} other distinct item(s).")
+        html_items = ''.join(f"<li>{escape(text)}" + (f" <b>(x{n})</b>" if n > 1 else "") + "</li>" for text, n in top)
+        html_body = (f"<p>{total} more '<b>{escape(category)}</b>' notification(s) arrived within {window}.</p>"
+                     f"<ul>{html_items}</ul>" + (f"<p>...and {remaining} other distinct item(s).</p>" if remaining else ""))
+        return subject, '\n'.join(lines), html_body
+
+    def flush(self) -> None:
+        """Sends every held digest now (used at shutdown)."""
+        with self._lock:
+            windows = list(self._windows.items())
+            self._windows.clear()
+        for category, window in windows:
+            if window.timer is not None:
+                window.timer.cancel()
+            if window.events:
+                self._count('digests')
+                self._send_digest(category, window.events)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            held = sum(len(w.events) for w in self._windows.values())
+        return {
+            'window_seconds': self.window_seconds,
+            **counters,
+            'held': held,
+            'open_windows': len(self._windows),
+            # Each coalesced notification would have been its own email/SMS/WhatsApp; each digest replaces a batch
+            'notifications_saved': max(counters['coalesced'] - counters['digests'] - held, 0),
+        }
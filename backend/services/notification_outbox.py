@@ -0,0 +1,204 @@
+# backend/services/notification_outbox.py
+"""
+Notification outbox: handlers enqueue, a background worker pool delivers.
+
+enqueue_notification() only writes a row to the outbox store (see
+database/outbox_store), so a slow email or SMS provider never adds latency to
+the request that triggered the notification. A worker thread with its own
+event loop claims due messages per channel, delivers them with bounded
+per-channel concurrency, retries failures with exponential backoff and
+dead-letters a message after OUTBOX_MAX_ATTEMPTS.
+"""
+import asyncio
+import random
+import threading
+from typing import Awaitable, Callable
+
+from ..config import config
+from ..database.outbox_store import OutboxMessage, create_outbox_store
+
+CHANNELS = ('email', 'sms', 'whatsapp')
+
+# deliver(message) -> True if the provider accepted it
+DeliverFn = Callable[[OutboxMessage], Awaitable[bool]]
+
+_store = None
+_store_lock = threading.Lock()
+_worker: 'OutboxWorker | None' = None
+
+
+def get_outbox_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_outbox_store()
+    return _store
+
+
+async def enqueue_notification(channel: str, recipients: list[str], body: str, subject: str | None = None,
+                               html_body: str | None = None) -> int | None:
+    """Stores a notification for background delivery and returns its outbox id (None if it could not be stored)."""
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown notification channel '{channel}'")
+    try:
+        message_id = await get_outbox_store().enqueue(channel, recipients, subject, body, html_body)
+    except Exception as e:
+        print(f"❌ ERROR enqueueing {channel} notification: {type(e).__name__} - {e}")
+        return None
+    if _worker is not None:
+        _worker.wake(channel)
+    return message_id
+
+
+def _retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter, capped at OUTBOX_RETRY_MAX_SECONDS."""
+    delay = min(config.OUTBOX_RETRY_MAX_SECONDS, config.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    """Delivers outbox messages on a dedicated event loop thread."""
+
+    def __init__(self, store, deliver: DeliverFn, concurrency: dict[str, int]):
+        self.store = store
+        self.deliver = deliver
+        self.concurrency = concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakes: dict[str, asyncio.Event] = {} # One per channel, so waking one does not spin the others
+        self._thread: threading.Thread | None = None
+        self._in_flight = {channel: 0 for channel in concurrency}
+        self._counters_lock = threading.Lock()
+        self.counters = {channel: {'sent': 0, 'retried': 0, 'dead': 0} for channel in concurrency}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='notification-outbox', daemon=True)
+        self._thread.start()
+
+    def wake(self, channel: str | None = None) -> None:
+        """Thread-safe; lets the dispatcher of `channel` (every channel when None) pick up new messages now."""
+        loop, wakes = self._loop, self._wakes
+        if loop is None:
+            return
+        for name, event in wakes.items():
+            if channel is None or name == channel:
+                loop.call_soon_threadsafe(event.set)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        loop.run_until_complete(self._main())
+
+    async def _main(self) -> None:
+        self._wakes = {channel: asyncio.Event() for channel in self.concurrency}
+        await asyncio.gather(
+            *(self._dispatch(channel, limit) for channel, limit in self.concurrency.items()),
+            self._purge_loop(),
+        )
+
+    async def _dispatch(self, channel: str, limit: int) -> None:
+        """Claims as many due messages as there are free delivery slots for `channel`."""
+        wake = self._wakes[channel]
+        while True:
+            wake.clear() # Before claiming: a wake-up that arrives during the claim is kept
+            free = limit - self._in_flight[channel]
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await self.store.claim(channel, free, config.OUTBOX_LEASE_SECONDS)
+                except Exception as e:
+                    print(f"❌ ERROR claiming {channel} outbox messages: {type(e).__name__} - {e}")
+            for message in claimed:
+                self._in_flight[channel] += 1
+                asyncio.ensure_future(self._deliver(message))
+            if claimed and len(claimed) == free:
+                continue # There may be more due messages
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=config.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, message: OutboxMessage) -> None:
+        channel = message.channel
+        try:
+            try:
+                delivered = await self.deliver(message)
+                error = None if delivered else 'Provider did not accept the message'
+            except Exception as e:
+                delivered, error = False, f"{type(e).__name__}: {e}"
+
+            if delivered:
+                await self.store.mark_sent(message.id)
+                self._count(channel, 'sent')
+            elif message.attempts >= config.OUTBOX_MAX_ATTEMPTS:
+                await self.store.mark_dead(message.id, error)
+                self._count(channel, 'dead')
+                print(f"❌ Outbox message {message.id} ({channel}) dead-lettered after {message.attempts} attempts: {error}")
+            else:
+                delay = _retry_delay(message.attempts)
+                await self.store.mark_retry(message.id, error, delay)
+                self._count(channel, 'retried')
+                print(f"WARN: Outbox message {message.id} ({channel}) attempt {message.attempts} failed; retrying in {delay:.0f}s.")
+        except Exception as e:
+            # The lease expires and the message is claimed again
+            print(f"❌ ERROR settling outbox message {message.id}: {type(e).__name__} - {e}")
+        finally:
+            self._in_flight[channel] -= 1
+            self._wakes[channel].set()
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                purged = await self.store.purge_sent(config.OUTBOX_SENT_RETENTION_HOURS * 3600)
+                if purged:
+                    print(f"INFO: Purged {purged} delivered outbox messages.")
+            except Exception as e:
+                print(f"WARN: Could not purge outbox: {type(e).__name__} - {e}")
+            await asyncio.sleep(3600)
+
+    def _count(self, channel: str, key: str) -> None:
+        with self._counters_lock:
+            self.counters[channel][key] += 1
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = {channel: dict(c) for channel, c in self.counters.items()}
+        return {
+            'concurrency': dict(self.concurrency),
+            'in_flight': dict(self._in_flight),
+            'delivered': counters,
+        }
+
+
+def start_outbox_worker(deliver: DeliverFn) -> None:
+    """Starts the delivery worker (once per process). Messages enqueued before this are delivered once it runs."""
+    global _worker
+    if _worker is not None:
+        return
+    _worker = OutboxWorker(get_outbox_store(), deliver, {
+        'email': config.OUTBOX_EMAIL_CONCURRENCY,
+        'sms': config.OUTBOX_SMS_CONCURRENCY,
+        'whatsapp': config.OUTBOX_WHATSAPP_CONCURRENCY,
+    })
+    _worker.start()
+    print(f"✅ Notification outbox worker started ({config.NOTIFICATION_OUTBOX_BACKEND} store).")
+
+
+async def outbox_stats() -> dict:
+    return {
+        'backend': config.NOTIFICATION_OUTBOX_BACKEND,
+        'messages': await get_outbox_store().counts(),
+        'worker': _worker.stats() if _worker is not None else None,
+    }
+
+
+async def dead_letters(limit: int = 50) -> list[dict]:
+    return [message._asdict() for message in await get_outbox_store().dead_letters(limit)]
+
+
+async def requeue_dead_letter(message_id: int) -> bool:
+    requeued = await get_outbox_store().requeue(message_id)
+    if requeued and _worker is not None:
+        _worker.wake()
+    return requeued
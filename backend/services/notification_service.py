@@ -1,17 +1,27 @@
 import os
+import atexit
+import threading
 import certifi
+import httpx
 from twilio.rest import Client as TwilioClient
-from sendgrid import SendGridAPIClient
+from twilio.http.http_client import TwilioHttpClient
 from sendgrid.helpers.mail import Mail, To
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import asyncio
+from typing import NamedTuple
 
 # Import the config object (for API keys, hardcoded public info)
 from ..config import config
 # Import the function to fetch dynamic settings from DB
 from ..database.supabase_client import fetch_admin_notification_settings
+from ..database.outbox_store import OutboxMessage
+from ..utils.resilience import call_blocking
+from ..utils.rate_limit import TokenBucket, fan_out
+from ..utils.smtp_pool import SMTPPool
+from .notification_digest import DigestCoalescer
+from .notification_outbox import enqueue_notification, start_outbox_worker
+from .notification_templates import render_notification
+from .delivery_status_service import record_delivery_status
 
 # Fix SSL certificate verification error for SendGrid/Requests
 os.environ['SSL_CERT_FILE'] = certifi.where()
@@ -20,6 +30,101 @@ os.environ['SSL_CERT_FILE'] = certifi.where()
 def _get_valid_recipients(recipients: list[str | None]) -> list[str]:
     return [r.strip() for r in recipients if r and r.strip()]
 
+
+# --- Provider Clients (created on first use, reused so connections stay alive) ---
+_clients_lock = threading.Lock()
+_twilio_client: TwilioClient | None = None
+_sendgrid_http: httpx.Client | None = None
+_smtp_pool: SMTPPool | None = None
+
+
+class SendGridError(Exception):
+    """Non-2xx answer from the SendGrid API (status_code lets resilience spot 5xx/429)."""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"SendGrid returned HTTP {status_code}: {body[:200]}")
+        self.status_code = status_code
+
+
+def _get_twilio_client() -> TwilioClient:
+    """One Twilio client per process; its requests.Session keeps connections to api.twilio.com alive."""
+    global _twilio_client
+    if _twilio_client is None:
+        with _clients_lock:
+            if _twilio_client is None:
+                _twilio_client = TwilioClient(
+                    config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN,
+                    http_client=TwilioHttpClient(pool_connections=True, timeout=config.TWILIO_TIMEOUT_SECONDS),
+                )
+    return _twilio_client
+
+
+def _get_sendgrid_http() -> httpx.Client:
+    """
+    Keep-alive HTTP client for the SendGrid v3 API. SendGridAPIClient opens a new
+    urllib connection (TCP + TLS) per request, so only its Mail helper is used.
+    """
+    global _sendgrid_http
+    if _sendgrid_http is None:
+        with _clients_lock:
+            if _sendgrid_http is None:
+                _sendgrid_http = httpx.Client(
+                    base_url=config.SENDGRID_API_BASE_URL,
+                    headers={'Authorization': f"Bearer {config.SENDGRID_API_KEY}"},
+                    timeout=config.SENDGRID_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(max_keepalive_connections=config.EXECUTOR_EMAIL_WORKERS),
+                    verify=certifi.where(),
+                )
+    return _sendgrid_http
+
+
+def _get_smtp_pool() -> SMTPPool:
+    global _smtp_pool
+    if _smtp_pool is None:
+        with _clients_lock:
+            if _smtp_pool is None:
+                _smtp_pool = SMTPPool(
+                    config.SMTP_HOST, config.SMTP_PORT, config.GMAIL_SENDER_EMAIL, config.GMAIL_APP_PASSWORD,
+                    use_ssl=config.SMTP_USE_SSL,
+                    size=config.SMTP_POOL_SIZE,
+                    timeout=config.SMTP_TIMEOUT_SECONDS,
+                    max_idle_seconds=config.SMTP_POOL_MAX_IDLE_SECONDS,
+                    healthcheck_after_seconds=config.SMTP_POOL_HEALTHCHECK_SECONDS,
+                )
+    return _smtp_pool
+
+
+def post_sendgrid_mail(payload: dict) -> httpx.Response:
+    """POSTs a v3 mail/send payload on the shared keep-alive client. Blocking; raises SendGridError on non-2xx."""
+    response = _get_sendgrid_http().post('/mail/send', json=payload)
+    if response.status_code >= 400:
+        raise SendGridError(response.status_code, response.text)
+    return response
+
+
+def _sendgrid_send(message: Mail) -> httpx.Response:
+    return post_sendgrid_mail(message.get())
+
+
+def close_notification_clients() -> None:
+    """Closes pooled provider connections (SMTP sessions are QUIT politely)."""
+    global _twilio_client, _sendgrid_http, _smtp_pool
+    with _clients_lock:
+        if _sendgrid_http is not None:
+            _sendgrid_http.close()
+        if _smtp_pool is not None:
+            _smtp_pool.close()
+        _twilio_client, _sendgrid_http, _smtp_pool = None, None, None
+
+
+def notification_client_stats() -> dict:
+    return {
+        'twilio_client': _twilio_client is not None,
+        'sendgrid_client': _sendgrid_http is not None,
+        'smtp_pool': _smtp_pool.stats() if _smtp_pool is not None else None,
+        'twilio_rate_limiter': _twilio_rate_limiter.stats(),
+    }
+
 # --- Email Sending (SendGrid - uses config for keys/sender, hardcoded name) ---
 async def send_email_sendgrid(to_emails: list[str] | str, subject: str, html_content: str):
     if not config.SENDGRID_API_KEY or not config.SENDGRID_FROM_EMAIL: # Check config for keys
@@ -39,9 +144,11 @@ async def send_email_sendgrid(to_emails: list[str] | str, subject: str, html_con
     try:
         # ... (rest of sending logic) ...
         print(f"📤 Sending email via SendGrid to: {valid_recipients}")
-        sg = SendGridAPIClient(config.SENDGRID_API_KEY)
-        response = await asyncio.to_thread(sg.send, message)
+        response = await call_blocking('sendgrid', _sendgrid_send, message)
         print(f"✅ SendGrid Email sent! Status Code: {response.status_code}")
+        message_id = response.headers.get('X-Message-Id')
+        for email in valid_recipients:
+            record_delivery_status('sendgrid', message_id, email, 'email', 'accepted')
         return 200 <= response.status_code < 300
     except Exception as e:
         print(f"❌ SendGrid Error: {type(e).__name__} - {e}")
@@ -68,151 +175,187 @@ async def send_email_smtp(to_emails: list[str] | str, subject: str, body: str):
     try:
         # ... (rest of sending logic) ...
         print(f"📤 Sending email via SMTP to: {valid_recipients}")
-        def smtp_task():
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(config.GMAIL_SENDER_EMAIL, config.GMAIL_APP_PASSWORD)
-                server.sendmail(config.GMAIL_SENDER_EMAIL, valid_recipients, message.as_string())
-        await asyncio.to_thread(smtp_task)
+        await call_blocking('smtp', _get_smtp_pool().sendmail, config.GMAIL_SENDER_EMAIL, valid_recipients, message.as_string())
         print("✅ SMTP Email sent successfully!")
         return True
     except Exception as e:
         print(f"❌ SMTP Error: {e}")
         return False
 
-# --- SMS Sending (Twilio - uses config for keys/sender - unchanged) ---
-async def send_sms_twilio(to_numbers: list[str] | str, body: str):
+# --- SMS / WhatsApp Sending (Twilio, concurrent and rate-limited) ---
+
+class RecipientResult(NamedTuple):
+    recipient: str
+    ok: bool
+    sid: str | None = None
+    error: str | None = None
+
+
+# One bucket per Twilio account: every SMS/WhatsApp send in the process draws from it
+_twilio_rate_limiter = TokenBucket(config.TWILIO_MESSAGES_PER_SECOND, config.TWILIO_RATE_BURST)
+
+
+async def send_twilio_messages(channel: str, to_numbers: list[str] | str, body: str) -> list[RecipientResult]:
+    """
+    Sends `body` to every number over 'sms' or 'whatsapp', up to TWILIO_FANOUT_CONCURRENCY
+    at a time and within the account's TWILIO_MESSAGES_PER_SECOND. Returns one result per recipient.
+    """
     if not config.TWILIO_ACCOUNT_SID or not config.TWILIO_AUTH_TOKEN or not config.TWILIO_FROM_NUMBER:
         print("ERROR: Twilio credentials or From Number not configured.")
-        return False
-    # ... (rest of function unchanged) ...
+        return []
     valid_recipients = _get_valid_recipients([to_numbers] if isinstance(to_numbers, str) else to_numbers)
-    if not valid_recipients: return False
-    client = TwilioClient(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
-    success_count = 0
-    for number in valid_recipients:
-        try:
-            print(f"📲 Sending SMS via Twilio to: {number}")
-            message = await asyncio.to_thread(
-                client.messages.create,
-                from_=config.TWILIO_FROM_NUMBER,
-                body=body,
-                to=number
-            )
-            print(f"✅ Twilio SMS sent to {number}! SID: {message.sid}")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ Twilio SMS Error to {number}: {type(e).__name__} - {e}")
-    return success_count > 0
-
-
-# --- WhatsApp Sending (Twilio - uses config for keys/sender - unchanged) ---
+    if not valid_recipients: return []
+    client = _get_twilio_client()
+    sender = config.TWILIO_FROM_NUMBER
+    if channel == 'whatsapp' and not sender.startswith('whatsapp:'):
+        sender = f"whatsapp:{sender}"
+    label = 'WhatsApp' if channel == 'whatsapp' else 'SMS'
+
+    async def send_one(number: str):
+        to = f"whatsapp:{number}" if channel == 'whatsapp' and not number.startswith('whatsapp:') else number
+        options = {'status_callback': config.TWILIO_STATUS_CALLBACK_URL} if config.TWILIO_STATUS_CALLBACK_URL else {}
+        message = await call_blocking('twilio', client.messages.create, from_=sender, body=body, to=to, **options)
+        record_delivery_status('twilio', message.sid, number.removeprefix('whatsapp:'), channel, message.status or 'accepted')
+        return message.sid
+
+    print(f"📲 Sending {label} via Twilio to {len(valid_recipients)} recipient(s)")
+    outcomes = await fan_out(valid_recipients, send_one, concurrency=config.TWILIO_FANOUT_CONCURRENCY,
+                             limiter=_twilio_rate_limiter)
+    results = []
+    for number, outcome in zip(valid_recipients, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"❌ Twilio {label} Error to {number}: {type(outcome).__name__} - {outcome}")
+            results.append(RecipientResult(number, False, error=f"{type(outcome).__name__}: {outcome}"))
+        else:
+            results.append(RecipientResult(number, True, sid=outcome))
+    sent = sum(r.ok for r in results)
+    print(f"{'✅' if sent == len(results) else 'WARN:'} Twilio {label} sent to {sent}/{len(results)} recipient(s).")
+    return results
+
+
+async def send_sms_twilio(to_numbers: list[str] | str, body: str):
+    """True if at least one recipient was reached (see send_twilio_messages for per-recipient results)."""
+    return any(r.ok for r in await send_twilio_messages('sms', to_numbers, body))
+
+
 async def send_whatsapp_twilio(to_numbers: list[str] | str, body: str):
-    if not config.TWILIO_ACCOUNT_SID or not config.TWILIO_AUTH_TOKEN or not config.TWILIO_FROM_NUMBER:
-        print("ERROR: Twilio credentials or From Number not configured.")
-        return False
-    # ... (rest of function unchanged) ...
-    valid_recipients = _get_valid_recipients([to_numbers] if isinstance(to_numbers, str) else to_numbers)
-    if not valid_recipients: return False
-    client = TwilioClient(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
-    success_count = 0
-    for number in valid_recipients:
-        whatsapp_number = f"whatsapp:{number}" if not number.startswith('whatsapp:') else number
-        twilio_whatsapp_sender = f"whatsapp:{config.TWILIO_FROM_NUMBER}" if not config.TWILIO_FROM_NUMBER.startswith('whatsapp:') else config.TWILIO_FROM_NUMBER
-        try:
-            print(f"💬 Sending WhatsApp via Twilio to: {whatsapp_number}")
-            message = await asyncio.to_thread(
-                client.messages.create,
-                 from_=twilio_whatsapp_sender,
-                 body=body,
-                 to=whatsapp_number
-            )
-            print(f"✅ Twilio WhatsApp sent to {whatsapp_number}! SID: {message.sid}")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ Twilio WhatsApp Error to {whatsapp_number}: {type(e).__name__} - {e}")
-    return success_count > 0
+    """True if at least one recipient was reached (see send_twilio_messages for per-recipient results)."""
+    return any(r.ok for r in await send_twilio_messages('whatsapp', to_numbers, body))
+
+# --- Outbox Delivery (called by the background worker, never by request handlers) ---
+
+def _email_configured() -> bool:
+    return bool((config.SENDGRID_API_KEY and config.SENDGRID_FROM_EMAIL) or (config.GMAIL_SENDER_EMAIL and config.GMAIL_APP_PASSWORD))
+
+
+async def _send_email(recipients: list[str], subject: str, body: str, html_body: str | None) -> bool:
+    """Sends one email through SendGrid if configured, otherwise Gmail SMTP."""
+    if config.SENDGRID_API_KEY and config.SENDGRID_FROM_EMAIL:
+        return await send_email_sendgrid(recipients, subject, html_body or body)
+    if config.GMAIL_SENDER_EMAIL and config.GMAIL_APP_PASSWORD:
+        return await send_email_smtp(recipients, subject, body)
+    print("WARN: Email notification dropped; no provider (SendGrid/SMTP) configured in config.py.")
+    return False
+
+
+async def deliver_notification(message: OutboxMessage) -> bool:
+    """Delivers one outbox message; False (or an exception) makes the outbox retry it."""
+    if message.channel == 'email':
+        return await _send_email(message.recipients, message.subject or config.COMPANY_NAME, message.body, message.html_body)
+    if message.channel == 'sms':
+        return await send_sms_twilio(message.recipients, message.body)
+    if message.channel == 'whatsapp':
+        return await send_whatsapp_twilio(message.recipients, message.body)
+    raise ValueError(f"Unknown notification channel '{message.channel}'")
+
+
+def init_notification_outbox() -> None:
+    """Starts background delivery of queued notifications."""
+    start_outbox_worker(deliver_notification)
+    atexit.register(close_notification_clients)
+    atexit.register(_admin_digests.flush) # Registered last so held digests are queued before clients close
+
 
 # --- Admin Notification Logic (Fetches settings from DB again) ---
 
-async def notify_admins(subject: str, message_body: str, html_message_body: str | None = None):
-    """Sends notifications to admins based on settings fetched from the database."""
-    print("Fetching admin notification settings from database...")
-    settings = await fetch_admin_notification_settings() # Fetch from DB
+async def notify_admins(subject: str, message_body: str, html_message_body: str | None = None, *,
+                        category: str | None = None, urgent: bool = False):
+    """
+    Notifies admins on every enabled channel. Notifications of the same `category`
+    (default: the subject) arriving in a burst are coalesced into digests;
+    `urgent=True` (or a category in ADMIN_NOTIFY_URGENT_CATEGORIES) always sends immediately.
+    """
+    await _admin_digests.submit(category or subject, subject, message_body, html_message_body, urgent)
+
+
+async def _queue_admin_notifications(subject: str, message_body: str, html_message_body: str | None = None):
+    """Queues notifications to admins based on the (cached) settings from the database."""
+    settings = await fetch_admin_notification_settings() # Served from the site_info cache
     if not settings:
         print("ERROR: Could not fetch admin notification settings.")
         return
 
-    tasks = []
+    queued = 0
     # Use fetched settings
     email_recipients = _get_valid_recipients(settings.get('email_recipients', []))
     sms_recipients = _get_valid_recipients(settings.get('sms_recipients', []))
     whatsapp_recipients = _get_valid_recipients(settings.get('whatsapp_recipients', []))
+    twilio_configured = config.TWILIO_ACCOUNT_SID and config.TWILIO_AUTH_TOKEN and config.TWILIO_FROM_NUMBER
 
-    # Email
+    # Email (one message to all admin recipients)
     if settings.get('email_enabled') and email_recipients:
-        # Use config for API keys/sender details
-        if config.SENDGRID_API_KEY and config.SENDGRID_FROM_EMAIL:
-            tasks.append(send_email_sendgrid(email_recipients, subject, html_message_body or message_body))
-        elif config.GMAIL_SENDER_EMAIL and config.GMAIL_APP_PASSWORD:
-             tasks.append(send_email_smtp(email_recipients, subject, message_body))
+        if _email_configured():
+            queued += await enqueue_notification('email', email_recipients, message_body, subject, html_message_body) is not None
         else:
             print("WARN: Admin email enabled but no provider (SendGrid/SMTP) configured in config.py.")
     elif settings.get('email_enabled'):
          print("WARN: Admin email enabled in DB but no valid recipients found in DB.")
 
-    # SMS
-    if settings.get('sms_enabled') and sms_recipients:
-        # Use config for API keys/sender details
-        if config.TWILIO_ACCOUNT_SID and config.TWILIO_AUTH_TOKEN and config.TWILIO_FROM_NUMBER:
-            tasks.append(send_sms_twilio(sms_recipients, message_body))
-        else:
-             print("WARN: Admin SMS enabled but Twilio not configured in config.py.")
-    elif settings.get('sms_enabled'):
-         print("WARN: Admin SMS enabled in DB but no valid recipients found in DB.")
-
-    # WhatsApp
-    if settings.get('whatsapp_enabled') and whatsapp_recipients:
-         # Use config for API keys/sender details
-        if config.TWILIO_ACCOUNT_SID and config.TWILIO_AUTH_TOKEN and config.TWILIO_FROM_NUMBER:
-            tasks.append(send_whatsapp_twilio(whatsapp_recipients, message_body))
-        else:
-            print("WARN: Admin WhatsApp enabled but Twilio not configured in config.py.")
-    elif settings.get('whatsapp_enabled'):
-         print("WARN: Admin WhatsApp enabled in DB but no valid recipients found in DB.")
+    # SMS and WhatsApp (one message per number, so a retry never re-sends to numbers that succeeded)
+    for channel, recipients in (('sms', sms_recipients), ('whatsapp', whatsapp_recipients)):
+        if settings.get(f'{channel}_enabled') and recipients:
+            if twilio_configured:
+                for number in recipients:
+                    queued += await enqueue_notification(channel, [number], message_body) is not None
+            else:
+                print(f"WARN: Admin {channel} enabled but Twilio not configured in config.py.")
+        elif settings.get(f'{channel}_enabled'):
+            print(f"WARN: Admin {channel} enabled in DB but no valid recipients found in DB.")
 
-    if tasks:
-        print(f"Attempting to send admin notifications for: {subject}")
-        await asyncio.gather(*tasks)
+    if queued:
+        print(f"Queued {queued} admin notification(s) for: {subject}")
     else:
         print("INFO: No admin notifications sent (either disabled in DB or no valid recipients found in DB/config).")
 
 
-# --- Customer Notification Logic (Uses hardcoded COMPANY_NAME from config) ---
-# (These functions remain largely the same as they primarily use config for sender details)
+_admin_digests = DigestCoalescer(
+    _queue_admin_notifications,
+    window_seconds=config.ADMIN_DIGEST_WINDOW_SECONDS,
+    top_items=config.ADMIN_DIGEST_TOP_ITEMS,
+    urgent_categories=set(config.ADMIN_NOTIFY_URGENT_CATEGORIES),
+)
+
+
+def admin_digest_stats() -> dict:
+    return _admin_digests.stats()
+
+
+# --- Customer Notification Logic (templates in backend/templates/notifications) ---
+
+async def _queue_customer_email(email: str, template: str, **context):
+    """Renders `template` (subject, text and HTML parts) and queues it; SendGrid sends the HTML, SMTP the text."""
+    if not _email_configured():
+        return
+    message = render_notification(template, **context)
+    await enqueue_notification('email', [email], message.text, message.subject, message.html)
+
 
 async def notify_customer_registration(email: str):
-    subject = f"Welcome to {config.COMPANY_NAME}!" # Use hardcoded name
-    html_body = f"<p>Hi,</p><p>Thanks for registering at {config.COMPANY_NAME}. Please check your inbox for a confirmation link if required.</p><p>Regards,<br>The {config.COMPANY_NAME} Team</p>"
-    # Decide which email provider to use based on config
-    if config.SENDGRID_API_KEY:
-        await send_email_sendgrid([email], subject, html_body)
-    elif config.GMAIL_SENDER_EMAIL:
-        await send_email_smtp([email], subject, f"Hi,\n\nThanks for registering at {config.COMPANY_NAME}. Please check your inbox for a confirmation link if required.\n\nRegards,\nThe {config.COMPANY_NAME} Team")
+    await _queue_customer_email(email, 'customer_registration')
 
 async def notify_customer_order_placed(email: str, order_number: str):
-    subject = f"Your {config.COMPANY_NAME} Order #{order_number} Confirmed" # Use hardcoded name
-    html_body = f"<p>Hi,</p><p>Your order {order_number} has been placed successfully. We'll notify you when it ships.</p><p>Regards,<br>The {config.COMPANY_NAME} Team</p>"
-    if config.SENDGRID_API_KEY:
-        await send_email_sendgrid([email], subject, html_body)
-    elif config.GMAIL_SENDER_EMAIL:
-         await send_email_smtp([email], subject, f"Hi,\n\nYour order {order_number} has been placed successfully. We'll notify you when it ships.\n\nRegards,\nThe {config.COMPANY_NAME} Team")
+    await _queue_customer_email(email, 'customer_order_placed', order_number=order_number)
 
 
 async def notify_customer_item_shipped(email: str, order_number: str, item_name: str, eta_days: int | None):
-    subject = f"An item from your {config.COMPANY_NAME} Order #{order_number} has shipped!" # Use hardcoded name
-    eta_text = f" Estimated delivery in {eta_days} days." if eta_days else ""
-    html_body = f"<p>Hi,</p><p>Good news! Your item '{item_name}' from order {order_number} has shipped.{eta_text}</p><p>Regards,<br>The {config.COMPANY_NAME} Team</p>"
-    if config.SENDGRID_API_KEY:
-        await send_email_sendgrid([email], subject, html_body)
-    elif config.GMAIL_SENDER_EMAIL:
-        await send_email_smtp([email], subject, f"Hi,\n\nGood news! Your item '{item_name}' from order {order_number} has shipped.{eta_text}\n\nRegards,\nThe {config.COMPANY_NAME} Team")
\ No newline at end of file
+    await _queue_customer_email(email, 'customer_item_shipped', order_number=order_number, item_name=item_name, eta_days=eta_days)
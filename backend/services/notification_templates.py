@@ -0,0 +1,80 @@
+# backend/services/notification_templates.py
+"""
+Precompiled notification templates (Jinja2).
+
+Each template in backend/templates/notifications defines three blocks:
+`subject`, `text` and `html`. The same source is compiled twice at startup,
+once with HTML auto-escaping (for the html block) and once without (for the
+subject and text), so one definition yields both parts and values like
+item_name are escaped only where it matters. Rendering calls the compiled
+block functions directly; see benchmarks/bench_notification_templates.
+"""
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+from ..config import config
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / 'templates' / 'notifications'
+TEMPLATE_SUFFIX = '.j2'
+_PARTS = ('subject', 'text', 'html')
+
+
+class RenderedMessage(NamedTuple):
+    subject: str
+    text: str
+    html: str
+
+
+class NotificationTemplates:
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        loader = FileSystemLoader(str(directory))
+        options = dict(loader=loader, undefined=StrictUndefined, trim_blocks=True, lstrip_blocks=True, auto_reload=False)
+        self._html_env = Environment(autoescape=True, **options)
+        self._text_env = Environment(autoescape=False, **options)
+        for env in (self._html_env, self._text_env):
+            env.globals['company_name'] = config.COMPANY_NAME
+        self._lock = threading.Lock()
+        self._compiled: dict[str, tuple[Template, Template]] = {} # name -> (text, html)
+
+    def load_all(self) -> int:
+        """Compiles every template in the directory; raises on syntax errors or missing blocks."""
+        compiled = {}
+        for filename in self._html_env.list_templates(filter_func=lambda n: n.endswith(TEMPLATE_SUFFIX)):
+            name = filename[:-len(TEMPLATE_SUFFIX)]
+            text_template, html_template = self._text_env.get_template(filename), self._html_env.get_template(filename)
+            missing = [part for part in _PARTS if part not in html_template.blocks]
+            if missing:
+                raise ValueError(f"Notification template '{filename}' is missing block(s): {', '.join(missing)}")
+            compiled[name] = (text_template, html_template)
+        with self._lock:
+            self._compiled = compiled
+        return len(compiled)
+
+    def names(self) -> list[str]:
+        return sorted(self._compiled)
+
+    def render(self, name: str, **context) -> RenderedMessage:
+        """Renders subject, text and HTML for `name`. Raises KeyError for unknown templates, UndefinedError for missing values."""
+        if not self._compiled:
+            self.load_all()
+        text_template, html_template = self._compiled[name]
+        text_context = text_template.new_context(context)
+        subject = ''.join(text_template.blocks['subject'](text_context))
+        text = ''.join(text_template.blocks['text'](text_context))
+        html = ''.join(html_template.blocks['html'](html_template.new_context(context)))
+        return RenderedMessage(' '.join(subject.split()), text.strip(), html.strip())
+
+
+notification_templates = NotificationTemplates()
+
+
+def load_notification_templates() -> None:
+    count = notification_templates.load_all()
+    print(f"✅ Compiled {count} notification templates.")
+
+
+def render_notification(name: str, **context) -> RenderedMessage:
+    return notification_templates.render(name, **context)
@@ -0,0 +1,888 @@
+# backend/services/part_service.py
+"""
+Parts catalog search.
+
+The active catalog is held in an in-memory inverted index: one posting list
+(sorted doc ids) per term for each searchable field - normalized part numbers
+(SKU, brand part number and OEM cross-references with dashes and spaces
+stripped), brand, name and category words. A query is answered from memory,
+never with a database round trip:
+
+- exact terms score highest, then prefixes of terms (search-as-you-type), then
+  typo-tolerant matches when a word matches nothing (edit distance 1, or 2 for
+  long words: a one-deletion map for words, a bounded scan of neighbouring
+  terms for part numbers);
+- field weights rank a part-number hit above brand, name and category words;
+- every query word must match, falling back to any word when none match all;
+- ties go to in-stock parts with shorter names (doc ids follow that order).
+
+Ranking works on doc-id bitsets (Python ints): each query word's matches are
+grouped into disjoint weight levels, and combinations of levels are intersected
+in descending total weight until the page is filled, so a word matching 50k
+parts costs a few big-int ANDs, not a pass over 50k ids. Bitsets of frequent
+terms are cached; rare terms are converted per query.
+
+The index loads from Supabase on a background thread at startup, then applies
+rows changed since its updated_at watermark every PARTS_INDEX_REFRESH_SECONDS.
+A changed part gets a new doc id and its old one is tombstoned; the periodic
+full rebuild compacts those and drops hard-deleted rows. Writes happen on the
+refresher thread only, under the index's write lock. Searches do not take it:
+posting lists only grow by appending, so a search ignores doc ids at or past
+the doc count it started with, and cached bitsets of frequent terms are built
+only while holding the lock, so none can miss a doc added concurrently.
+See benchmarks/bench_parts_search.
+
+Browsing (no query) pages through doc-id lists kept sorted by name, price and
+updated_at: a page is a bisect to the cursor's sort key plus a short scan, so
+page 5,000 costs what page 1 does, and rows changed between requests neither
+repeat nor vanish from the pages still to come.
+
+Vehicle fitment ("what fits a 2012 Toyota Corolla 1.8") is a separate,
+read-only FitmentIndex: a binary file built offline from 'part_fitments'
+(python -m backend.scripts.build_fitment_index) and memory-mapped, so every
+worker process shares one copy of the page cache. Per vehicle (make, model,
+year, engine) it holds the fitting part ordinals as a uint32 array sorted by
+(category, part), so a vehicle's parts - or its parts in one category - are a
+single zero-copy slice. See benchmarks/bench_fitment_index.
+"""
+import base64
+import bisect
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from ..config import config
+from ..database.part_repository import FitmentRow, PartRecord, iter_active_parts, iter_part_fitments, iter_parts_changed_since
+
+_WORD_RE = re.compile(r'[0-9a-z]+')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+# Field -> weight of an exact term match
+FIELD_WEIGHTS = {'part_number': 8.0, 'brand': 3.0, 'name': 2.0, 'category': 1.5}
+PREFIX_FACTOR = 0.6
+FUZZY_FACTORS = {1: 0.4, 2: 0.25} # By edit distance
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+MAX_QUERY_WORDS = 8
+PART_NUMBER_SCAN_LIMIT = 2000 # Neighbouring part-number terms checked for a typo match
+REFRESH_OVERLAP_SECONDS = 30 # Re-read window for rows committed after a later updated_at was seen
+DENSE_TERM_FRACTION = 1 / 256 # Terms in at least this share of the catalog keep a cached bitset
+MAX_LEVEL_COMBINATIONS = 256
+_BLOCK_BYTES = 64 # Result bitsets are walked 512 docs at a time
+LIST_SCAN_LIMIT = 20000 # Rows examined per listing page before returning a short page with a cursor
+
+# Listing sort orders: key per maintained order, and sort parameter -> (order, scan backwards)
+_ORDER_KEYS = {
+    'name': lambda p: (p.name.lower(), p.id),
+    'price': lambda p: (p.price is None, p.price or 0.0, p.id), # Unpriced parts last
+    '-price': lambda p: (p.price is None, -(p.price or 0.0), p.id),
+    'updated_at': lambda p: (p.updated_at, p.id),
+}
+_KEY_TYPES = {'name': (str, str), 'price': (bool, (int, float), str), '-price': (bool, (int, float), str),
+              'updated_at': (str, str)}
+LIST_SORTS = {'name': ('name', False), '-name': ('name', True), 'price': ('price', False),
+              '-price': ('-price', False), 'updated_at': ('updated_at', False), '-updated_at': ('updated_at', True)}
+
+
+class CatalogNotReadyError(RuntimeError):
+    """The index has not finished its first load."""
+
+
+class FitmentIndexUnavailableError(RuntimeError):
+    """No fitment index file has been built/loaded."""
+
+
+def encode_cursor(sort: str, key: tuple) -> str:
+    raw = json.dumps([sort, *key], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """The sort key a listing cursor points after; ValueError if the sort is unknown or the cursor malformed or foreign."""
+    if sort not in LIST_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'")
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(values, list) or not values or values[0] != sort:
+        raise ValueError("Cursor does not belong to this sort order")
+    types = _KEY_TYPES[LIST_SORTS[sort][0]]
+    key = tuple(values[1:])
+    if len(key) != len(types) or not all(isinstance(v, t) for v, t in zip(key, types)):
+        raise ValueError("Malformed cursor")
+    return key
+
+
+def normalize_part_number(value: str) -> str:
+    """Uppercases a part number and strips everything but letters and digits ('04465-0 2220' -> '0446502220')."""
+    return _NON_ALNUM_RE.sub('', value.lower()).upper()
+
+
+def _part_number_key(value: str) -> str:
+    return _NON_ALNUM_RE.sub('', value.lower())
+
+
+def _one_deletions(term: str) -> set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (an adjacent transposition counts once), capped at max_distance + 1."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def _bitset(docs: Iterable[int], size: int) -> int:
+    bits = bytearray((size >> 3) + 1)
+    for doc in docs:
+        bits[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _lowest_docs(bitset: int, skip: int, limit: int) -> tuple[list[int], int]:
+    """
+    Up to `limit` smallest doc ids after skipping `skip`; also returns how many of
+    `skip` remain. Works through the bitset in 512-doc blocks, skipping whole
+    blocks by their bit count, so a deep offset costs one pass over the bitset's
+    bytes rather than a big-int operation per skipped doc.
+    """
+    docs = []
+    if not bitset or limit <= 0:
+        return docs, skip
+    data = bitset.to_bytes((bitset.bit_length() + 7) >> 3, 'little')
+    for start in range(0, len(data), _BLOCK_BYTES):
+        block = int.from_bytes(data[start:start + _BLOCK_BYTES], 'little')
+        count = block.bit_count()
+        if skip >= count:
+            skip -= count
+            continue
+        base = start << 3
+        while block and len(docs) < limit:
+            lowest = block & -block
+            block ^= lowest
+            if skip:
+                skip -= 1
+            else:
+                docs.append(base + lowest.bit_length() - 1)
+        if len(docs) >= limit:
+            break
+    return docs, skip
+
+
+def _union(levels: list[tuple[float, int]]) -> int:
+    bitset = 0
+    for _, b in levels:
+        bitset |= b
+    return bitset
+
+
+def _static_rank(part: PartRecord) -> tuple:
+    return (part.stock <= 0, len(part.name), part.name.lower())
+
+
+class _FieldIndex:
+    """Posting lists of one field, its sorted vocabulary (prefix lookups) and optionally a one-deletion map (typo lookups)."""
+    __slots__ = ('weight', 'postings', 'terms', 'deletions', 'dense', '_write_lock')
+
+    def __init__(self, weight: float, with_deletions: bool, write_lock: threading.Lock):
+        self.weight = weight
+        self._write_lock = write_lock # The owning index's: held by add(), and while caching a bitset
+        self.postings: dict[str, list[int]] = {}
+        self.terms: list[str] = []
+        self.deletions: dict[str, list[str]] | None = {} if with_deletions else None
+        self.dense: dict[str, int] = {} # term -> cached bitset, frequent terms only
+
+    def add(self, term: str, doc: int, bulk: bool) -> None:
+        posting = self.postings.get(term)
+        if posting is not None:
+            if posting[-1] != doc:
+                posting.append(doc)
+                if term in self.dense:
+                    self.dense[term] |= 1 << doc
+            return
+        self.postings[term] = [doc]
+        if bulk:
+            self.terms.append(term) # Sorted once by finish_bulk()
+        else:
+            bisect.insort(self.terms, term)
+        if self.deletions is not None and len(term) >= MIN_FUZZY_LENGTH - 1:
+            for variant in _one_deletions(term):
+                self.deletions.setdefault(variant, []).append(term)
+
+    def finish_bulk(self) -> None:
+        self.terms.sort()
+
+    def bitset(self, terms: list[str], size: int) -> int:
+        """
+        Union of the terms' postings over doc ids below `size` (docs appended
+        since the caller read it are left out). Frequent terms are converted once
+        and cached; that happens under the write lock, and is skipped while a
+        refresh holds it, so a cached bitset never misses a concurrently added doc.
+        """
+        bitset, sparse = 0, []
+        for term in terms:
+            posting = self.postings[term]
+            cached = self.dense.get(term)
+            if cached is None and len(posting) >= size * DENSE_TERM_FRACTION and self._write_lock.acquire(blocking=False):
+                try:
+                    cached = self.dense.get(term)
+                    if cached is None:
+                        cached = self.dense[term] = _bitset(posting, posting[-1] + 1)
+                finally:
+                    self._write_lock.release()
+            if cached is not None:
+                bitset |= cached
+            else:
+                sparse.extend(posting[:bisect.bisect_left(posting, size)])
+        bitset |= _bitset(sparse, size) if sparse else 0
+        return bitset & ((1 << size) - 1) if bitset >> size else bitset
+
+    def prefix_terms(self, prefix: str, limit: int) -> list[str]:
+        terms, matches = self.terms, []
+        i = bisect.bisect_left(terms, prefix)
+        while i < len(terms) and len(matches) < limit and terms[i].startswith(prefix):
+            if terms[i] != prefix:
+                matches.append(terms[i])
+            i += 1
+        return matches
+
+    def fuzzy_terms(self, token: str, max_distance: int, limit: int) -> list[tuple[str, int]]:
+        if self.deletions is not None:
+            candidates = set()
+            for variant in _one_deletions(token) | {token}:
+                candidates.update(self.deletions.get(variant, ()))
+                if variant in self.postings:
+                    candidates.add(variant)
+        else:
+            # Part numbers: typos rarely hit the leading characters, so only neighbours sharing them are checked
+            terms, lead, candidates = self.terms, token[:2], []
+            i = bisect.bisect_left(terms, lead)
+            while i < len(terms) and len(candidates) < PART_NUMBER_SCAN_LIMIT and terms[i].startswith(lead):
+                candidates.append(terms[i])
+                i += 1
+        matches = []
+        for term in candidates:
+            distance = _edit_distance(token, term, max_distance) if term != token else 0
+            if 0 < distance <= max_distance:
+                matches.append((term, distance))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches[:limit]
+
+
+class PartSearchIndex:
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._fields = {name: _FieldIndex(weight, name != 'part_number', self._write_lock) for name, weight in FIELD_WEIGHTS.items()}
+        self._docs: list[PartRecord] = [] # doc id -> part (superseded versions stay, see _alive)
+        self._doc_ids: dict[str, int] = {} # part id -> current doc id
+        self._live = 0 # Bitset of current doc ids
+        self._alive = bytearray() # Same as _live, one byte per doc, for sequential scans
+        self._orders: dict[str, list[int]] = {name: [] for name in _ORDER_KEYS} # Doc ids in each listing order
+        self._facets = {facet: _FieldIndex(0.0, False, self._write_lock) for facet in ('brand', 'category')} # Exact-value filters
+        self.version = 0 # Bumped whenever applied changes alter the catalog
+        self.watermark = '' # Highest updated_at applied
+        self.superseded = 0
+
+    @classmethod
+    def build(cls, parts: Iterable[PartRecord]) -> 'PartSearchIndex':
+        index = cls()
+        records = sorted((p for p in parts if p.is_active), key=_static_rank)
+        for part in records:
+            index._append(part, bulk=True)
+        for field in (*index._fields.values(), *index._facets.values()):
+            field.finish_bulk()
+        index._live = (1 << len(records)) - 1
+        for name, key in _ORDER_KEYS.items():
+            index._orders[name] = sorted(range(len(records)), key=lambda doc: key(records[doc]))
+        index.watermark = max((p.updated_at for p in records), default='')
+        index.version = 1
+        return index
+
+    @staticmethod
+    def _terms(part: PartRecord) -> Iterable[tuple[str, str]]:
+        for number in (part.sku, part.part_number, *part.oem_numbers):
+            key = _part_number_key(number) if number else ''
+            if key:
+                yield 'part_number', key
+        for field, text in (('brand', part.brand), ('name', part.name), ('category', part.category)):
+            if text:
+                for word in _WORD_RE.findall(text.lower()):
+                    yield field, word
+
+    def _append(self, part: PartRecord, bulk: bool) -> None:
+        doc = len(self._docs)
+        self._docs.append(part)
+        self._alive.append(1)
+        self._doc_ids[part.id] = doc
+        for field, term in self._terms(part):
+            self._fields[field].add(term, doc, bulk)
+        for facet, value in (('brand', part.brand), ('category', part.category)):
+            if value:
+                self._facets[facet].add(value.strip().lower(), doc, bulk)
+        if not bulk:
+            self._live |= 1 << doc
+            for name, key in _ORDER_KEYS.items():
+                bisect.insort(self._orders[name], doc, key=lambda d: key(self._docs[d]))
+
+    def apply(self, parts: Iterable[PartRecord]) -> int:
+        """Applies changed rows (re-reads are skipped); returns how many parts were added, replaced or removed."""
+        changed = 0
+        with self._write_lock:
+            for part in parts:
+                self.watermark = max(self.watermark, part.updated_at)
+                doc = self._doc_ids.get(part.id)
+                if doc is not None:
+                    if part.is_active and self._docs[doc].updated_at == part.updated_at:
+                        continue
+                    self._live &= ~(1 << doc)
+                    self._alive[doc] = 0
+                    del self._doc_ids[part.id]
+                    self.superseded += 1
+                elif not part.is_active:
+                    continue
+                if part.is_active:
+                    self._append(part, bulk=False)
+                changed += 1
+            if changed:
+                self.version += 1
+        return changed
+
+    @property
+    def size(self) -> int:
+        return len(self._doc_ids)
+
+    @property
+    def catalog_version(self) -> str:
+        """Identifies the catalog contents; equal on every worker that has applied the same rows."""
+        return f"{self.watermark}/{self.size}"
+
+    def get(self, part_id: str) -> PartRecord | None:
+        doc = self._doc_ids.get(part_id)
+        return self._docs[doc] if doc is not None else None
+
+    def _levels(self, token: str, fields: Iterable[str]) -> list[tuple[float, int]]:
+        """
+        The token's matches as disjoint (weight, bitset) levels, best first: exact,
+        prefix and (when nothing matched exactly) typo matches in each field.
+        """
+        by_weight: dict[float, list[tuple[_FieldIndex, str]]] = {}
+        limit, size = config.PARTS_SEARCH_MAX_EXPANSIONS, len(self._docs)
+        exact_found = False
+        for name in fields:
+            field = self._fields[name]
+            if token in field.postings:
+                exact_found = True
+                by_weight.setdefault(field.weight, []).append((field, token))
+            if len(token) >= MIN_PREFIX_LENGTH:
+                by_weight.setdefault(field.weight * PREFIX_FACTOR, []).extend((field, t) for t in field.prefix_terms(token, limit))
+        if not exact_found and len(token) >= MIN_FUZZY_LENGTH:
+            max_distance = 2 if len(token) >= 8 else 1
+            for name in fields:
+                field = self._fields[name]
+                for term, distance in field.fuzzy_terms(token, max_distance, limit):
+                    by_weight.setdefault(field.weight * FUZZY_FACTORS[distance], []).append((field, term))
+
+        levels, assigned = [], 0
+        for weight in sorted(by_weight, reverse=True):
+            bitset = 0
+            for field, terms in itertools.groupby(by_weight[weight], key=lambda ft: ft[0]):
+                bitset |= field.bitset([term for _, term in terms], size)
+            bitset &= ~assigned
+            if bitset:
+                levels.append((weight, bitset))
+                assigned |= bitset
+        return levels
+
+    def search(self, query: str, *, limit: int = 20, offset: int = 0, brand: str | None = None,
+               category: str | None = None) -> dict:
+        start = time.perf_counter()
+        size = len(self._docs)
+        mask = self._live
+        for facet, value in (('brand', brand), ('category', category)):
+            if value:
+                key = value.strip().lower()
+                index = self._facets[facet]
+                mask &= index.bitset([key], size) if key in index.postings else 0
+
+        words = list(dict.fromkeys(_WORD_RE.findall(query.lower())))[:MAX_QUERY_WORDS]
+        per_word: list[list[tuple[float, int]]] = []
+        compact = _part_number_key(query)
+        if len(words) > 1 and any(ch.isdigit() for ch in compact):
+            # A part number typed with separators ('04465-02220'): try it whole first
+            levels = self._levels(compact, ('part_number',))
+            if levels:
+                per_word = [levels]
+        if not per_word:
+            per_word = [self._levels(word, self._fields) for word in words]
+
+        match = 'all'
+        unions = []
+        for levels in per_word:
+            union = 0
+            for _, bitset in levels:
+                union |= bitset
+            unions.append(union)
+        matched = mask if unions else 0
+        for union in unions:
+            matched &= union
+        if not matched and len(per_word) > 1:
+            # No part has every word: rank parts by the words they do have
+            match = 'any'
+            matched = 0
+            for union in unions:
+                matched |= union
+            matched &= mask
+            per_word = [levels + [(0.0, mask & ~union)] for levels, union in zip(per_word, unions)]
+        total = matched.bit_count()
+
+        # Walk combinations of per-word levels from the highest total weight down until the page is full
+        if total:
+            product_size = 1
+            for levels in per_word:
+                product_size *= len(levels)
+            if product_size > MAX_LEVEL_COMBINATIONS:
+                per_word = [levels[:1] + [(levels[1][0], _union(levels[1:]))] if len(levels) > 2 else levels for levels in per_word]
+            combinations: dict[float, list[tuple[int, ...]]] = {}
+            for combination in itertools.product(*per_word):
+                weight = sum(w for w, _ in combination)
+                if weight > 0:
+                    combinations.setdefault(weight, []).append(tuple(b for _, b in combination))
+        else:
+            combinations = {}
+        results, skip = [], offset
+        for weight in sorted(combinations, reverse=True):
+            tier = 0
+            for bitsets in combinations[weight]:
+                bitset = matched
+                for b in bitsets:
+                    bitset &= b
+                    if not bitset:
+                        break
+                tier |= bitset
+            docs, skip = _lowest_docs(tier, skip, limit - len(results))
+            results.extend((doc, weight) for doc in docs)
+            if len(results) >= limit:
+                break
+        return {
+            'query': query,
+            'match': match if total else 'none',
+            'total': total,
+            'results': [{**self._docs[doc]._asdict(), 'score': round(weight, 3)} for doc, weight in results],
+            'took_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def list_page(self, *, sort: str = 'name', cursor: str | None = None, limit: int = 20, brand: str | None = None,
+                  category: str | None = None, in_stock: bool = False, min_price: float | None = None,
+                  max_price: float | None = None) -> dict:
+        """
+        One keyset page of the catalog in `sort` order, starting after `cursor`
+        (a `next_cursor` from the previous page). Cost depends on the page, not on
+        how deep it is. Filters are checked while scanning, at most LIST_SCAN_LIMIT
+        rows per call: a very selective filter can return a short page whose
+        next_cursor continues the scan. `total` is only counted for brand/category
+        filters (None with stock or price filters). Raises ValueError for an
+        unknown sort or a bad cursor.
+        """
+        if sort not in LIST_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'")
+        name, backwards = LIST_SORTS[sort]
+        key, order, docs, alive = _ORDER_KEYS[name], self._orders[name], self._docs, self._alive
+        if cursor is None:
+            i = len(order) - 1 if backwards else 0
+        else:
+            after = decode_cursor(cursor, sort)
+            if backwards:
+                i = bisect.bisect_left(order, after, key=lambda d: key(docs[d])) - 1
+            else:
+                i = bisect.bisect_right(order, after, key=lambda d: key(docs[d]))
+
+        checks = []
+        for attr, value in (('brand', brand), ('category', category)):
+            if value:
+                wanted = value.strip().lower()
+                checks.append(lambda p, attr=attr, wanted=wanted: (getattr(p, attr) or '').strip().lower() == wanted)
+        if in_stock:
+            checks.append(lambda p: p.stock > 0)
+        if min_price is not None:
+            checks.append(lambda p: p.price is not None and p.price >= min_price)
+        if max_price is not None:
+            checks.append(lambda p: p.price is not None and p.price <= max_price)
+
+        step, end = (-1, -1) if backwards else (1, len(order))
+        results, scanned, doc = [], 0, None
+        while i != end and len(results) < limit and scanned < LIST_SCAN_LIMIT:
+            doc = order[i]
+            i += step
+            scanned += 1
+            if alive[doc]:
+                part = docs[doc]
+                if all(check(part) for check in checks):
+                    results.append(part._asdict())
+
+        total = None
+        if not (in_stock or min_price is not None or max_price is not None):
+            mask, size = self._live, len(docs)
+            for facet, value in (('brand', brand), ('category', category)):
+                if value:
+                    wanted, field = value.strip().lower(), self._facets[facet]
+                    mask &= field.bitset([wanted], size) if wanted in field.postings else 0
+            total = mask.bit_count()
+        return {
+            'sort': sort,
+            'total': total,
+            'results': results,
+            'next_cursor': encode_cursor(sort, key(docs[doc])) if i != end and doc is not None else None,
+        }
+
+    def stats(self) -> dict:
+        return {
+            'parts': self.size,
+            'superseded': self.superseded,
+            'version': self.version,
+            'watermark': self.watermark,
+            'terms': {name: len(field.postings) for name, field in self._fields.items()},
+        }
+
+
+# --- Vehicle Fitment Index (built offline, memory-mapped) ---
+FITMENT_MAGIC = b'EAFIT\x00\x01\x00' # Format version 1; arrays are little-endian uint32
+ANY_ENGINE = '*'
+SHARED_ENGINE = '~' # Per model-year: only the engine-agnostic parts, for engines without fitments of their own
+MAX_FITMENT_YEARS = 80 # Longer ranges are treated as bad data
+_SECTION = struct.Struct('<24sQQ') # name, byte offset, byte length
+_DISPLACEMENT_RE = re.compile(r'(\d+(?:\.\d+)?) ?L?')
+
+
+def normalize_vehicle_name(value: str) -> str:
+    return ' '.join(value.split())
+
+
+def normalize_engine(value: str | None) -> str:
+    """'1.8' and '1.8 l' -> '1.8L'; blank -> ANY_ENGINE."""
+    engine = ' '.join((value or '').upper().split())
+    if not engine:
+        return ANY_ENGINE
+    displacement = _DISPLACEMENT_RE.fullmatch(engine)
+    return f"{displacement.group(1)}L" if displacement else engine
+
+
+def _vehicle_key(make: str, model: str, year: int, engine: str) -> str:
+    return f"{make}|{model}|{year}|{engine}"
+
+
+def _string_table(values: list[str]) -> tuple[bytes, bytes]:
+    blob, offsets = bytearray(), array('I', [0])
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return bytes(blob), offsets.tobytes()
+
+
+def build_fitment_file(path: str, parts: Iterable[PartRecord], fitments: Iterable[FitmentRow]) -> dict:
+    """
+    Writes a fitment index file (temp file + rename, so readers never see a partial one).
+
+    Engine-agnostic fitments are folded into every engine of their model-year.
+    Each model-year also gets an ANY_ENGINE entry with all of its parts and a
+    SHARED_ENGINE entry with just the engine-agnostic ones (possibly none),
+    answered for an engine the model-year has no specific fitments for.
+    Returns build counts.
+    """
+    part_ordinals: dict[str, int] = {}
+    part_categories = array('I')
+    category_ids: dict[str, int] = {}
+    for part in parts:
+        if part.is_active and part.id not in part_ordinals:
+            part_ordinals[part.id] = len(part_ordinals)
+            part_categories.append(category_ids.setdefault((part.category or '').strip().lower(), len(category_ids)))
+
+    # Values are packed (category << 32 | part ordinal) so one sort orders a vehicle's parts by category, then part
+    specific: dict[tuple, array] = defaultdict(lambda: array('Q'))
+    agnostic: dict[tuple, array] = defaultdict(lambda: array('Q'))
+    labels: dict[str, str] = {} # lowercase make/model -> first spelling seen, for display
+    rows = skipped = 0
+    for row in fitments:
+        ordinal = part_ordinals.get(row.part_id)
+        year_from = row.year_from
+        year_to = row.year_to if row.year_to is not None else year_from
+        if (ordinal is None or not row.make.strip() or not row.model.strip() or year_from is None
+                or not 0 <= year_to - year_from <= MAX_FITMENT_YEARS):
+            skipped += 1
+            continue
+        make, model = normalize_vehicle_name(row.make), normalize_vehicle_name(row.model)
+        make = labels.setdefault(make.lower(), make)
+        model = labels.setdefault(f"{make.lower()}|{model.lower()}", model)
+        engine = normalize_engine(row.engine)
+        packed = part_categories[ordinal] << 32 | ordinal
+        for year in range(year_from, year_to + 1):
+            if engine == ANY_ENGINE:
+                agnostic[(make, model, year)].append(packed)
+            else:
+                specific[(make, model, year, engine)].append(packed)
+        rows += 1
+
+    engines_by_model_year: dict[tuple, list[tuple]] = defaultdict(list)
+    for key in specific:
+        engines_by_model_year[key[:3]].append(key)
+    vehicles: dict[str, array] = {}
+    for model_year in set(agnostic) | set(engines_by_model_year):
+        shared = agnostic.get(model_year, array('Q'))
+        everything = array('Q', shared)
+        for key in engines_by_model_year[model_year]:
+            vehicles[_vehicle_key(*key)] = specific[key] + shared
+            everything.extend(specific[key])
+        vehicles[_vehicle_key(*model_year, ANY_ENGINE)] = everything
+        vehicles[_vehicle_key(*model_year, SHARED_ENGINE)] = shared
+
+    keys = sorted(vehicles, key=str.lower)
+    vehicle_runs, run_categories, run_starts, postings = array('I', [0]), array('I'), array('I'), array('I')
+    for key in keys:
+        current = None
+        for value in sorted(set(vehicles[key])):
+            if value >> 32 != current:
+                current = value >> 32
+                run_categories.append(current)
+                run_starts.append(len(postings))
+            postings.append(value & 0xFFFFFFFF)
+        vehicle_runs.append(len(run_categories))
+    run_starts.append(len(postings))
+
+    part_blob, part_offsets = _string_table(list(part_ordinals))
+    category_blob, category_offsets = _string_table(list(category_ids))
+    key_blob, key_offsets = _string_table(keys)
+    sections = {
+        'part_ids': part_blob, 'part_id_offsets': part_offsets,
+        'categories': category_blob, 'category_offsets': category_offsets,
+        'vehicle_keys': key_blob, 'vehicle_key_offsets': key_offsets,
+        'vehicle_runs': vehicle_runs.tobytes(), 'run_categories': run_categories.tobytes(),
+        'run_starts': run_starts.tobytes(), 'postings': postings.tobytes(),
+    }
+    header = bytearray(FITMENT_MAGIC + struct.pack('<I', len(sections)))
+    offset = (len(header) + _SECTION.size * len(sections) + 7) & ~7
+    for name, data in sections.items():
+        header += _SECTION.pack(name.encode(), offset, len(data))
+        offset = (offset + len(data) + 7) & ~7
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        for data in sections.values():
+            f.write(b'\x00' * (-f.tell() % 8))
+            f.write(data)
+    os.replace(temp_path, path)
+    return {'parts': len(part_ordinals), 'fitment_rows': rows, 'skipped_rows': skipped, 'vehicles': len(keys),
+            'postings': len(postings), 'bytes': os.path.getsize(path)}
+
+
+class FitmentIndex:
+    """Read-only view over a fitment index file. Lookups return zero-copy uint32 slices of the mapping."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(FITMENT_MAGIC)] != FITMENT_MAGIC:
+            raise ValueError(f"'{path}' is not a fitment index (or was built by an incompatible version).")
+        self.path, self.mtime = path, os.path.getmtime(path)
+        view = memoryview(self._mmap)
+        (count,) = struct.unpack_from('<I', self._mmap, len(FITMENT_MAGIC))
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(self._mmap, len(FITMENT_MAGIC) + 4 + i * _SECTION.size)
+            sections[name.rstrip(b'\x00').decode()] = view[offset:offset + length]
+        self._part_ids = sections['part_ids']
+        self._part_id_offsets = sections['part_id_offsets'].cast('I')
+        self._vehicle_runs = sections['vehicle_runs'].cast('I')
+        self._run_categories = sections['run_categories'].cast('I')
+        self._run_starts = sections['run_starts'].cast('I')
+        self._postings = sections['postings'].cast('I')
+        # Small per-process lookups: vehicle key -> vehicle ordinal, category -> id, make/model/year/engine tree
+        categories = self._strings(sections['categories'], sections['category_offsets'].cast('I'))
+        self._category_ids = {name: i for i, name in enumerate(categories)}
+        keys = self._strings(sections['vehicle_keys'], sections['vehicle_key_offsets'].cast('I'))
+        self._vehicles = {key.lower(): i for i, key in enumerate(keys)}
+        self._tree: dict[str, dict[str, dict[int, list[str]]]] = {}
+        for key in keys:
+            make, model, year, engine = key.split('|')
+            engines = self._tree.setdefault(make, {}).setdefault(model, {}).setdefault(int(year), [])
+            if engine not in (ANY_ENGINE, SHARED_ENGINE):
+                engines.append(engine)
+        self.part_count = len(self._part_id_offsets) - 1
+
+    @staticmethod
+    def _strings(blob: memoryview, offsets: memoryview) -> list[str]:
+        data = bytes(blob)
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def part_id(self, ordinal: int) -> str:
+        offsets = self._part_id_offsets
+        return bytes(self._part_ids[offsets[ordinal]:offsets[ordinal + 1]]).decode('utf-8')
+
+    def parts_for(self, make: str, model: str, year: int, engine: str | None = None,
+                  category: str | None = None) -> memoryview | None:
+        """
+        Ordinals of the parts fitting a vehicle (any engine when `engine` is None),
+        optionally only those in `category`. An engine without fitments of its own
+        gets the model-year's engine-agnostic parts. None if the model-year is unknown.
+        """
+        make, model, year = normalize_vehicle_name(make), normalize_vehicle_name(model), int(year)
+        vehicle = self._vehicles.get(_vehicle_key(make, model, year, normalize_engine(engine)).lower())
+        if vehicle is None:
+            vehicle = self._vehicles.get(_vehicle_key(make, model, year, SHARED_ENGINE).lower())
+        if vehicle is None:
+            return None
+        first, last = self._vehicle_runs[vehicle], self._vehicle_runs[vehicle + 1]
+        if category is None:
+            return self._postings[self._run_starts[first]:self._run_starts[last]]
+        category_id = self._category_ids.get(category.strip().lower())
+        run = bisect.bisect_left(self._run_categories, category_id, first, last) if category_id is not None else last
+        if run == last or self._run_categories[run] != category_id:
+            return self._postings[0:0]
+        return self._postings[self._run_starts[run]:self._run_starts[run + 1]]
+
+    def vehicle_options(self, make: str | None = None, model: str | None = None, year: int | None = None) -> list:
+        """Choices for the next vehicle selector: makes, then models of a make, years of a model, engines of a year."""
+        if make is None:
+            return sorted(self._tree, key=str.lower)
+        models = next((m for name, m in self._tree.items() if name.lower() == normalize_vehicle_name(make).lower()), {})
+        if model is None:
+            return sorted(models, key=str.lower)
+        years = next((y for name, y in models.items() if name.lower() == normalize_vehicle_name(model).lower()), {})
+        if year is None:
+            return sorted(years, reverse=True)
+        return sorted(years.get(int(year), []))
+
+    def stats(self) -> dict:
+        return {'path': self.path, 'parts': self.part_count, 'vehicles': len(self._vehicles),
+                'postings': len(self._postings), 'bytes': len(self._mmap)}
+
+
+# --- Shared index (built and refreshed by a background thread) ---
+_index: PartSearchIndex | None = None
+_fitment: FitmentIndex | None = None
+_refresher_thread: threading.Thread | None = None
+_last_full_build = 0.0
+_stats = {'full_builds': 0, 'refreshes': 0, 'parts_changed': 0, 'errors': 0, 'last_build_ms': 0.0}
+
+
+def get_parts_index() -> PartSearchIndex:
+    if _index is None:
+        raise CatalogNotReadyError("Parts catalog is still loading.")
+    return _index
+
+
+def rebuild_parts_index() -> PartSearchIndex:
+    """Loads every active part and swaps in a fresh index."""
+    global _index, _last_full_build
+    start = time.perf_counter()
+    index = PartSearchIndex.build(iter_active_parts(config.PARTS_INDEX_PAGE_SIZE, timeout=config.SUPABASE_DB_TIMEOUT_SECONDS * 3))
+    _index, _last_full_build = index, time.monotonic()
+    _stats['full_builds'] += 1
+    _stats['last_build_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"✅ Parts search index built: {index.size} parts in {_stats['last_build_ms']:.0f} ms.")
+    return index
+
+
+def get_fitment_index() -> FitmentIndex:
+    if _fitment is None:
+        raise FitmentIndexUnavailableError("Vehicle fitment index is not available.")
+    return _fitment
+
+
+def load_fitment_index(path: str | None = None) -> FitmentIndex | None:
+    """Maps the fitment index file (if it exists) and swaps it in; the previous mapping closes once unreferenced."""
+    global _fitment
+    path = path or config.FITMENT_INDEX_PATH
+    if not os.path.exists(path):
+        print(f"WARN: Fitment index '{path}' not found; build it with: python -m backend.scripts.build_fitment_index")
+        return None
+    _fitment = FitmentIndex(path)
+    print(f"✅ Fitment index loaded: {_fitment.stats()['vehicles']} vehicles, {_fitment.part_count} parts.")
+    return _fitment
+
+
+def _reload_fitment_if_changed() -> None:
+    path = config.FITMENT_INDEX_PATH
+    if os.path.exists(path) and (_fitment is None or os.path.getmtime(path) != _fitment.mtime):
+        load_fitment_index(path)
+
+
+def build_fitment_index_from_db(path: str | None = None) -> dict:
+    """Builds the fitment index file from 'parts' and 'part_fitments' (blocking; run offline)."""
+    timeout = config.SUPABASE_DB_TIMEOUT_SECONDS * 3
+    return build_fitment_file(path or config.FITMENT_INDEX_PATH,
+                              iter_active_parts(config.PARTS_INDEX_PAGE_SIZE, timeout=timeout),
+                              iter_part_fitments(timeout=timeout))
+
+
+def _refresh_since(watermark: str) -> str:
+    if not watermark:
+        return '1970-01-01T00:00:00+00:00'
+    moment = datetime.fromisoformat(watermark.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - timedelta(seconds=REFRESH_OVERLAP_SECONDS)).isoformat()
+
+
+def refresh_parts_index() -> int:
+    """Applies parts changed since the index watermark. Returns the number of parts changed."""
+    index = get_parts_index()
+    changed = index.apply(iter_parts_changed_since(_refresh_since(index.watermark), config.PARTS_INDEX_PAGE_SIZE,
+                                                   timeout=config.SUPABASE_DB_TIMEOUT_SECONDS * 3))
+    _stats['refreshes'] += 1
+    _stats['parts_changed'] += changed
+    if changed:
+        print(f"INFO: Parts search index refreshed: {changed} part(s) changed.")
+    return changed
+
+
+def _refresher_loop() -> None:
+    while True:
+        try:
+            if _index is None or time.monotonic() - _last_full_build >= config.PARTS_INDEX_REBUILD_SECONDS:
+                rebuild_parts_index()
+            else:
+                refresh_parts_index()
+            _reload_fitment_if_changed() # A rebuilt file (os.replace) has a new mtime
+        except Exception as e:
+            _stats['errors'] += 1
+            print(f"❌ ERROR loading parts search index: {type(e).__name__} - {e}")
+        # Until the first load succeeds, retry sooner than the refresh interval
+        time.sleep(config.PARTS_INDEX_REFRESH_SECONDS if _index is not None else min(10.0, config.PARTS_INDEX_REFRESH_SECONDS))
+
+
+def init_parts_search() -> None:
+    """Starts the background load + refresh thread. Searches answer CatalogNotReadyError until the first load completes."""
+    global _refresher_thread
+    if _refresher_thread is not None:
+        return
+    try:
+        load_fitment_index()
+    except Exception as e:
+        print(f"❌ ERROR loading fitment index: {type(e).__name__} - {e}")
+    _refresher_thread = threading.Thread(target=_refresher_loop, name='parts-index-refresher', daemon=True)
+    _refresher_thread.start()
+
+
+def parts_search_stats() -> dict:
+    return {**_stats, 'index': _index.stats() if _index is not None else None,
+            'fitment': _fitment.stats() if _fitment is not None else None}
@@ -0,0 +1,162 @@
+# backend/services/provisioning_service.py
+"""
+Bulk account provisioning for fleet and business customers.
+
+Rows are validated up front with the UserRegistration model; accounts are then
+created through the Supabase admin API with bounded concurrency, and the
+matching 'profiles' rows are upserted in batches. Per-row results are yielded
+as soon as each account is done so the API can stream them back.
+"""
+import asyncio
+import csv
+import io
+import time
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from gotrue.errors import AuthApiError
+
+from ..config import config
+from ..database.supabase_client import get_supabase_service_client
+from ..database.profile_repository import upsert_profiles
+from ..models.user_models import UserRegistration, UserProfile
+from ..utils.resilience import call_blocking
+
+
+def parse_bulk_rows(payload) -> list[dict]:
+    """Accepts a JSON list, {"users": [...]} or CSV text (header: email,password,full_name)."""
+    if isinstance(payload, str):
+        reader = csv.DictReader(io.StringIO(payload))
+        return [{k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k} for row in reader]
+    if isinstance(payload, dict):
+        payload = payload.get('users', [])
+    if not isinstance(payload, list):
+        raise ValueError("Expected a list of users, {\"users\": [...]}, or CSV text.")
+    return payload
+
+
+def validate_bulk_rows(raw_rows: list[dict]) -> tuple[list[UserRegistration], list[dict]]:
+    """Validates every row before anything is provisioned. Returns (valid_rows, errors)."""
+    valid: list[UserRegistration] = []
+    errors: list[dict] = []
+    seen_emails: set[str] = set()
+
+    if len(raw_rows) > config.BULK_REGISTRATION_MAX_ROWS:
+        return [], [{"row": None, "errors": [f"Batch exceeds the maximum of {config.BULK_REGISTRATION_MAX_ROWS} rows."]}]
+
+    for index, raw in enumerate(raw_rows):
+        if not isinstance(raw, dict):
+            errors.append({"row": index, "errors": [f"Expected an object with email and password, got {type(raw).__name__}."]})
+            continue
+        try:
+            row = UserRegistration(**{k: v for k, v in raw.items() if v not in (None, '')})
+        except (ValidationError, TypeError) as e:
+            details = e.errors() if isinstance(e, ValidationError) else [str(e)]
+            errors.append({"row": index, "errors": details})
+            continue
+        email_key = row.email.lower()
+        if email_key in seen_emails:
+            errors.append({"row": index, "errors": [f"Duplicate email in batch: {row.email}"]})
+            continue
+        seen_emails.add(email_key)
+        valid.append(row)
+    return valid, errors
+
+
+async def _upsert_profiles(profiles: list[dict]) -> None:
+    try:
+        await upsert_profiles(profiles)
+        print(f"✅ Upserted {len(profiles)} provisioned profiles.")
+    except Exception as e:
+        print(f"❌ ERROR upserting {len(profiles)} provisioned profiles: {type(e).__name__} - {e}")
+
+
+async def bulk_register_users(rows: list[UserRegistration], business: UserProfile) -> AsyncIterator[dict]:
+    """
+    Provisions already-validated rows for a business account.
+    Yields one result dict per row as it completes, then a final summary dict.
+    If the consumer stops early (client disconnected), rows not yet sent to the
+    auth API are dropped, but accounts already being created are waited for and
+    get their profiles.
+    """
+    supabase_service = get_supabase_service_client()
+    if not supabase_service:
+        yield {"summary": True, "error": "Bulk registration failed: Server configuration error."}
+        return
+
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(config.BULK_REGISTRATION_CONCURRENCY)
+    counts = {"created": 0, "exists": 0, "failed": 0}
+    pending_profiles: list[dict] = []
+    upserts: list[asyncio.Task] = []
+    submitted: set[int] = set() # Rows whose create_user call has gone out
+    collected: set[int] = set() # Rows whose result has been counted
+
+    def collect(result: dict) -> None:
+        collected.add(result["row"])
+        counts[result["status"]] += 1
+        if result["status"] == "created":
+            row = rows[result["row"]]
+            pending_profiles.append({
+                'id': result["user_id"],
+                'email': row.email,
+                'full_name': row.full_name,
+                'account_type': 'business',
+                'company_name': business.company_name,
+            })
+            if len(pending_profiles) >= config.BULK_REGISTRATION_PROFILE_BATCH_SIZE:
+                upserts.append(asyncio.create_task(_upsert_profiles(pending_profiles[:])))
+                pending_profiles.clear()
+
+    async def provision(index: int, row: UserRegistration) -> dict:
+        user_meta = {'company_name': business.company_name, 'provisioned_by': business.id}
+        if row.full_name:
+            user_meta['full_name'] = row.full_name
+        async with semaphore:
+            submitted.add(index)
+            try:
+                response = await call_blocking(
+                    'supabase_auth',
+                    supabase_service.auth.admin.create_user,
+                    {
+                        "email": row.email,
+                        "password": row.password,
+                        "email_confirm": True, # Accounts are vouched for by the business
+                        "user_metadata": user_meta,
+                    }
+                )
+                return {"row": index, "email": row.email, "status": "created", "user_id": response.user.id}
+            except AuthApiError as e:
+                message = str(e.message or e)
+                if "already" in message.lower() and "registered" in message.lower():
+                    return {"row": index, "email": row.email, "status": "exists", "message": "Email already registered."}
+                return {"row": index, "email": row.email, "status": "failed", "message": message}
+            except Exception as e:
+                print(f"Unexpected error provisioning {row.email}: {type(e).__name__} - {e}")
+                return {"row": index, "email": row.email, "status": "failed", "message": "Unexpected error."}
+
+    print(f"Bulk provisioning {len(rows)} accounts for business {business.id} (concurrency {config.BULK_REGISTRATION_CONCURRENCY})")
+    tasks = [asyncio.create_task(provision(i, row)) for i, row in enumerate(rows)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            collect(result)
+            yield result
+    finally:
+        # Normally a no-op. If the client disconnected: cancel rows still waiting for a slot, but wait for
+        # create_user calls already made - those accounts exist and need their profiles.
+        leftover = [task for index, task in enumerate(tasks) if index not in collected]
+        for index, task in enumerate(tasks):
+            if index not in collected and index not in submitted:
+                task.cancel()
+        for result in await asyncio.gather(*leftover, return_exceptions=True):
+            if isinstance(result, dict):
+                collect(result)
+        if pending_profiles:
+            upserts.append(asyncio.create_task(_upsert_profiles(pending_profiles[:])))
+            pending_profiles.clear()
+        await asyncio.gather(*upserts)
+
+    elapsed = time.perf_counter() - started
+    print(f"Bulk provisioning finished in {elapsed:.2f}s: {counts}")
+    yield {"summary": True, "total": len(rows), **counts, "elapsed_seconds": round(elapsed, 3)}
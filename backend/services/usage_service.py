@@ -0,0 +1,303 @@
+# backend/services/usage_service.py
+"""
+Per-user token usage metering and daily quotas for the AI Mechanic.
+
+Every agent run is recorded in memory (input, output and cached tokens plus the
+number of tool calls). Daily totals per user live in a dict, so the quota check
+before a run is a single lookup and never touches the database. Individual run
+records are buffered and written to the 'ai_usage_logs' table in batches by a
+background flusher thread.
+
+Each worker process keeps its own totals. After every flush they are re-synced
+from the 'ai_usage_daily_totals' view (what all workers have flushed, summed
+per user by the database, plus this process's unflushed runs), so quotas hold
+across workers but lag by up to one AI_USAGE_FLUSH_INTERVAL_SECONDS: a user can
+overshoot by whatever the workers admit within that window.
+
+Expected 'ai_usage_logs' columns:
+    user_id, session_id, usage_day (date), input_tokens, output_tokens,
+    cached_tokens, total_tokens, tool_calls, requests, created_at
+and the per-day view read by the re-sync (one row per user active that day):
+    create index on ai_usage_logs (usage_day, user_id);
+    create view ai_usage_daily_totals as
+        select usage_day, user_id, sum(input_tokens) as input_tokens, sum(output_tokens) as output_tokens,
+               sum(cached_tokens) as cached_tokens, sum(tool_calls) as tool_calls, count(*) as runs
+        from ai_usage_logs group by usage_day, user_id;
+Optional 'ai_usage_quotas' table (per-user overrides):
+    user_id, daily_token_limit (0 = unlimited)
+"""
+import atexit
+import heapq
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from ..config import config
+from ..database.supabase_client import get_supabase_service_client
+from ..database.async_db import run_query_sync, table
+from ..models.user_models import UserProfile
+
+USAGE_TABLE = 'ai_usage_logs'
+QUOTA_TABLE = 'ai_usage_quotas'
+DAILY_TOTALS_VIEW = 'ai_usage_daily_totals'
+SYNC_PAGE_SIZE = 1000 # PostgREST's default max rows per response
+
+
+class _DailyUsage:
+    """Running totals for one user on one usage day."""
+    __slots__ = ('day', 'input_tokens', 'output_tokens', 'cached_tokens', 'tool_calls', 'runs')
+
+    def __init__(self, day: str):
+        self.day = day
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.tool_calls = 0
+        self.runs = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            'usage_day': self.day,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cached_tokens': self.cached_tokens,
+            'total_tokens': self.total_tokens,
+            'tool_calls': self.tool_calls,
+            'runs': self.runs,
+        }
+
+
+# --- In-memory state (guarded by _lock) ---
+_lock = threading.Lock()
+_daily_usage: dict[str, _DailyUsage] = {}
+_quota_overrides: dict[str, int] = {}
+_pending_rows: list[dict] = []
+_flush_event = threading.Event()
+_flusher_thread: threading.Thread | None = None
+
+
+def _usage_day() -> str:
+    """Usage days follow Lagos time (UTC+1), matching the chat log timestamps."""
+    return (datetime.now(timezone.utc) + timedelta(hours=1)).date().isoformat()
+
+
+def _get_daily_usage_locked(user_id: str, day: str) -> _DailyUsage:
+    usage = _daily_usage.get(user_id)
+    if usage is None or usage.day != day:
+        usage = _DailyUsage(day)
+        _daily_usage[user_id] = usage
+    return usage
+
+
+def get_daily_token_quota(user_profile: UserProfile) -> int:
+    """Returns the daily token quota for a user (0 means unlimited)."""
+    override = _quota_overrides.get(str(user_profile.id))
+    if override is not None:
+        return override
+    if (user_profile.account_type or 'personal') == 'business':
+        return config.AI_DAILY_TOKEN_QUOTA_BUSINESS
+    return config.AI_DAILY_TOKEN_QUOTA_PERSONAL
+
+
+def check_quota(user_profile: UserProfile) -> tuple[bool, str | None]:
+    """
+    Checks whether the user may start another agent run today.
+    Pure in-memory lookup; safe to call on every request.
+    """
+    quota = get_daily_token_quota(user_profile)
+    if quota <= 0:
+        return True, None
+    day = _usage_day()
+    with _lock:
+        usage = _daily_usage.get(str(user_profile.id))
+        used = usage.total_tokens if usage is not None and usage.day == day else 0
+    if used >= quota:
+        return False, "You have reached your daily AI Mechanic usage limit. Please try again tomorrow."
+    return True, None
+
+
+def record_run_usage(user_id: str, session_id: str, usage, tool_calls: int = 0) -> None:
+    """
+    Records the usage of a finished agent run.
+    `usage` is the agents SDK `Usage` object from `RunResultStreaming.context_wrapper.usage`.
+    """
+    input_tokens = getattr(usage, 'input_tokens', 0) or 0
+    output_tokens = getattr(usage, 'output_tokens', 0) or 0
+    input_details = getattr(usage, 'input_tokens_details', None)
+    cached_tokens = getattr(input_details, 'cached_tokens', 0) or 0
+    requests = getattr(usage, 'requests', 0) or 0
+
+    user_id = str(user_id)
+    day = _usage_day()
+    row = {
+        'user_id': user_id,
+        'session_id': session_id,
+        'usage_day': day,
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'cached_tokens': cached_tokens,
+        'total_tokens': input_tokens + output_tokens,
+        'tool_calls': tool_calls,
+        'requests': requests,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    with _lock:
+        daily = _get_daily_usage_locked(user_id, day)
+        daily.input_tokens += input_tokens
+        daily.output_tokens += output_tokens
+        daily.cached_tokens += cached_tokens
+        daily.tool_calls += tool_calls
+        daily.runs += 1
+        _pending_rows.append(row)
+        should_flush = len(_pending_rows) >= config.AI_USAGE_FLUSH_BATCH_SIZE
+
+    print(f"Usage recorded for user {user_id}: in={input_tokens} out={output_tokens} cached={cached_tokens} tools={tool_calls}")
+    if should_flush:
+        _flush_event.set()
+
+
+def get_user_usage_today(user_id: str) -> dict:
+    """Returns today's usage totals for a single user."""
+    day = _usage_day()
+    with _lock:
+        usage = _daily_usage.get(str(user_id))
+        if usage is None or usage.day != day:
+            return _DailyUsage(day).to_dict()
+        return usage.to_dict()
+
+
+def get_top_consumers(limit: int = 10) -> list[dict]:
+    """Returns today's heaviest users by total tokens (served from memory)."""
+    day = _usage_day()
+    with _lock:
+        candidates = [(uid, u) for uid, u in _daily_usage.items() if u.day == day]
+        top = heapq.nlargest(limit, candidates, key=lambda item: item[1].total_tokens)
+        return [{'user_id': uid, **usage.to_dict()} for uid, usage in top]
+
+
+# --- Persistence ---
+
+def flush_usage() -> int:
+    """Writes buffered usage rows to the database in one insert. Returns rows written."""
+    with _lock:
+        if not _pending_rows:
+            return 0
+        batch = _pending_rows[:]
+        _pending_rows.clear()
+
+    supabase_service = get_supabase_service_client()
+    try:
+        if not supabase_service:
+            raise RuntimeError("Service client not available.")
+        run_query_sync(table(USAGE_TABLE).insert(batch))
+        print(f"✅ Flushed {len(batch)} AI usage rows to '{USAGE_TABLE}'.")
+        return len(batch)
+    except Exception as e:
+        print(f"❌ ERROR flushing AI usage rows: {type(e).__name__} - {e}")
+        with _lock:
+            # Put the batch back in front, but never buffer more than a few batches.
+            _pending_rows[:0] = batch
+            max_buffered = config.AI_USAGE_FLUSH_BATCH_SIZE * 10
+            if len(_pending_rows) > max_buffered:
+                dropped = len(_pending_rows) - max_buffered
+                del _pending_rows[:dropped]
+                print(f"WARN: Dropped {dropped} buffered AI usage rows (buffer full).")
+        return 0
+
+
+def _add_row(totals: dict[str, _DailyUsage], row: dict, day: str) -> None:
+    daily = totals.get(str(row['user_id']))
+    if daily is None:
+        daily = totals[str(row['user_id'])] = _DailyUsage(day)
+    daily.input_tokens += row.get('input_tokens') or 0
+    daily.output_tokens += row.get('output_tokens') or 0
+    daily.cached_tokens += row.get('cached_tokens') or 0
+    daily.tool_calls += row.get('tool_calls') or 0
+    daily.runs += row.get('runs', 1) # A view row sums many runs, a buffered row is one
+
+
+def sync_daily_totals() -> int:
+    """
+    Replaces today's in-memory totals with what every worker has flushed to the
+    database (summed per user by the daily totals view) plus this process's
+    unflushed runs. Returns the users counted.
+    """
+    day = _usage_day()
+    totals: dict[str, _DailyUsage] = {}
+    start = 0
+    while True:
+        response = run_query_sync(
+            table(DAILY_TOTALS_VIEW)
+            .select('user_id, input_tokens, output_tokens, cached_tokens, tool_calls, runs')
+            .eq('usage_day', day)
+            .order('user_id')
+            .range(start, start + SYNC_PAGE_SIZE - 1)
+        )
+        rows = response.data or []
+        for row in rows:
+            _add_row(totals, row, day)
+        if len(rows) < SYNC_PAGE_SIZE:
+            break
+        start += SYNC_PAGE_SIZE
+    with _lock:
+        # Runs recorded since the query are still buffered, so nothing is lost or counted twice
+        for row in _pending_rows:
+            if row['usage_day'] == day:
+                _add_row(totals, row, day)
+        for user_id in [uid for uid, usage in _daily_usage.items() if usage.day == day and uid not in totals]:
+            del _daily_usage[user_id]
+        _daily_usage.update(totals)
+    return len(totals)
+
+
+def _load_initial_state() -> None:
+    """Seeds today's totals and per-user quota overrides from the database (once, at startup)."""
+    supabase_service = get_supabase_service_client()
+    if not supabase_service:
+        print("WARN: Service client not available; AI usage counters start empty.")
+        return
+    try:
+        print(f"Loaded today's AI usage for {sync_daily_totals()} users.")
+    except Exception as e:
+        print(f"WARN: Could not load today's AI usage totals: {type(e).__name__} - {e}")
+
+    try:
+        response = run_query_sync(table(QUOTA_TABLE).select('user_id, daily_token_limit'))
+        with _lock:
+            for row in response.data or []:
+                _quota_overrides[str(row['user_id'])] = int(row['daily_token_limit'] or 0)
+        print(f"Loaded {len(_quota_overrides)} AI usage quota overrides.")
+    except Exception as e:
+        print(f"WARN: Could not load AI usage quota overrides: {type(e).__name__} - {e}")
+
+
+def _flusher_loop() -> None:
+    while True:
+        _flush_event.wait(timeout=config.AI_USAGE_FLUSH_INTERVAL_SECONDS)
+        _flush_event.clear()
+        try:
+            flush_usage()
+        except Exception:
+            traceback.print_exc()
+        if get_supabase_service_client():
+            try:
+                sync_daily_totals() # Picks up what other workers flushed
+            except Exception as e:
+                print(f"WARN: Could not re-sync AI usage totals: {type(e).__name__} - {e}")
+
+
+def init_usage_metering() -> None:
+    """Loads initial state and starts the background flusher. Safe to call more than once."""
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    _load_initial_state()
+    _flusher_thread = threading.Thread(target=_flusher_loop, name='ai-usage-flusher', daemon=True)
+    _flusher_thread.start()
+    atexit.register(flush_usage)
+    print("AI usage metering initialized.")
@@ -4,9 +4,47 @@ from supabase import Client, create_client
 from postgrest.exceptions import APIError
 # Import BOTH client getters and necessary models/types
 from ..database.supabase_client import get_supabase_anon_client, get_supabase_service_client
+from ..database.profile_repository import get_profile, get_profiles, profile_exists, update_profile
 from ..models.user_models import UserProfileUpdate, UserProfile
+from ..config import config
+from ..utils.cache import TTLCache
 from uuid import UUID # Import UUID for type hinting
-import asyncio # <<< ADD asyncio import
+
+# --- Profile Cache ---
+# Profiles keyed by user id. update_user_profile is the only writer of 'profiles',
+# so it writes through to this cache; the TTL bounds staleness across workers.
+profile_cache = TTLCache(
+    maxsize=config.PROFILE_CACHE_MAX_ENTRIES,
+    ttl=config.PROFILE_CACHE_TTL_SECONDS,
+    name='profiles',
+)
+
+def get_cached_profile(user_id: UUID | str) -> UserProfile | None:
+    """Returns the cached profile for a user, or None on a miss."""
+    return profile_cache.get(str(user_id))
+
+def cache_profile(profile: UserProfile) -> None:
+    """Stores a profile loaded from (or just written to) the database."""
+    profile_cache.set(str(profile.id), profile)
+
+def invalidate_cached_profile(user_id: UUID | str) -> None:
+    profile_cache.delete(str(user_id))
+
+async def get_user_profiles(user_ids: list[UUID | str]) -> dict[str, UserProfile]:
+    """Profiles for many users: cache hits first, then one batched query for the rest."""
+    found: dict[str, UserProfile] = {}
+    missing: list[str] = []
+    for user_id in dict.fromkeys(str(u) for u in user_ids):
+        cached = get_cached_profile(user_id)
+        if cached:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+    if missing:
+        for user_id, profile in (await get_profiles(missing)).items():
+            cache_profile(profile)
+            found[user_id] = profile
+    return found
 
 async def update_user_profile(user_id: UUID | str, profile_data: UserProfileUpdate) -> tuple[UserProfile | None, str | None]:
     """Updates a user's profile in the public.profiles table."""
@@ -21,23 +59,14 @@ async def update_user_profile(user_id: UUID | str, profile_data: UserProfileUpda
 
     # If no fields were provided in the update request
     if not update_payload:
+        cached_profile = get_cached_profile(user_id_str)
+        if cached_profile:
+            return cached_profile, "No update data provided, returning current profile."
         try:
             # Fetch the current profile to return it
-            # <<< WRAP synchronous call in asyncio.to_thread >>>
-            current_profile_response = await asyncio.to_thread(
-                supabase_service.table('profiles')
-                                .select('*')
-                                .eq('id', user_id_str)
-                                .limit(1)
-                                .execute
-            )
-            if current_profile_response.data:
-                profile_data_dict = current_profile_response.data[0]
-                # Ensure necessary fields are strings for Pydantic model
-                profile_data_dict['id'] = str(profile_data_dict['id'])
-                profile_data_dict['created_at'] = str(profile_data_dict.get('created_at', ''))
-                # profile_data_dict['updated_at'] = str(profile_data_dict.get('updated_at', '')) # If needed
-                current_profile = UserProfile(**profile_data_dict)
+            current_profile = await get_profile(user_id_str)
+            if current_profile:
+                cache_profile(current_profile)
                 return current_profile, "No update data provided, returning current profile."
             else:
                 # This case should ideally not happen if the user_id is valid
@@ -49,51 +78,25 @@ async def update_user_profile(user_id: UUID | str, profile_data: UserProfileUpda
     print(f"Attempting to update profile for user {user_id_str} with payload: {update_payload}")
 
     try:
-        # Perform the update
-        # <<< WRAP synchronous call in asyncio.to_thread >>>
-        response = await asyncio.to_thread(
-            supabase_service.table('profiles')
-                            .update(update_payload)
-                            .eq('id', user_id_str)
-                            # Use 'minimal' return to just get confirmation, then fetch fresh data
-                            .execute
-        )
-
-        print(f"Supabase profile update response for user {user_id_str}: {response}")
-
-        # After a successful update, fetch the complete updated profile
-        # <<< WRAP synchronous call in asyncio.to_thread >>>
-        updated_profile_response = await asyncio.to_thread(
-            supabase_service.table('profiles')
-                            .select('*')
-                            .eq('id', user_id_str)
-                            .limit(1)
-                            .execute
-        )
+        # Perform the update; PostgREST returns the updated row, so no re-select is needed
+        updated_profile = await update_profile(user_id_str, update_payload)
 
-        if updated_profile_response.data:
-            profile_data_dict = updated_profile_response.data[0]
-            # Ensure necessary fields are strings for Pydantic model
-            profile_data_dict['id'] = str(profile_data_dict['id'])
-            profile_data_dict['created_at'] = str(profile_data_dict.get('created_at', ''))
-            # profile_data_dict['updated_at'] = str(profile_data_dict.get('updated_at', '')) # If needed
-            updated_profile = UserProfile(**profile_data_dict)
+        if updated_profile:
+            cache_profile(updated_profile) # Write-through
             print(f"Profile for user {user_id_str} updated successfully.")
             return updated_profile, "Profile updated successfully."
         else:
-             # This case might happen if RLS prevents reading after update, though service key should bypass
-             print(f"WARN: Profile update successful for {user_id_str}, but failed to fetch updated profile.")
-             return None, "Profile updated, but failed to retrieve latest data."
+             # No row matched the id
+             invalidate_cached_profile(user_id_str)
+             print(f"ERROR: Profile update failed for {user_id_str}: User profile not found.")
+             return None, "Profile update failed: User profile not found."
 
     except APIError as e:
         print(f"Supabase DB Error updating profile for {user_id_str}: {e}")
+        invalidate_cached_profile(user_id_str)
         # Check if the error indicates the profile doesn't exist
         if "0 rows" in str(e.message).lower() or e.code == 'PGRST116': # PGRST116 often means no rows updated/found
-             # <<< WRAP synchronous call in asyncio.to_thread >>>
-             check_response = await asyncio.to_thread(
-                 supabase_service.table('profiles').select('id').eq('id', user_id_str).limit(1).execute
-             )
-             if not check_response.data:
+             if not await profile_exists(user_id_str):
                  print(f"ERROR: Profile update failed for {user_id_str}: User profile not found.")
                  return None, "Profile update failed: User profile not found."
              else:
@@ -0,0 +1,76 @@
+# backend/tests/test_admin_api.py
+"""/api/admin endpoints with an admin resolved from a stubbed token lookup."""
+import threading
+
+import pytest
+from flask import Flask
+
+from backend.api import decorators
+from backend.api.admin import admin_bp
+from backend.config import config
+from backend.models.user_models import UserProfile
+from backend.services import campaign_service
+from backend.services.notification_templates import notification_templates
+
+ADMIN = UserProfile(id='a1', email='admin@example.com', created_at='2026-01-01T00:00:00+00:00')
+PHONE_ONLY = UserProfile.model_construct(id='u2', email=None, phone='+15550100', created_at='2026-01-01T00:00:00+00:00')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def get_user_from_token(token, verify_remote=False):
+        return {'admin-token': ADMIN, 'phone-token': PHONE_ONLY}.get(token)
+
+    monkeypatch.setattr(decorators, 'get_user_from_token', get_user_from_token)
+    monkeypatch.setattr(config, 'ADMIN_USER_EMAILS', [ADMIN.email])
+    notification_templates.load_all() # Done at startup by the app
+    app = Flask(__name__)
+    app.register_blueprint(admin_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def started(monkeypatch):
+    calls = []
+    monkeypatch.setattr('backend.api.admin.start_campaign', lambda *args: calls.append(args) or True)
+    return calls
+
+
+def test_user_without_email_is_not_admin(client):
+    response = client.get('/api/admin/campaigns/spring', headers={'Authorization': 'Bearer phone-token'})
+    assert response.status_code == 403
+
+
+def _post_campaign(client, context):
+    return client.post('/api/admin/campaigns', headers={'Authorization': 'Bearer admin-token'},
+                       json={'campaign_id': 'spring', 'template': 'campaign_announcement', 'context': context})
+
+
+@pytest.mark.parametrize('context', [
+    {'message': 'Sale on brakes'}, # No headline
+    {'headline': 'Spring sale', 'message': 'Sale on brakes', 'cta_url': 'https://example.com'}, # No cta_text
+])
+def test_campaign_with_incomplete_context_is_rejected(client, started, context):
+    response = _post_campaign(client, context)
+    assert response.status_code == 400
+    assert 'needs more context' in response.get_json()['message']
+    assert started == []
+
+
+def test_campaign_with_complete_context_starts(client, started):
+    response = _post_campaign(client, {'headline': 'Spring sale', 'message': 'Sale on brakes'})
+    assert response.status_code == 202
+    assert started == [('spring', 'campaign_announcement', {'headline': 'Spring sale', 'message': 'Sale on brakes'})]
+    assert _post_campaign(client, ['headline']).status_code == 400
+
+
+def test_campaign_thread_logs_failures(monkeypatch, capsys):
+    async def failing_run(campaign_id, template, context, progress):
+        raise RuntimeError('SendGrid API Key or From Email not configured.')
+    monkeypatch.setattr(campaign_service, '_run_claimed', failing_run)
+    assert campaign_service.start_campaign('autumn', 'campaign_announcement', {})
+    for thread in threading.enumerate():
+        if thread.name == 'campaign-autumn':
+            thread.join()
+    assert "Campaign 'autumn' did not complete: RuntimeError" in capsys.readouterr().out
+    campaign_service._running.clear()
@@ -0,0 +1,70 @@
+# backend/tests/test_auth_api.py
+"""Password and logout routes of /api/auth, with the token lookup and auth service stubbed."""
+import pytest
+from flask import Flask
+
+from backend.api import auth, decorators
+from backend.models.user_models import UserProfile
+
+USER = UserProfile(id='u1', email='driver@example.com', created_at='2026-01-01T00:00:00+00:00')
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {'lookups': [], 'service': []}
+
+    async def get_user_from_token(token, verify_remote=False):
+        calls['lookups'].append((token, verify_remote))
+        return USER if token == 'good-token' else None
+
+    async def set_password(access_token, data, user_id=None):
+        calls['service'].append((access_token, data.new_password, user_id))
+        return True, 'ok'
+
+    async def logout_user(access_token):
+        calls['service'].append(access_token)
+        return True, 'bye'
+
+    monkeypatch.setattr(decorators, 'get_user_from_token', get_user_from_token)
+    monkeypatch.setattr(auth, 'change_user_password', set_password)
+    monkeypatch.setattr(auth, 'reset_user_password', set_password)
+    monkeypatch.setattr(auth, 'logout_user', logout_user)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(auth.auth_bp)
+    return app.test_client()
+
+
+def test_change_password_resolves_the_session_once(client, calls):
+    body = {'current_password': 'old-secret', 'new_password': 'new-secret', 'confirm_new_password': 'new-secret'}
+    response = client.put('/api/auth/password', json=body, headers={'Authorization': 'Bearer good-token'})
+    assert response.status_code == 200
+    assert calls['lookups'] == [('good-token', True)]
+    assert calls['service'] == [('good-token', 'new-secret', 'u1')]
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Token good-token'}, {'Authorization': 'Bearer bad-token'}])
+def test_change_password_requires_a_valid_session(client, calls, headers):
+    response = client.put('/api/auth/password', json={}, headers=headers)
+    assert response.status_code == 401
+    assert calls['service'] == []
+
+
+def test_reset_password_with_expired_link(client, calls):
+    response = client.post('/api/auth/reset-password', json={'new_password': 'new-secret'},
+                           headers={'Authorization': 'Bearer bad-token'})
+    assert response.status_code == 401
+    assert 'reset link has expired' in response.get_json()['message']
+    assert client.post('/api/auth/reset-password', json={}).get_json()['message'].startswith('Password reset failed.')
+    assert calls['service'] == []
+
+
+def test_logout_token_is_optional(client, calls):
+    assert client.post('/api/auth/logout').status_code == 200
+    assert client.post('/api/auth/logout', headers={'Authorization': 'Bearer good-token'}).status_code == 200
+    assert calls['service'] == [None, 'good-token']
+    assert calls['lookups'] == []
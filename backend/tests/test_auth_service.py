@@ -0,0 +1,59 @@
+# backend/tests/test_auth_service.py
+"""Password changes without a service key: the pooled session-isolated auth clients, on the fake Supabase backend."""
+import asyncio
+
+import pytest
+
+from backend.config import config
+from backend.database import supabase_client
+from backend.database.fake_supabase import fake_store
+from backend.models.user_models import UserPasswordChange
+from backend.services.auth_service import change_user_password
+
+
+@pytest.fixture
+def no_service_key(monkeypatch):
+    monkeypatch.setattr(config, 'DB_BACKEND', 'fake')
+    for client in ('supabase_anon', 'supabase_service'): # Restored after the test, like the config
+        monkeypatch.setattr(supabase_client, client, getattr(supabase_client, client))
+    supabase_client.init_supabase_client()
+    supabase_client.supabase_service = None # As when SUPABASE_SERVICE_KEY is not set
+    monkeypatch.setattr(fake_store, 'latency_ms', fake_store.latency_ms)
+    monkeypatch.setattr(fake_store, 'failure_rate', fake_store.failure_rate)
+    fake_store.configure('1-5', 0.0) # Lets the flows interleave
+    fake_store.reset()
+
+
+def _change(token: str, password: str):
+    return change_user_password(token, UserPasswordChange(current_password='old-password', new_password=password,
+                                                          confirm_new_password=password))
+
+
+def test_concurrent_changes_use_isolated_clients(no_service_key):
+    users = [fake_store.create_user(f"user{i}@example.com", 'old-password') for i in range(20)]
+    tokens = [fake_store.issue_session(user['id']).access_token for user in users]
+
+    async def change_all():
+        return await asyncio.gather(*(_change(token, f"new-password-{i}") for i, token in enumerate(tokens)))
+
+    results = asyncio.run(change_all())
+
+    assert all(ok for ok, _ in results)
+    assert [fake_store.users[user['id']]['password'] for user in users] == [f"new-password-{i}" for i in range(20)]
+    assert not fake_store.sessions # Every changed user's sessions are revoked
+    assert supabase_client.get_supabase_anon_client().auth._session_token is None # The shared client is never used
+    pooled = list(supabase_client._auth_client_pool.queue)
+    assert 0 < len(pooled) <= config.AUTH_CLIENT_POOL_SIZE
+    assert all(client.auth._session_token is None for client in pooled)
+
+
+def test_invalid_token_leaves_no_session_on_the_pooled_client(no_service_key):
+    user = fake_store.create_user('user@example.com', 'old-password')
+    token = fake_store.issue_session(user['id']).access_token
+    fake_store.sessions.clear() # Signed out elsewhere
+
+    ok, message = asyncio.run(_change(token, 'new-password'))
+
+    assert not ok
+    assert fake_store.users[user['id']]['password'] == 'old-password'
+    assert all(client.auth._session_token is None for client in supabase_client._auth_client_pool.queue)
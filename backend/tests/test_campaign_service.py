@@ -0,0 +1,73 @@
+# backend/tests/test_campaign_service.py
+import asyncio
+
+import pytest
+
+from backend.config import config
+from backend.database.profile_repository import ProfileContact
+from backend.services import campaign_service
+
+
+class MemoryStore:
+    def __init__(self):
+        self.checkpoints = {}
+
+    async def load(self, campaign_id):
+        checkpoint = self.checkpoints.get(campaign_id)
+        return dict(checkpoint) if checkpoint else None
+
+    async def save(self, checkpoint):
+        self.checkpoints[checkpoint['campaign_id']] = dict(checkpoint)
+
+
+@pytest.fixture
+def sendgrid(monkeypatch):
+    contacts = [ProfileContact(f'u{i:02d}', f'user{i}@example.com', f'User {i}', None) for i in range(25)]
+    sent, fail_calls, calls = [], set(), []
+
+    async def iter_contacts(after_id=None, page_size=1000):
+        for contact in contacts:
+            if after_id is None or contact.id > after_id:
+                yield contact
+
+    def post(payload):
+        calls.append(payload)
+        if len(calls) in fail_calls:
+            raise ValueError('bad request')
+        sent.append([p['to'][0]['email'] for p in payload['personalizations']])
+
+    monkeypatch.setattr(config, 'SENDGRID_API_KEY', 'key')
+    monkeypatch.setattr(config, 'SENDGRID_FROM_EMAIL', 'shop@example.com')
+    monkeypatch.setattr(config, 'CAMPAIGN_BATCH_SIZE', 10)
+    monkeypatch.setattr(campaign_service, '_store', MemoryStore())
+    monkeypatch.setattr(campaign_service, 'iter_profile_contacts', iter_contacts)
+    monkeypatch.setattr(campaign_service, 'post_sendgrid_mail', post)
+    monkeypatch.setattr(campaign_service, 'render_notification', lambda template, **context: None)
+    monkeypatch.setattr(campaign_service, '_payload', lambda campaign_id, message, batch: {
+        'personalizations': [{'to': [{'email': contact.email}]} for contact in batch]})
+    return sent, fail_calls
+
+
+def test_resumed_run_reports_its_own_sends(sendgrid):
+    sent, fail_calls = sendgrid
+    fail_calls.add(2) # Second batch is rejected; the first one stays sent
+    with pytest.raises(ValueError):
+        asyncio.run(campaign_service.run_campaign('spring', 'campaign'))
+    assert campaign_service._running == {}
+
+    result = asyncio.run(campaign_service.run_campaign('spring', 'campaign'))
+    assert result['status'] == 'completed'
+    assert result['sent'] == 25
+    assert result['sent_this_run'] == 15
+    assert sum(map(len, sent)) == 25
+    assert campaign_service._running == {}
+
+
+def test_campaign_runs_once_per_process(sendgrid):
+    assert campaign_service._claim('spring') is not None
+    try:
+        assert campaign_service.start_campaign('spring', 'campaign') is False
+        with pytest.raises(RuntimeError):
+            asyncio.run(campaign_service.run_campaign('spring', 'campaign'))
+    finally:
+        campaign_service._running.clear()
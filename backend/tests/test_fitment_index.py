@@ -0,0 +1,52 @@
+# backend/tests/test_fitment_index.py
+"""Fitment index lookups by make, model, year and engine."""
+import pytest
+
+from backend.database.part_repository import FitmentRow, PartRecord
+from backend.services.part_service import FitmentIndex, build_fitment_file
+
+
+def _part(part_id: str, category: str) -> PartRecord:
+    return PartRecord(part_id, part_id.upper(), part_id, None, category, None, (), 1.0, 1, True, '')
+
+
+@pytest.fixture
+def fitment(tmp_path):
+    parts = [_part('wiper', 'Wipers'), _part('filter-18', 'Filters'), _part('filter-20', 'Filters'),
+             _part('plug-20', 'Ignition')]
+    fitments = [
+        FitmentRow('wiper', 'Honda', 'Civic', 2012, 2013, None),
+        FitmentRow('filter-18', 'Honda', 'Civic', 2013, 2013, '1.8'),
+        FitmentRow('filter-20', 'Honda', 'Civic', 2012, 2013, '2.0'),
+        FitmentRow('plug-20', 'Honda', 'Civic', 2012, 2012, '2.0'),
+    ]
+    path = str(tmp_path / 'fitment.idx')
+    build_fitment_file(path, parts, fitments)
+    return FitmentIndex(path)
+
+
+def _ids(fitment, postings):
+    return sorted(fitment.part_id(ordinal) for ordinal in postings)
+
+
+def test_engine_specific_parts_include_engine_agnostic_ones(fitment):
+    assert _ids(fitment, fitment.parts_for('Honda', 'Civic', 2012, '2.0')) == ['filter-20', 'plug-20', 'wiper']
+    assert _ids(fitment, fitment.parts_for('honda', 'civic', 2013, '1.8')) == ['filter-18', 'wiper']
+
+
+def test_engine_without_fitments_gets_engine_agnostic_parts_only(fitment):
+    assert _ids(fitment, fitment.parts_for('Honda', 'Civic', 2012, '1.8')) == ['wiper']
+    assert _ids(fitment, fitment.parts_for('Honda', 'Civic', 2012, '1.8', category='Wipers')) == ['wiper']
+    assert _ids(fitment, fitment.parts_for('Honda', 'Civic', 2012, '1.8', category='Filters')) == []
+
+
+def test_any_engine_and_unknown_vehicles(fitment):
+    assert _ids(fitment, fitment.parts_for('Honda', 'Civic', 2012)) == ['filter-20', 'plug-20', 'wiper']
+    assert fitment.parts_for('Honda', 'Civic', 2011, '1.8') is None
+    assert fitment.parts_for('Honda', 'Accord', 2012) is None
+
+
+def test_vehicle_options_list_real_engines_only(fitment):
+    assert fitment.vehicle_options('Honda', 'Civic') == [2013, 2012]
+    assert fitment.vehicle_options('Honda', 'Civic', 2012) == ['2.0L']
+    assert fitment.vehicle_options('Honda', 'Civic', 2013) == ['1.8L', '2.0L']
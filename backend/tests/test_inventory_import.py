@@ -0,0 +1,129 @@
+# backend/tests/test_inventory_import.py
+"""Resumable supplier imports against the in-memory fake Supabase backend."""
+import csv
+
+import pytest
+
+from backend.config import config
+from backend.database import supabase_client
+from backend.database.fake_supabase import fake_store
+from backend.database.import_store import create_import_store
+from backend.services import inventory_import_service
+from backend.services.inventory_import_service import _RejectsFile, run_import
+
+# Data starts on line 2. Chunks of 3 valid rows end on lines 5, 10, 14 and 15.
+SUPPLIER_FILE = """sku,name,price,stock
+S01,,12.50,
+S02,,10.00,5
+S03,,abc,
+S04,,,7
+S01,,99,
+NEW1,New part,5,1
+NEW2,,5,
+,Nameless,1,
+S05,,11,
+S06,,10,5
+S07,,13,
+S08,,,
+S09,,14,2
+S10,,10.004,
+"""
+REJECTED_LINES = [4, 6, 8, 9, 13]
+
+
+def _part(i: int) -> dict:
+    return {'id': f'p{i:03d}', 'sku': f'S{i:02d}', 'name': f'Part {i}', 'brand': None, 'category': None,
+            'part_number': None, 'oem_numbers': [], 'price': 10.0, 'stock': 5, 'is_active': True,
+            'updated_at': '2025-01-01T00:00:00+00:00'}
+
+
+@pytest.fixture
+def supplier_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'DB_BACKEND', 'fake')
+    for client in ('supabase_anon', 'supabase_service'): # Restored after the test, like the config
+        monkeypatch.setattr(supabase_client, client, getattr(supabase_client, client))
+    supabase_client.init_supabase_client()
+    fake_store.reset()
+    fake_store.seed({'parts': [_part(i) for i in range(1, 11)]})
+    monkeypatch.setattr(config, 'JOB_STATE_BACKEND', 'sqlite')
+    monkeypatch.setattr(config, 'JOB_STATE_SQLITE_PATH', str(tmp_path / 'jobs.sqlite3'))
+    monkeypatch.setattr(config, 'INVENTORY_IMPORT_CHUNK_SIZE', 3)
+    monkeypatch.setattr(config, 'INVENTORY_IMPORT_CONCURRENCY', 2)
+    monkeypatch.setattr(config, 'INVENTORY_IMPORT_PROGRESS_SECONDS', 3600.0)
+    path = tmp_path / 'supplier.csv'
+    path.write_text(SUPPLIER_FILE, encoding='utf-8')
+    return str(path)
+
+
+def _catalog() -> dict[str, tuple]:
+    return {row['sku']: (row['name'], row['price'], row['stock']) for row in fake_store.tables['parts']}
+
+
+def _reject_lines(path: str) -> list[int]:
+    with open(f"{path}.rejects.csv", newline='', encoding='utf-8') as f:
+        return [int(row[0]) for row in list(csv.reader(f))[1:]]
+
+
+def _assert_imported(report: dict, path: str) -> None:
+    assert report['status'] == 'completed'
+    assert report['last_line'] == 15
+    assert (report['row_count'], report['updated'], report['inserted'], report['unchanged'], report['rejected']) == (14, 5, 1, 3, 5)
+    assert sorted(_reject_lines(path)) == REJECTED_LINES # Each rejected line exactly once
+    catalog = _catalog()
+    assert catalog['S01'] == ('Part 1', 12.5, 5) # The duplicate on line 6 does not apply
+    assert catalog['S04'] == ('Part 4', 10.0, 7)
+    assert catalog['S07'] == ('Part 7', 13.0, 5)
+    assert catalog['S09'] == ('Part 9', 14.0, 2)
+    assert catalog['S10'] == ('Part 10', 10.0, 5)
+    assert catalog['NEW1'] == ('New part', 5.0, 1)
+    assert 'NEW2' not in catalog
+
+
+def test_import_counts_updates_inserts_and_rejects(supplier_file):
+    report = run_import(supplier_file)
+
+    _assert_imported(report, supplier_file)
+    with open(f"{supplier_file}.rejects.csv", newline='', encoding='utf-8') as f:
+        reasons = {int(row[0]): row[2] for row in list(csv.reader(f))[1:]}
+    assert reasons[6] == 'duplicate sku (first row applies)'
+    assert reasons[8] == 'new sku without a name'
+    assert reasons[9] == 'missing sku'
+    assert reasons[13] == 'no values to import'
+
+
+def test_import_resumes_after_a_failed_chunk(supplier_file, monkeypatch):
+    upsert = inventory_import_service.upsert_parts_by_sku
+
+    def failing_upsert(rows, timeout=None):
+        if any(row['sku'] == 'S07' for row in rows):
+            raise ValueError('constraint violation')
+        return upsert(rows, timeout=timeout)
+
+    monkeypatch.setattr(inventory_import_service, 'upsert_parts_by_sku', failing_upsert)
+    with pytest.raises(ValueError):
+        run_import(supplier_file, import_id='supplier')
+    checkpoint = create_import_store().load('supplier')
+    assert checkpoint['status'] == 'failed'
+    assert checkpoint['last_line'] <= 10 # Never past the failed chunk
+    assert 'constraint violation' in checkpoint['last_error']
+
+    monkeypatch.setattr(inventory_import_service, 'upsert_parts_by_sku', upsert)
+    report = run_import(supplier_file, import_id='supplier')
+
+    assert report['resumed_after_line'] == checkpoint['last_line']
+    _assert_imported(report, supplier_file)
+
+
+def test_rejects_file_keeps_only_lines_through_the_checkpoint(tmp_path):
+    path = tmp_path / 'supplier.csv.rejects.csv'
+    path.write_text("line,sku,reason\n4,S03,invalid price 'abc'\n9,,missing sku\n13,S08,no values to import\n",
+                    encoding='utf-8')
+
+    rejects = _RejectsFile(str(path), keep_through_line=10)
+    rejects.write(13, 'S08', 'no values to import')
+    rejects.close()
+
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['line', 'sku', 'reason'], ['4', 'S03', "invalid price 'abc'"], ['9', '', 'missing sku'],
+                    ['13', 'S08', 'no values to import']]
@@ -0,0 +1,55 @@
+# backend/tests/test_notification_outbox.py
+import time
+
+from backend.config import config
+from backend.database.outbox_store import OutboxMessage
+from backend.services.notification_outbox import OutboxWorker
+
+
+class QueueStore:
+    """Due messages per channel; counts claim calls."""
+
+    def __init__(self):
+        self.due = {'email': [], 'sms': []}
+        self.claims = {'email': 0, 'sms': 0}
+        self.sent = []
+
+    async def claim(self, channel, limit, lease_seconds):
+        self.claims[channel] += 1
+        claimed, self.due[channel] = self.due[channel][:limit], self.due[channel][limit:]
+        return claimed
+
+    async def mark_sent(self, message_id):
+        self.sent.append(message_id)
+
+    async def purge_sent(self, older_than_seconds):
+        return 0
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_wake_only_runs_the_channel_dispatcher(monkeypatch):
+    monkeypatch.setattr(config, 'OUTBOX_POLL_SECONDS', 60)
+    store = QueueStore()
+
+    async def deliver(message):
+        return True
+    worker = OutboxWorker(store, deliver, {'email': 2, 'sms': 2})
+    worker.start()
+    _wait_for(lambda: store.claims == {'email': 1, 'sms': 1})
+
+    store.due['email'] = [OutboxMessage(1, 'email', ['a@example.com'], 'Hi', 'Hello', None, 1)]
+    worker.wake('email')
+    _wait_for(lambda: store.sent == [1])
+    time.sleep(0.05)
+    assert store.claims['sms'] == 1
+    assert store.claims['email'] >= 2
+
+    store.due['sms'] = [OutboxMessage(2, 'sms', ['+15550100'], None, 'Hello', None, 1)]
+    worker.wake()
+    _wait_for(lambda: store.sent == [1, 2])
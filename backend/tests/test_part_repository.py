@@ -0,0 +1,44 @@
+# backend/tests/test_part_repository.py
+"""part_repository against the in-memory fake Supabase backend."""
+import pytest
+
+from backend.config import config
+from backend.database import supabase_client
+from backend.database.fake_supabase import fake_store
+from backend.database.part_repository import iter_parts_changed_since
+
+
+def _part(i: int, updated_at: str) -> dict:
+    return {'id': f'p{i:03d}', 'sku': f'SKU-{i:03d}', 'name': f'Part {i}', 'brand': None, 'category': None,
+            'part_number': None, 'oem_numbers': [], 'price': 1.0, 'stock': 1, 'is_active': True, 'updated_at': updated_at}
+
+
+@pytest.fixture
+def parts_table(monkeypatch):
+    monkeypatch.setattr(config, 'DB_BACKEND', 'fake')
+    for client in ('supabase_anon', 'supabase_service'): # Restored after the test, like the config
+        monkeypatch.setattr(supabase_client, client, getattr(supabase_client, client))
+    supabase_client.init_supabase_client()
+    fake_store.reset()
+    # Two bulk writes sharing a timestamp each, then singles
+    rows = [_part(i, '2025-01-01T00:00:01+00:00') for i in range(5)]
+    rows += [_part(i, '2025-01-01T00:00:02+00:00') for i in range(5, 9)]
+    rows += [_part(i, f'2025-01-01T00:00:{i:02d}+00:00') for i in range(10, 14)]
+    fake_store.seed({'parts': rows})
+    return fake_store.tables['parts']
+
+
+def test_changed_since_pages_through_equal_timestamps(parts_table):
+    seen = [part.id for part in iter_parts_changed_since('2025-01-01T00:00:00+00:00', page_size=3)]
+    assert seen == [row['id'] for row in parts_table]
+
+
+def test_row_updated_mid_scan_does_not_hide_others(parts_table):
+    seen = []
+    for part in iter_parts_changed_since('2025-01-01T00:00:00+00:00', page_size=3):
+        seen.append(part.id)
+        if len(seen) == 3:
+            # Updated while the scan runs: moves to the end
+            parts_table[0]['updated_at'] = '2025-01-01T00:01:00+00:00'
+    assert set(seen) == {row['id'] for row in parts_table}
+    assert seen[-1] == 'p000'
@@ -0,0 +1,148 @@
+# backend/tests/test_part_search.py
+"""PartSearchIndex: ranking, typo matching, incremental refresh and keyset listing."""
+import pytest
+
+from backend.database.part_repository import PartRecord
+from backend.services.part_service import PartSearchIndex, decode_cursor, encode_cursor
+
+
+def _part(part_id, name, brand, category, part_number=None, price=10.0, stock=5, updated_at='2025-01-01T00:00:00+00:00',
+          is_active=True, oem_numbers=()):
+    return PartRecord(part_id, f'SKU-{part_id}', name, brand, category, part_number, tuple(oem_numbers), price, stock,
+                      is_active, updated_at)
+
+
+CATALOG = [
+    _part('p1', 'Front Brake Pad Set', 'Bosch', 'Brakes', '0986-494-123', price=45.0),
+    _part('p2', 'Rear Brake Disc', 'Brembo', 'Brakes', '09.A761.11', price=80.0),
+    _part('p3', 'Oil Filter', 'Bosch', 'Filters', 'F026407157', price=8.5, stock=0),
+    _part('p4', 'Alternator', 'Denso', 'Electrical', '104210-3210', price=210.0, oem_numbers=['27060-0D160']),
+    _part('p5', 'Spark Plug Iridium', 'NGK', 'Ignition', 'ILZKR7B11', price=12.0),
+    _part('p6', 'Brake Fluid DOT4', 'Bosch', 'Fluids', '1987479107', price=None),
+]
+
+
+@pytest.fixture
+def index():
+    return PartSearchIndex.build(CATALOG)
+
+
+def _ids(response):
+    return [result['id'] for result in response['results']]
+
+
+def test_exact_word_ranks_above_prefix(index):
+    response = index.search('brake')
+    assert response['match'] == 'all'
+    assert set(_ids(response)) == {'p1', 'p2', 'p6'}
+    assert index.search('bosch')['results'][0]['brand'] == 'Bosch'
+    prefixed = index.search('alt')
+    assert _ids(prefixed) == ['p4']
+    assert prefixed['results'][0]['score'] < index.search('alternator')['results'][0]['score']
+
+
+def test_part_numbers_match_with_or_without_separators(index):
+    assert _ids(index.search('0986494123'))[0] == 'p1'
+    assert _ids(index.search('0986-494-123'))[0] == 'p1'
+    assert _ids(index.search('27060 0D160'))[0] == 'p4' # OEM number
+    # A part-number hit outranks name matches of other parts
+    assert _ids(index.search('ILZKR7B11 brake'))[0] == 'p5'
+
+
+def test_typos_match_with_a_lower_score(index):
+    response = index.search('altenator')
+    assert _ids(response) == ['p4']
+    assert response['results'][0]['score'] < index.search('alternator')['results'][0]['score']
+    assert _ids(index.search('sprak plug')) == ['p5']
+    assert index.search('zzzz')['match'] == 'none'
+
+
+def test_every_word_must_match_unless_none_does(index):
+    assert set(_ids(index.search('bosch brake'))) == {'p1', 'p6'}
+    response = index.search('bosch alternator')
+    assert response['match'] == 'any'
+    assert response['total'] == 4
+
+
+def test_facet_filters_and_paging(index):
+    assert set(_ids(index.search('brake', brand='bosch'))) == {'p1', 'p6'}
+    assert _ids(index.search('brake', category='Brakes', brand='Brembo')) == ['p2']
+    everything = _ids(index.search('brake', limit=10))
+    assert _ids(index.search('brake', limit=2)) + _ids(index.search('brake', limit=2, offset=2)) == everything
+
+
+def test_apply_replaces_and_tombstones_parts(index):
+    version, catalog_version = index.version, index.catalog_version
+    renamed = CATALOG[3]._replace(name='Starter Motor', updated_at='2025-01-02T00:00:00+00:00')
+    removed = CATALOG[4]._replace(is_active=False, updated_at='2025-01-02T00:00:00+00:00')
+    added = _part('p7', 'Cabin Air Filter', 'Mann', 'Filters', 'CU2442', updated_at='2025-01-03T00:00:00+00:00')
+    assert index.apply([renamed, removed, added]) == 3
+
+    assert index.search('alternator')['total'] == 0
+    assert _ids(index.search('starter')) == ['p4']
+    assert index.search('spark')['total'] == 0
+    assert index.get('p5') is None
+    assert set(_ids(index.search('filter'))) == {'p3', 'p7'}
+    assert index.size == 6
+    assert index.superseded == 2
+    assert index.version == version + 1
+    assert index.catalog_version != catalog_version
+    assert index.watermark == '2025-01-03T00:00:00+00:00'
+
+
+def test_apply_skips_rows_already_applied(index):
+    version = index.version
+    assert index.apply([CATALOG[0], CATALOG[4]._replace(id='gone', is_active=False)]) == 0
+    assert index.version == version
+    assert index.superseded == 0
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('price', (False, 12.5, 'p5'))
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 'price') == (False, 12.5, 'p5')
+    assert decode_cursor(encode_cursor('-name', ('brake', 'p1')), '-name') == ('brake', 'p1')
+
+
+@pytest.mark.parametrize('cursor, sort', [
+    (encode_cursor('name', ('brake', 'p1')), 'price'), # Another sort's cursor
+    (encode_cursor('name', ('brake', 'p1')), 'bogus'),
+    (encode_cursor('price', ('cheap', 12.5, 'p5')), 'price'), # Wrong key types
+    (encode_cursor('name', ('brake',)), 'name'),
+    ('not base64!', 'name'),
+    ('e30', 'name'), # {}
+])
+def test_bad_cursors_are_rejected(cursor, sort):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, sort)
+
+
+@pytest.mark.parametrize('sort', ['name', '-name', 'price', '-price', 'updated_at', '-updated_at'])
+def test_list_pages_cover_the_catalog_once(index, sort):
+    seen, cursor = [], None
+    while True:
+        page = index.list_page(sort=sort, cursor=cursor, limit=2)
+        seen += _ids(page)
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(part.id for part in CATALOG)
+    if sort == 'price':
+        assert seen[-1] == 'p6' # Unpriced last
+    if sort == 'name':
+        assert seen == [p.id for p in sorted(CATALOG, key=lambda p: p.name.lower())]
+
+
+def test_list_cursor_survives_catalog_changes(index):
+    first = index.list_page(sort='name', limit=3)
+    index.apply([_part('p0', 'Air Filter', 'Mann', 'Filters', updated_at='2025-01-02T00:00:00+00:00'),
+                 CATALOG[5]._replace(is_active=False, updated_at='2025-01-02T00:00:00+00:00')])
+    rest = index.list_page(sort='name', cursor=first['next_cursor'], limit=10)
+    assert _ids(first) == ['p4', 'p6', 'p1']
+    assert _ids(rest) == ['p3', 'p2', 'p5']
+
+
+def test_list_filters(index):
+    assert set(_ids(index.list_page(brand='bosch', limit=10))) == {'p1', 'p3', 'p6'}
+    assert 'p3' not in _ids(index.list_page(in_stock=True, limit=10))
+    assert _ids(index.list_page(sort='price', min_price=10, max_price=50, limit=10)) == ['p5', 'p1']
@@ -0,0 +1,68 @@
+# backend/tests/test_part_search_concurrency.py
+"""Searches run without the index lock while the refresher applies changes."""
+import sys
+import threading
+
+from backend.benchmarks.bench_parts_search import synthetic_catalog
+from backend.services.part_service import PartSearchIndex
+
+
+def _postings_bitset(field, term):
+    return sum(1 << doc for doc in field.postings[term])
+
+
+def test_bitset_ignores_docs_appended_after_search_started():
+    catalog = synthetic_catalog(6000)
+    index = PartSearchIndex.build(catalog[:2000])
+    size = len(index._docs) # What a search read before the refresh below
+    index.apply(catalog[2000:])
+    field = index._fields['name']
+    for term in ('alternator', 'filter', 'brake'):
+        bitset = field.bitset([term], size)
+        assert bitset >> size == 0
+        assert bitset == _postings_bitset(field, term) & ((1 << size) - 1)
+
+
+def test_frequent_term_not_cached_while_a_refresh_holds_the_lock():
+    index = PartSearchIndex.build(synthetic_catalog(2000))
+    field = index._fields['name']
+    field.dense.clear()
+    with index._write_lock:
+        field.bitset(['brake'], len(index._docs))
+    assert 'brake' not in field.dense
+    field.bitset(['brake'], len(index._docs))
+    assert field.dense['brake'] == _postings_bitset(field, 'brake')
+
+
+def test_searches_during_refresh():
+    catalog = synthetic_catalog(9000)
+    index = PartSearchIndex.build(catalog[:3000])
+    errors, stop = [], threading.Event()
+
+    def search_loop():
+        while not stop.is_set():
+            for query in ('brake', 'bosch oil filter', 'altenator', 'spark pl', 'fil'):
+                try:
+                    index.search(query)
+                except Exception as e:
+                    errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5) # Switch threads as often as possible
+    threads = [threading.Thread(target=search_loop) for _ in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for start in range(3000, 9000, 500):
+            index.apply(catalog[start:start + 500])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    for field in (*index._fields.values(), *index._facets.values()):
+        for term, bitset in field.dense.items():
+            assert bitset == _postings_bitset(field, term), term
+    assert index.search('alternator')['total'] == sum(1 for part in catalog if 'Alternator' in part.name)
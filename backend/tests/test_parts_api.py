@@ -0,0 +1,93 @@
+# backend/tests/test_parts_api.py
+"""/api/parts endpoints over an in-memory catalog index: paging, ETags and 304s."""
+import pytest
+from flask import Flask
+
+from backend.api.parts import parts_bp
+from backend.database.part_repository import FitmentRow
+from backend.benchmarks.bench_parts_search import synthetic_catalog
+from backend.services import part_service
+from backend.services.part_service import FitmentIndex, PartSearchIndex, build_fitment_file
+from backend.utils.http_cache import body_cache
+
+
+@pytest.fixture
+def catalog():
+    return synthetic_catalog(500)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, catalog):
+    body_cache.clear()
+    path = str(tmp_path / 'fitment.idx')
+    build_fitment_file(path, catalog, [FitmentRow(part.id, 'Honda', 'Civic', 2012, 2014, None) for part in catalog[:30]])
+    monkeypatch.setattr(part_service, '_index', PartSearchIndex.build(catalog))
+    monkeypatch.setattr(part_service, '_fitment', FitmentIndex(path))
+    app = Flask(__name__)
+    app.register_blueprint(parts_bp)
+    return app.test_client()
+
+
+def test_fitment_not_modified_skips_building_results(client, monkeypatch):
+    url = '/api/parts/fitment?make=Honda&model=Civic&year=2013&limit=10'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 30
+    assert len(response.get_json()['results']) == 10
+
+    def fail(part_id):
+        raise AssertionError('results built for a 304')
+    monkeypatch.setattr(part_service._index, 'get', fail)
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_etag_ignores_query_parameter_order(client):
+    first = client.get('/api/parts?limit=50&sort=-price&brand=Bosch')
+    second = client.get('/api/parts?brand=Bosch&sort=-price&limit=50')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['ETag'] != client.get('/api/parts?limit=50&sort=price&brand=Bosch').headers['ETag']
+
+
+@pytest.mark.parametrize('if_none_match', ['{etag}', 'W/{etag}', '"stale", {etag}', '*'])
+def test_matching_if_none_match_is_304(client, if_none_match):
+    etag = client.get('/api/parts/search?q=brake').headers['ETag']
+    response = client.get('/api/parts/search?q=brake', headers={'If-None-Match': if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_compressed_variant_has_its_own_etag(client):
+    plain = client.get('/api/parts?limit=100')
+    compressed = client.get('/api/parts?limit=100', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['Vary'] == 'Accept-Encoding'
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    # Either tag revalidates the resource
+    for etag in (plain.headers['ETag'], compressed.headers['ETag']):
+        assert client.get('/api/parts?limit=100', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_catalog_change_invalidates_etag(client, catalog):
+    url = '/api/parts/' + catalog[0].id
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    part_service._index.apply([catalog[0]._replace(price=1.0, updated_at='2026-01-01T00:00:00+00:00')])
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['price'] == 1.0
+
+    list_etag = client.get('/api/parts?limit=5').headers['ETag']
+    part_service._index.apply([catalog[1]._replace(name='Renamed', updated_at='2026-01-02T00:00:00+00:00')])
+    assert client.get('/api/parts?limit=5', headers={'If-None-Match': list_etag}).status_code == 200
+
+
+def test_list_cursor_paging_and_validation(client):
+    first = client.get('/api/parts?limit=20&sort=price').get_json()
+    second = client.get(f"/api/parts?limit=20&sort=price&cursor={first['next_cursor']}").get_json()
+    assert not {r['id'] for r in first['results']} & {r['id'] for r in second['results']}
+    assert first['results'][-1]['price'] <= second['results'][0]['price']
+    assert client.get('/api/parts?sort=bogus').status_code == 400
+    assert client.get('/api/parts?cursor=abc').status_code == 400
+    assert client.get(f"/api/parts?sort=name&cursor={first['next_cursor']}").status_code == 400
@@ -0,0 +1,74 @@
+# backend/tests/test_provisioning_service.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config import config
+from backend.models.user_models import UserProfile
+from backend.services import provisioning_service
+from backend.services.provisioning_service import bulk_register_users, validate_bulk_rows
+from backend.utils.helpers import iterate_async_generator
+
+
+def test_non_object_rows_are_rejected_per_row():
+    rows = [{'email': 'a@example.com', 'password': 'secret1'}, 'b@example.com', None, ['c@example.com', 'secret1'],
+            {'email': 'd@example.com', 'password': 'secret1'}]
+    valid, errors = validate_bulk_rows(rows)
+    assert [row.email for row in valid] == ['a@example.com', 'd@example.com']
+    assert [error['row'] for error in errors] == [1, 2, 3]
+
+
+def test_invalid_and_duplicate_rows():
+    rows = [{'email': 'a@example.com', 'password': 'secret1'}, {'email': 'A@example.com', 'password': 'secret2'},
+            {'email': 'not-an-email', 'password': 'secret1'}, {'email': 'b@example.com', 'password': ''}]
+    valid, errors = validate_bulk_rows(rows)
+    assert [row.email for row in valid] == ['a@example.com']
+    assert [error['row'] for error in errors] == [1, 2, 3]
+
+
+class FakeAdmin:
+    def __init__(self):
+        self.created = []
+
+    def create_user(self, attributes):
+        time.sleep(0.05)
+        self.created.append(attributes['email'])
+        return SimpleNamespace(user=SimpleNamespace(id=f"id-{attributes['email']}"))
+
+
+@pytest.fixture
+def provisioning(monkeypatch):
+    admin, upserted = FakeAdmin(), []
+
+    async def upsert_profiles(profiles):
+        await asyncio.sleep(0.01)
+        upserted.extend(profile['email'] for profile in profiles)
+
+    client = SimpleNamespace(auth=SimpleNamespace(admin=admin))
+    monkeypatch.setattr(provisioning_service, 'get_supabase_service_client', lambda: client)
+    monkeypatch.setattr(provisioning_service, 'upsert_profiles', upsert_profiles)
+    monkeypatch.setattr(config, 'BULK_REGISTRATION_CONCURRENCY', 3)
+    monkeypatch.setattr(config, 'BULK_REGISTRATION_PROFILE_BATCH_SIZE', 100)
+    rows, _ = validate_bulk_rows([{'email': f'user{i}@example.com', 'password': 'secret1'} for i in range(12)])
+    business = UserProfile(id='b1', email='fleet@example.com', account_type='business', company_name='Fleet Co',
+                           created_at='2026-01-01T00:00:00+00:00')
+    return rows, business, admin, upserted
+
+
+def test_every_created_account_gets_a_profile(provisioning):
+    rows, business, admin, upserted = provisioning
+    results = list(iterate_async_generator(lambda: bulk_register_users(rows, business)))
+    assert results[-1]['created'] == 12
+    assert sorted(upserted) == sorted(admin.created)
+
+
+def test_disconnect_keeps_profiles_of_accounts_in_flight(provisioning):
+    rows, business, admin, upserted = provisioning
+    stream = iterate_async_generator(lambda: bulk_register_users(rows, business))
+    first = next(stream)
+    assert first['status'] == 'created'
+    stream.close() # Client went away
+    assert 1 < len(admin.created) < len(rows) # Calls already made finished; queued rows were dropped
+    assert sorted(upserted) == sorted(admin.created)
@@ -0,0 +1,73 @@
+# backend/tests/test_resilience.py
+import asyncio
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+from python_http_client.exceptions import HTTPError
+from twilio.base.exceptions import TwilioRestException
+
+from backend.utils.resilience import CircuitBreaker, CircuitOpenError, Dependency, is_transient
+
+
+@pytest.mark.parametrize('exc', [
+    TwilioRestException(400, 'https://api.twilio.com', 'Invalid phone number', code=21211),
+    TwilioRestException(404, 'https://api.twilio.com', 'Not found', code=20404),
+    APIError({'code': '23505', 'message': 'duplicate key value violates unique constraint'}),
+    APIError({'code': '42501', 'message': 'permission denied for table parts'}),
+    APIError({'code': 'PGRST116', 'message': 'JSON object requested, multiple (or no) rows returned'}),
+    HTTPError(400, 'Bad Request', b'{}', {}),
+    ValueError('bad input'),
+])
+def test_client_errors_are_not_transient(exc):
+    assert not is_transient(exc)
+
+
+@pytest.mark.parametrize('exc', [
+    TwilioRestException(503, 'https://api.twilio.com', 'Service unavailable', code=20503),
+    TwilioRestException(429, 'https://api.twilio.com', 'Too many requests', code=20429),
+    APIError({'code': 'PGRST001', 'message': 'could not connect'}),
+    HTTPError(502, 'Bad Gateway', b'{}', {}),
+    HTTPError('429', 'Too Many Requests', b'{}', {}),
+    TimeoutError(),
+    httpx.ConnectError('refused'),
+])
+def test_upstream_failures_are_transient(exc):
+    assert is_transient(exc)
+
+
+def _half_open_dependency() -> Dependency:
+    dep = Dependency('test', timeout=1.0)
+    dep.breaker.state, dep.breaker.opened_at = CircuitBreaker.OPEN, time.monotonic() - dep.breaker.recovery_seconds - 1
+    return dep
+
+
+def test_stream_closed_mid_way_releases_the_probe():
+    dep = _half_open_dependency()
+
+    async def stream():
+        with dep.guard():
+            for chunk in ('a', 'b', 'c'):
+                yield chunk
+
+    async def client_disconnects():
+        events = stream()
+        assert await events.__anext__() == 'a'
+        await events.aclose() # GeneratorExit at the yield
+
+    asyncio.run(client_disconnects())
+    assert dep.breaker.state == CircuitBreaker.HALF_OPEN
+    dep.breaker.before_call() # The next call may probe
+    dep.breaker.record_success()
+    assert dep.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    dep = _half_open_dependency()
+    with pytest.raises(TimeoutError):
+        with dep.guard():
+            raise TimeoutError()
+    assert dep.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        dep.breaker.before_call()
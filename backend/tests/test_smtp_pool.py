@@ -0,0 +1,52 @@
+# backend/tests/test_smtp_pool.py
+import smtplib
+
+import pytest
+
+from backend.utils.smtp_pool import SMTPPool
+
+
+class FakeSession:
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+        self.closed = False
+
+    def sendmail(self, from_addr, to_addrs, message):
+        if self.error:
+            raise self.error
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = SMTPPool('smtp.example.com', 465, '', '', size=2)
+    sessions = []
+
+    def connect():
+        session = FakeSession()
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(pool, '_connect', connect)
+    pool.sessions = sessions
+    return pool
+
+
+def test_rejected_recipient_keeps_session(pool):
+    pool.sendmail('a@example.com', ['b@example.com'], 'hi')
+    pool.sessions[0].error = smtplib.SMTPRecipientsRefused({'b@example.com': (550, b'no such user')})
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.sendmail('a@example.com', ['b@example.com'], 'hi')
+    assert not pool.sessions[0].closed
+    assert pool.stats()['idle'] == 1
+
+
+def test_connection_error_discards_session(pool):
+    pool.sendmail('a@example.com', ['b@example.com'], 'hi')
+    pool.sessions[0].error = TimeoutError('timed out')
+    with pytest.raises(TimeoutError):
+        pool.sendmail('a@example.com', ['b@example.com'], 'hi')
+    assert pool.sessions[0].closed
+    assert pool.stats()['idle'] == 0
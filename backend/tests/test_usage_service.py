@@ -0,0 +1,74 @@
+# backend/tests/test_usage_service.py
+"""Daily AI usage totals shared between worker processes through 'ai_usage_logs'."""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config import config
+from backend.database import supabase_client
+from backend.database.fake_supabase import fake_store
+from backend.models.user_models import UserProfile
+from backend.services import usage_service
+
+
+def _usage(input_tokens: int, output_tokens: int):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens, requests=1,
+                           input_tokens_details=SimpleNamespace(cached_tokens=0))
+
+
+def _log_row(user_id: str, total: int) -> dict:
+    return {'user_id': user_id, 'session_id': 's', 'usage_day': usage_service._usage_day(), 'input_tokens': total,
+            'output_tokens': 0, 'cached_tokens': 0, 'total_tokens': total, 'tool_calls': 0, 'requests': 1,
+            'created_at': '2026-01-01T00:00:00+00:00'}
+
+
+def _refresh_view() -> None:
+    """What the ai_usage_daily_totals view returns, from the fake 'ai_usage_logs' rows."""
+    totals = {}
+    for row in fake_store.tables[usage_service.USAGE_TABLE]:
+        total = totals.setdefault((row['usage_day'], row['user_id']), {
+            'usage_day': row['usage_day'], 'user_id': row['user_id'], 'input_tokens': 0, 'output_tokens': 0,
+            'cached_tokens': 0, 'tool_calls': 0, 'runs': 0})
+        for column in ('input_tokens', 'output_tokens', 'cached_tokens', 'tool_calls'):
+            total[column] += row[column]
+        total['runs'] += 1
+    fake_store.tables[usage_service.DAILY_TOTALS_VIEW][:] = totals.values()
+
+
+@pytest.fixture
+def usage_logs(monkeypatch):
+    monkeypatch.setattr(config, 'DB_BACKEND', 'fake')
+    for client in ('supabase_anon', 'supabase_service'): # Restored after the test, like the config
+        monkeypatch.setattr(supabase_client, client, getattr(supabase_client, client))
+    supabase_client.init_supabase_client()
+    fake_store.reset()
+    fake_store.seed({usage_service.USAGE_TABLE: [], usage_service.DAILY_TOTALS_VIEW: []})
+    monkeypatch.setattr(usage_service, '_daily_usage', {})
+    monkeypatch.setattr(usage_service, '_pending_rows', [])
+    monkeypatch.setattr(config, 'AI_DAILY_TOKEN_QUOTA_PERSONAL', 1000)
+    return fake_store.tables[usage_service.USAGE_TABLE]
+
+
+def test_sync_counts_other_workers_and_unflushed_runs(usage_logs):
+    user = UserProfile(id='u1', email='u1@example.com', created_at='2026-01-01T00:00:00+00:00')
+    usage_service.record_run_usage('u1', 's1', _usage(300, 100))
+    assert usage_service.flush_usage() == 1
+    usage_service.record_run_usage('u1', 's2', _usage(100, 0)) # Still buffered
+    usage_logs.append(_log_row('u1', 550)) # Flushed by another worker
+    usage_logs.append(_log_row('u2', 50))
+    _refresh_view()
+
+    assert usage_service.sync_daily_totals() == 2
+    assert usage_service.get_user_usage_today('u1')['total_tokens'] == 1050
+    assert usage_service.get_user_usage_today('u2')['total_tokens'] == 50
+    assert usage_service.check_quota(user)[0] is False
+
+
+def test_sync_pages_through_many_users(usage_logs, monkeypatch):
+    monkeypatch.setattr(usage_service, 'SYNC_PAGE_SIZE', 3)
+    usage_logs.extend(_log_row(f'u{i}', 10) for i in range(7) for _ in range(i + 1))
+    _refresh_view()
+    assert usage_service.sync_daily_totals() == 7
+    assert usage_service.get_user_usage_today('u6') | {'usage_day': None} == {
+        'usage_day': None, 'input_tokens': 70, 'output_tokens': 0, 'cached_tokens': 0, 'total_tokens': 70,
+        'tool_calls': 0, 'runs': 7}
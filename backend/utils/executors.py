@@ -0,0 +1,145 @@
+# backend/utils/executors.py
+"""
+Named, separately sized thread pools for blocking work.
+
+asyncio.to_thread sends everything to the loop's default executor, so a slow
+SMTP server can occupy the threads a Supabase Auth call needs. Blocking calls
+go here instead, one pool per kind of dependency:
+
+    message = await run_blocking('sms', client.messages.create, to=number, body=body)
+
+Each pool has a fixed number of workers and a bounded queue; when the queue is
+full, ExecutorSaturatedError is raised instead of queueing without limit.
+Queue length, active threads and queue wait time are reported per pool.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+from typing import Any, Callable
+
+from ..config import config
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when an executor's queue is full."""
+
+    def __init__(self, name: str, max_queue: int):
+        super().__init__(f"Executor '{name}' is saturated ({max_queue} tasks queued)")
+        self.executor = name
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor with a queue limit and saturation counters."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-exec")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.max_active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> concurrent.futures.Future:
+        """Queues `fn(*args, **kwargs)`. Raises ExecutorSaturatedError if max_queue tasks are already waiting."""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(self.name, self.max_queue)
+            self.queued += 1
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        enqueued_at = time.perf_counter()
+        started = threading.Event() # Set once the task has left the queue
+
+        def task():
+            started_at = time.perf_counter()
+            wait_ms = (started_at - enqueued_at) * 1000
+            with self._lock:
+                started.set()
+                self.queued -= 1
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.total_run_ms += (time.perf_counter() - started_at) * 1000
+
+        def on_done(future: concurrent.futures.Future):
+            # A future cancelled while still queued never runs `task`
+            if future.cancelled():
+                with self._lock:
+                    if not started.is_set():
+                        self.queued -= 1
+                        self.cancelled += 1
+
+        future = self._pool.submit(task)
+        future.add_done_callback(on_done)
+        return future
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            started = self.submitted - self.queued - self.cancelled
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queued': self.queued,
+                'active': self.active,
+                'max_queued': self.max_queued,
+                'max_active': self.max_active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'cancelled': self.cancelled,
+                'avg_wait_ms': round(self.total_wait_ms / started, 3) if started else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'avg_run_ms': round(self.total_run_ms / self.completed, 3) if self.completed else 0.0,
+            }
+
+
+executors: dict[str, BoundedExecutor] = {
+    'db': BoundedExecutor('db', config.EXECUTOR_DB_WORKERS, config.EXECUTOR_MAX_QUEUE),           # Supabase (GoTrue) clients
+    'email': BoundedExecutor('email', config.EXECUTOR_EMAIL_WORKERS, config.EXECUTOR_MAX_QUEUE),  # SendGrid, SMTP
+    'sms': BoundedExecutor('sms', config.EXECUTOR_SMS_WORKERS, config.EXECUTOR_MAX_QUEUE),        # Twilio SMS/WhatsApp
+    'default': BoundedExecutor('default', config.EXECUTOR_DEFAULT_WORKERS, config.EXECUTOR_MAX_QUEUE),
+}
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    return executors[name]
+
+
+async def run_blocking(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking call on the named executor and awaits it (contextvars are propagated, as with to_thread)."""
+    context = contextvars.copy_context()
+    future = executors[name].submit(context.run, fn, *args, **kwargs)
+    return await asyncio.wrap_future(future)
+
+
+def executor_stats() -> list[dict[str, Any]]:
+    return [executor.stats() for executor in executors.values()]
+
+
+def shutdown_executors() -> None:
+    for executor in executors.values():
+        executor.shutdown()
@@ -0,0 +1,31 @@
+# backend/utils/helpers.py
+import asyncio
+from typing import AsyncIterator, Callable, Iterator
+
+
+def iterate_async_generator(make_generator: Callable[[], AsyncIterator]) -> Iterator:
+    """
+    Drives an async generator from synchronous code (e.g. a streamed Flask response).
+    The generator runs on its own event loop, created and closed with the iteration;
+    tasks it leaves behind are cancelled and awaited before the loop closes.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    agen = make_generator()
+    try:
+        while True:
+            try:
+                item = loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+            yield item
+    finally:
+        try:
+            loop.run_until_complete(agen.aclose())
+            leftover = asyncio.all_tasks(loop)
+            for task in leftover:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*leftover, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
@@ -0,0 +1,101 @@
+# backend/utils/http_cache.py
+"""
+Conditional GET and compression for cacheable JSON responses.
+
+`cacheable_json(version, build)` derives a strong ETag from `version` (anything
+that changes whenever the data behind the response does), the path and the
+canonicalized query string, so every worker computes the same tag for the same
+catalog. A matching If-None-Match is answered 304 before `build` runs. Otherwise
+the body is serialized once and compressed (brotli when the optional `brotli`
+package is installed and accepted, else gzip) if larger than
+HTTP_COMPRESS_MIN_BYTES; encoded bodies are kept in a small LRU keyed by
+(ETag, encoding), so a popular page is not re-encoded per request.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Callable
+
+from flask import Response, request
+
+from ..config import config
+from .cache import TTLCache
+
+try:
+    import brotli # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+body_cache = TTLCache(maxsize=config.HTTP_BODY_CACHE_SIZE, ttl=config.HTTP_BODY_CACHE_TTL_SECONDS, name='http_bodies')
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    """Accept-Encoding -> {coding: q}."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def _choose_encoding() -> str | None:
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    quality = lambda coding: accepted.get(coding, accepted.get('*', 0.0))
+    if brotli is not None and quality('br') > 0 and quality('br') >= quality('gzip'):
+        return 'br'
+    if quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2), ignoring the -gzip/-br suffix of encoded variants."""
+    if header.strip() == '*':
+        return True
+    opaque = etag.strip('"')
+    for candidate in header.split(','):
+        tag = candidate.strip().removeprefix('W/').strip('"')
+        if tag.split('-', 1)[0] == opaque:
+            return True
+    return False
+
+
+def cacheable_json(version: str, build: Callable[[], Any], max_age: int | None = None) -> Response:
+    """200 with ETag (and Content-Encoding when compressed), or 304 if the client's copy is current."""
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.sha256(json.dumps([version, request.path, args]).encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+    max_age = config.HTTP_CACHE_MAX_AGE_SECONDS if max_age is None else max_age
+    headers = {
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': f'public, max-age={max_age}' if max_age > 0 else 'public, no-cache', # no-cache: revalidate, a 304 is cheap
+    }
+    if _etag_matches(request.headers.get('If-None-Match', ''), etag):
+        return Response(status=304, headers={**headers, 'ETag': etag})
+
+    encoding = _choose_encoding()
+    cached = body_cache.get((etag, encoding))
+    if cached is None:
+        body, applied = json.dumps(build(), separators=(',', ':'), default=str).encode(), None
+        if encoding and len(body) >= config.HTTP_COMPRESS_MIN_BYTES:
+            if encoding == 'br':
+                body = brotli.compress(body, quality=config.HTTP_BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=config.HTTP_GZIP_LEVEL, mtime=0) # mtime=0: same bytes every time
+            applied = encoding
+        cached = (body, applied)
+        body_cache.set((etag, encoding), cached)
+    body, applied = cached
+    if applied:
+        headers['Content-Encoding'] = applied
+        etag = f'"{digest}-{applied}"' # Each representation needs its own strong tag
+    return Response(body, status=200, mimetype='application/json', headers={**headers, 'ETag': etag})
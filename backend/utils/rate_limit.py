@@ -0,0 +1,89 @@
+# backend/utils/rate_limit.py
+"""
+Token-bucket rate limiting and bounded concurrent fan-out.
+
+    bucket = TokenBucket(rate=5, burst=5)       # e.g. a provider's messages/second
+    results = await fan_out(numbers, send_one, concurrency=8, limiter=bucket)
+
+TokenBucket is thread-safe and works from any event loop, so one bucket can
+throttle every caller sharing a provider account (request handlers and the
+outbox worker alike). Callers reserve a token and sleep until it is due, so
+waiters are served in arrival order.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Iterable
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise ValueError("TokenBucket needs rate > 0 and burst >= 1")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.throttled = 0 # Acquisitions that had to wait
+        self.total_wait_seconds = 0.0
+
+    def _reserve(self, tokens: float) -> float:
+        """Takes `tokens` (possibly going negative) and returns how long the caller must wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            self.acquired += 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait:
+                self.throttled += 1
+                self.total_wait_seconds += wait
+            return wait
+
+    async def acquire(self, tokens: float = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Takes `tokens` only if available right now."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            self.acquired += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rate_per_second': self.rate,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'total_wait_seconds': round(self.total_wait_seconds, 3),
+            }
+
+
+async def fan_out(items: Iterable[Any], fn: Callable[[Any], Awaitable[Any]], *, concurrency: int,
+                  limiter: TokenBucket | None = None) -> list[Any]:
+    """
+    Runs `fn(item)` for every item with at most `concurrency` in flight, each
+    start gated by `limiter`. Returns results in input order; an item whose call
+    raised has the exception in its slot (one failure never cancels the rest).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            return await fn(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
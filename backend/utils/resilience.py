@@ -0,0 +1,279 @@
+# backend/utils/resilience.py
+"""
+Timeouts, retries, circuit breakers and hedged requests for upstream calls.
+
+Each upstream (Supabase DB, Supabase Auth, OpenAI, Twilio, SendGrid, SMTP) is
+a named Dependency with its own timeout, retry budget and circuit breaker:
+
+    response = await call('supabase_db', lambda: query.execute(), idempotent=True)
+    user = await call_blocking('supabase_auth', client.auth.get_user, jwt=token, idempotent=True)
+
+Only transient failures (timeouts, connection errors, 5xx/429) are retried, and
+only for idempotent calls; they are also what trips a breaker. Client errors
+(bad credentials, missing rows) pass straight through. A timeout stops the
+caller from waiting - a blocking call already running in a thread is not killed,
+but it only ever occupies a thread of its own dependency's executor.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable
+
+import httpx
+import openai
+from gotrue.errors import AuthRetryableError
+
+from ..config import config
+from .executors import run_blocking
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(f"{dependency} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for failures worth retrying and counting against a breaker."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError,
+                        AuthRetryableError, openai.APIConnectionError, openai.RateLimitError,
+                        openai.InternalServerError)):
+        return True
+    # HTTP status: Twilio (status), SendGrid/python_http_client (status_code). `code` is never one:
+    # Twilio error numbers (21211) and postgrest SQLSTATEs (23505) are permanent client errors.
+    for attr in ('status', 'status_code'):
+        value = getattr(exc, attr, None)
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        if isinstance(value, int) and (value >= 500 or value == 429):
+            return True
+    return getattr(exc, 'code', None) in ('PGRST000', 'PGRST001', 'PGRST002') # PostgREST could not reach Postgres
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. Opens after `failure_threshold` transient failures,
+    rejects calls for `recovery_seconds`, then lets a single probe through (half-open):
+    success closes it, failure opens it again. Thread-safe; shared by all event loops.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not go out."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.recovery_seconds - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(remaining, 0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit '{self.name}' closed.")
+            self.state = self.CLOSED
+
+    def release_probe(self) -> None:
+        """The call was abandoned (cancelled) before an outcome: lets the next call probe instead."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, transient: bool) -> None:
+        with self._lock:
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if not transient:
+                # The upstream answered; a client error says nothing about its health
+                if was_probe:
+                    self.state = self.CLOSED
+                    self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"WARN: Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures.")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+class Dependency:
+    """Policy and counters for one upstream service."""
+
+    def __init__(self, name: str, timeout: float, max_retries: int = 0, hedge_after: float | None = None,
+                 executor: str = 'default'):
+        self.name = name
+        self.executor = executor # utils.executors pool for blocking calls
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after # seconds; None disables hedging
+        self.breaker = CircuitBreaker(name, config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RECOVERY_SECONDS)
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'failures': 0, 'timeouts': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0}
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+
+    @contextmanager
+    def guard(self):
+        """
+        Breaker bookkeeping around a call that cannot be wrapped in call() (e.g. a stream).
+        Raises CircuitOpenError on entry if the breaker is open.
+        """
+        self.breaker.before_call()
+        self.count('calls')
+        try:
+            yield
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self.count('failures')
+                self.breaker.record_failure(is_transient(e))
+            else:
+                self.breaker.release_probe() # Cancelled or closed mid-stream: says nothing about the upstream
+            raise
+        else:
+            self.breaker.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            'name': self.name,
+            'timeout_seconds': self.timeout,
+            'max_retries': self.max_retries,
+            'hedge_after_seconds': self.hedge_after,
+            'executor': self.executor,
+            **counters,
+            'breaker': self.breaker.stats(),
+        }
+
+
+def _hedge_delay(ms: float) -> float | None:
+    return ms / 1000 if ms > 0 else None
+
+
+dependencies: dict[str, Dependency] = {
+    'supabase_db': Dependency('supabase_db', config.SUPABASE_DB_TIMEOUT_SECONDS, config.UPSTREAM_MAX_RETRIES,
+                              _hedge_delay(config.DB_HEDGE_AFTER_MS)),
+    'supabase_auth': Dependency('supabase_auth', config.SUPABASE_AUTH_TIMEOUT_SECONDS, config.UPSTREAM_MAX_RETRIES,
+                                executor='db'),
+    'openai': Dependency('openai', config.OPENAI_TIMEOUT_SECONDS),
+    'twilio': Dependency('twilio', config.TWILIO_TIMEOUT_SECONDS, executor='sms'),
+    'sendgrid': Dependency('sendgrid', config.SENDGRID_TIMEOUT_SECONDS, executor='email'),
+    'smtp': Dependency('smtp', config.SMTP_TIMEOUT_SECONDS, executor='email'),
+}
+
+
+def dependency(name: str) -> Dependency:
+    return dependencies[name]
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    ceiling = min(config.UPSTREAM_RETRY_MAX_DELAY_SECONDS, config.UPSTREAM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+async def _attempt(dep: Dependency, fn: Callable[[], Awaitable[Any]]) -> Any:
+    try:
+        return await asyncio.wait_for(fn(), timeout=dep.timeout)
+    except asyncio.TimeoutError:
+        dep.count('timeouts')
+        raise
+
+
+async def _hedged_attempt(dep: Dependency, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Starts a second identical request if the first has not answered within hedge_after; first success wins."""
+    first = asyncio.ensure_future(_attempt(dep, fn))
+    done, _ = await asyncio.wait({first}, timeout=dep.hedge_after)
+    if done:
+        return first.result()
+
+    dep.count('hedges')
+    second = asyncio.ensure_future(_attempt(dep, fn))
+    pending = {first, second}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        dep.count('hedge_wins')
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call(name: str, fn: Callable[[], Awaitable[Any]], *, idempotent: bool = False, hedge: bool = False) -> Any:
+    """
+    Runs `fn()` (a coroutine factory, called once per attempt) under the dependency's policy.
+    Retries transient failures only when `idempotent`; `hedge` enables a hedged second request.
+    Raises CircuitOpenError when the breaker is open, otherwise the last error.
+    """
+    dep = dependencies[name]
+    retries = dep.max_retries if idempotent else 0
+    use_hedge = hedge and idempotent and dep.hedge_after is not None
+    attempt = 0
+    while True:
+        try:
+            with dep.guard(): # Counts every attempt against the breaker
+                if use_hedge:
+                    return await _hedged_attempt(dep, fn)
+                return await _attempt(dep, fn)
+        except Exception as e:
+            if attempt >= retries or not is_transient(e): # CircuitOpenError is not transient
+                raise
+            retry_error = e
+        attempt += 1
+        dep.count('retries')
+        delay = _backoff(attempt)
+        print(f"WARN: {name} call failed ({type(retry_error).__name__}); retry {attempt}/{retries} in {delay * 1000:.0f}ms.")
+        await asyncio.sleep(delay)
+
+
+async def call_blocking(name: str, fn: Callable[..., Any], *args, idempotent: bool = False, **kwargs) -> Any:
+    """call() for a blocking client method, run on the dependency's executor (see utils.executors)."""
+    executor = dependencies[name].executor
+    return await call(name, lambda: run_blocking(executor, fn, *args, **kwargs), idempotent=idempotent)
+
+
+def resilience_stats() -> list[dict]:
+    return [dep.stats() for dep in dependencies.values()]
@@ -0,0 +1,107 @@
+# backend/utils/security.py
+"""
+Local verification of Supabase access tokens (JWTs).
+
+Supabase signs access tokens either with the project's shared JWT secret
+(HS256) or with asymmetric signing keys published as a JWKS (RS256/ES256).
+Verifying locally avoids an HTTP round trip to Supabase Auth on every
+authenticated request. Revocation is not visible locally, so routes that
+must honour it (password/profile changes, admin) still ask Supabase Auth.
+"""
+import base64
+import json
+import threading
+import time
+
+import jwt
+from jwt import PyJWKClient
+
+from ..config import config
+from .cache import TTLCache
+
+_ASYMMETRIC_ALGORITHMS = ('RS256', 'ES256')
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be verified locally (no secret / JWKS unreachable)."""
+
+
+# Verified claims keyed by raw token, kept until the token expires. The same token is
+# presented on every request of a session, so repeat verifications become a dict hit.
+verified_token_cache = TTLCache(maxsize=4096, ttl=0, name='verified_tokens')
+
+_jwks_client: PyJWKClient | None = None
+_jwks_lock = threading.Lock()
+
+
+def _get_jwks_client() -> PyJWKClient:
+    """Returns the shared JWKS client. Keys are cached and refetched when an unknown 'kid' shows up (key rotation)."""
+    global _jwks_client
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                if not config.SUPABASE_JWKS_URL:
+                    raise LocalVerificationUnavailable("JWKS URL not configured.")
+                _jwks_client = PyJWKClient(
+                    config.SUPABASE_JWKS_URL,
+                    cache_keys=True,
+                    lifespan=config.SUPABASE_JWKS_CACHE_SECONDS,
+                    timeout=5,
+                )
+    return _jwks_client
+
+
+def _resolve_signing_key(token: str, algorithm: str):
+    if algorithm == 'HS256':
+        if not config.SUPABASE_JWT_SECRET:
+            raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET not configured.")
+        return config.SUPABASE_JWT_SECRET
+    if algorithm in _ASYMMETRIC_ALGORITHMS:
+        try:
+            return _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientConnectionError as e:
+            raise LocalVerificationUnavailable(f"JWKS fetch failed: {e}") from e
+        except jwt.PyJWKClientError as e:
+            # e.g. a 'kid' that is not in the (freshly refetched) key set
+            raise jwt.InvalidTokenError(f"No matching signing key: {e}") from e
+    raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+
+def _unverified_algorithm(token: str) -> str:
+    """Reads 'alg' from the JWT header without validating the rest of the token."""
+    try:
+        header_segment = token.split('.', 1)[0]
+        header = json.loads(base64.urlsafe_b64decode(header_segment + '=' * (-len(header_segment) % 4)))
+        return header.get('alg', '')
+    except (ValueError, AttributeError) as e:
+        raise jwt.DecodeError(f"Invalid token header: {e}") from e
+
+
+def verify_access_token(token: str) -> dict:
+    """
+    Verifies signature, expiry, audience and issuer of a Supabase access token.
+    Returns the token claims.
+    Raises jwt.InvalidTokenError for invalid/expired tokens and
+    LocalVerificationUnavailable when the token cannot be checked locally.
+    """
+    claims = verified_token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    algorithm = _unverified_algorithm(token)
+    key = _resolve_signing_key(token, algorithm)
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=config.SUPABASE_JWT_AUDIENCE,
+        issuer=config.SUPABASE_JWT_ISSUER or None,
+        leeway=config.JWT_LEEWAY_SECONDS,
+        options={'require': ['exp', 'sub']},
+    )
+
+    # Keep the claims until the token itself expires
+    remaining = claims['exp'] + config.JWT_LEEWAY_SECONDS - time.time()
+    if remaining > 0:
+        verified_token_cache.set(token, claims, ttl=remaining)
+    return claims
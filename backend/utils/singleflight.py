@@ -0,0 +1,60 @@
+# backend/utils/singleflight.py
+"""
+Single-flight call coalescing.
+
+Concurrent calls for the same key share one in-flight execution and its result.
+Flask runs each async view in its own event loop (and thread), so the shared
+state is a thread-safe concurrent.futures.Future that any loop can await.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, concurrent.futures.Future] = {}
+        self.executions = 0  # calls that actually ran
+        self.coalesced = 0   # calls that joined an in-flight execution
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn()` for `key`, unless a call for the same key is already running; then waits for its result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+                leader = True
+                self.executions += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executions + self.coalesced
+            return {
+                'name': self.name,
+                'in_flight': len(self._inflight),
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesced_ratio': round(self.coalesced / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,138 @@
+# backend/utils/smtp_pool.py
+"""
+A small pool of authenticated SMTP sessions.
+
+Opening an SMTP_SSL session costs a TCP connect, a TLS handshake, EHLO and
+AUTH before the first byte of mail; the pool pays that once per connection
+and reuses it. Idle sessions are health-checked with NOOP before reuse,
+sessions idle longer than max_idle_seconds are replaced (providers drop them
+anyway), and a send that fails because the server hung up is retried once on
+a fresh session. Thread-safe; sessions are used from the 'email' executor.
+"""
+import smtplib
+import threading
+import time
+from collections import deque
+
+
+class SMTPPool:
+    def __init__(self, host: str, port: int, username: str, password: str, *, use_ssl: bool = True, size: int = 4,
+                 timeout: float = 20, max_idle_seconds: float = 60, healthcheck_after_seconds: float = 5):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.size = size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.healthcheck_after_seconds = healthcheck_after_seconds
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: deque[tuple[smtplib.SMTP, float]] = deque() # (session, returned_at); most recent on the right
+        self._closed = False
+        self.counters = {'connects': 0, 'reuses': 0, 'healthcheck_failures': 0, 'reconnects': 0, 'sent': 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            session = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            session = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.username:
+                session.login(self.username, self.password)
+        except BaseException:
+            self._discard(session)
+            raise
+        self._count('connects')
+        return session
+
+    @staticmethod
+    def _discard(session: smtplib.SMTP) -> None:
+        try:
+            session.quit()
+        except Exception:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def _checkout(self) -> tuple[smtplib.SMTP, bool]:
+        """Returns (session, reused). Reused sessions idle for a while are NOOP-checked first."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                session, returned_at = self._idle.pop()
+            idle_for = now - returned_at
+            if idle_for > self.max_idle_seconds:
+                self._discard(session)
+                continue
+            if idle_for > self.healthcheck_after_seconds:
+                try:
+                    healthy = session.noop()[0] == 250
+                except (smtplib.SMTPException, OSError):
+                    healthy = False
+                if not healthy:
+                    self._count('healthcheck_failures')
+                    self._discard(session)
+                    continue
+            self._count('reuses')
+            return session, True
+        return self._connect(), False
+
+    def _checkin(self, session: smtplib.SMTP) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append((session, time.monotonic()))
+                return
+        self._discard(session)
+
+    def _send(self, session: smtplib.SMTP, from_addr: str, to_addrs: list[str], message: str) -> None:
+        try:
+            session.sendmail(from_addr, to_addrs, message)
+        except smtplib.SMTPServerDisconnected:
+            self._discard(session)
+            raise
+        except smtplib.SMTPException: # Before OSError, which it subclasses
+            self._checkin(session) # Rejected message; sendmail has RSET the session, which stays usable
+            raise
+        except OSError:
+            self._discard(session)
+            raise
+        self._checkin(session)
+        self._count('sent')
+
+    def sendmail(self, from_addr: str, to_addrs: list[str], message: str) -> None:
+        """Sends one message, reconnecting once if a pooled session turns out to be dead."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No SMTP session available within {self.timeout}s")
+        try:
+            session, reused = self._checkout()
+            try:
+                self._send(session, from_addr, to_addrs, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # A stale pooled session; a timeout is not retried since the message may have gone out
+                if not reused:
+                    raise
+                self._count('reconnects')
+                self._send(self._connect(), from_addr, to_addrs, message)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            sessions = [session for session, _ in self._idle]
+            self._idle.clear()
+        for session in sessions:
+            self._discard(session)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), **self.counters}
@@ -1,10 +1,26 @@
 // frontend/src/api/parts.js
 import { apiClient } from './index';
 
+// Drops empty values so equivalent requests share one URL (and one cached response)
+const toQuery = (params = {}) => {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+  ).toString();
+  return query ? `?${query}` : '';
+};
+
 const partsApi = {
   getAllParts: async () => {
     return await apiClient.get('/parts');
   },
+  // One page of the catalog: { results, next_cursor, total, sort }.
+  // Pass the previous page's next_cursor as `cursor`; filters: sort, brand, category, in_stock, min_price, max_price.
+  listParts: async (params = {}) => {
+    return await apiClient.get(`/parts${toQuery(params)}`);
+  },
+  searchParts: async (q, params = {}) => {
+    return await apiClient.get(`/parts/search${toQuery({ q, ...params })}`);
+  },
   // Add more methods as needed
 };
 